@@ -0,0 +1,99 @@
+# Em benchmarks/carregamento_tipado.py
+"""Compara memória e tempo do carregamento de chamadas sem tipos x com tipos compactos.
+
+Uso: python -m benchmarks.carregamento_tipado [numero_de_linhas]
+"""
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+import database_setup
+from scripts import db_utils
+
+QUERY = """
+SELECT c.id, c.horario, c.data, c.status, c.justificativa, c.ligacao_feita,
+       c.professor_responsavel, c.categoria_justificativa, a.id AS aluno_id, a.nome AS nome_aluno
+FROM chamadas c JOIN alunos a ON c.aluno_id = a.id
+ORDER BY c.data DESC
+"""
+
+
+def popular_banco(db_path: Path, linhas: int, alunos: int = 400) -> None:
+    """Gera um histórico sintético de chamadas (sem disparar os triggers de resumo)."""
+    database_setup.aplicar_migracoes(db_path)
+    rnd = random.Random(42)
+    professores = [f"Professor {i}" for i in range(12)]
+    categorias = ["Saude", "Trabalho", "Familia", "Transporte", "Pessoal", None]
+    horarios = [f"{h:02d}:00 às {h + 1:02d}:00" for h in range(8, 20)]
+    inicio = date(2018, 1, 1)
+
+    with database_setup.transacao(db_path) as conn:
+        for gatilho in [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")]:
+            conn.execute(f"DROP TRIGGER {gatilho}")
+        conn.executemany("INSERT INTO alunos (nome) VALUES (?)", [(f"ALUNO {i:04d}",) for i in range(alunos)])
+        registros = []
+        for i in range(linhas):
+            faltou = rnd.random() < 0.2
+            registros.append((
+                rnd.randrange(1, alunos + 1),
+                (inicio + timedelta(days=i // alunos)).isoformat(),
+                f"{i}-{rnd.choice(horarios)}",
+                "Faltou" if faltou else "Presente",
+                "Consulta médica" if faltou and rnd.random() < 0.5 else None,
+                int(faltou and rnd.random() < 0.7),
+                rnd.choice(professores),
+                rnd.choice(categorias) if faltou else None,
+            ))
+        conn.executemany("""
+            INSERT INTO chamadas (aluno_id, data, horario, status, justificativa, ligacao_feita,
+                                  professor_responsavel, categoria_justificativa)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, registros)
+
+
+def medir(nome: str, funcao, repeticoes: int = 3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        df = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    memoria = df.memory_usage(deep=True).sum() / 1024 ** 2
+    print(f"{nome:<38} {min(tempos) * 1000:9.0f} ms {memoria:10.1f} MiB")
+    return df
+
+
+def main(linhas: int = 500_000) -> None:
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = Path(pasta) / "bench.db"
+        popular_banco(db_path, linhas)
+        conn = database_setup.get_db_connection(db_path)
+
+        def sem_tipos():
+            df = pd.read_sql_query(QUERY, conn)
+            df['data'] = pd.to_datetime(df['data'])
+            df['ligacao_feita'] = df['ligacao_feita'].apply(lambda x: bool(x) if x is not None else False)
+            return df
+
+        def sem_tipos_com_reparse():
+            # Comportamento antigo: cada consumidor (padrões, calendário, dashboard) reconvertia 'data'
+            df = sem_tipos()
+            for _ in range(3):
+                df['data'] = pd.to_datetime(df['data'].astype(str))
+            return df
+
+        print(f"Chamadas sintéticas: {linhas:,}")
+        print(f"{'Carregamento':<38} {'tempo':>12} {'memória':>14}")
+        medir("sem tipos (antigo)", sem_tipos)
+        medir("sem tipos + 3 reconversões de data", sem_tipos_com_reparse, repeticoes=1)
+        medir("tipado (ler_chamadas_tipadas)", lambda: db_utils.ler_chamadas_tipadas(QUERY, conn))
+        conn.close()
+        database_setup.fechar_conexoes(db_path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
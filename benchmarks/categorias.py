@@ -0,0 +1,66 @@
+# Em benchmarks/categorias.py
+"""Compara a classificação antiga de justificativas (laço por palavra-chave, via .apply)
+com scripts.categorias.classificar_series, usando as categorias do config.toml.
+
+Uso: python -m benchmarks.categorias [textos]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import toml
+
+from scripts.categorias import classificar_series
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+FRASES = [
+    "Estava com febre", "Foi ao médico", "Consulta no dentista", "Perdeu o ônibus",
+    "Carro quebrou", "Entrevista de emprego", "Falecimento da avó", "Compromisso pessoal",
+    "Responsável não atendeu", "Número inexistente", "Sem motivo informado", "Dormiu demais",
+]
+
+
+def gerar_textos(quantidade: int = 100_000, distintos: bool = False) -> pd.Series:
+    """Justificativas sintéticas (~10% vazias); com `distintos`, cada texto é único."""
+    rnd = random.Random(42)
+    textos = [
+        None if rnd.random() < 0.1 else rnd.choice(FRASES) + (f" (registro {i})" if distintos else "")
+        for i in range(quantidade)
+    ]
+    return pd.Series(textos, dtype=object)
+
+
+def classificar_antigo(texto, categorias_config) -> str:
+    """Implementação antiga de db_utils.classificar_justificativa."""
+    if pd.isna(texto) or not isinstance(texto, str):
+        return "Não Especificado"
+    texto_lower = str(texto).lower()
+    for categoria, palavras in categorias_config.items():
+        if isinstance(palavras, list) and any(palavra.lower() in texto_lower for palavra in palavras):
+            return categoria.replace("motivo_", "").replace("_", " ").title()
+    return "Outros"
+
+
+def medir(nome: str, funcao, repeticoes: int = 5) -> None:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    print(f"{nome:<52} {min(tempos) * 1000:9.1f} ms")
+
+
+def main(quantidade: int = 100_000) -> None:
+    categorias = toml.load(RAIZ / "config.toml")["categorias"]
+    for distintos in (False, True):
+        textos = gerar_textos(quantidade, distintos)
+        print(f"{quantidade} justificativas ({'todas distintas' if distintos else f'{len(FRASES)} frases repetidas'}):")
+        medir("  antiga (.apply por texto)", lambda: textos.apply(lambda t: classificar_antigo(t, categorias)), repeticoes=2)
+        medir("  categorias.classificar_series", lambda: classificar_series(textos, categorias))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
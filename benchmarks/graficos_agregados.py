@@ -0,0 +1,61 @@
+# Em benchmarks/graficos_agregados.py
+"""Compara os dados do calendário/ranking/top 10 montados em Python x agregados no SQLite.
+
+Antes, as três abas carregavam todas as faltas e agrupavam no pandas; agora leem só
+uma linha por dia e uma por aluno de resumo_diario.
+
+Uso: python -m benchmarks.graficos_agregados [numero_de_linhas]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import database_setup
+from benchmarks.carregamento_tipado import popular_banco
+from scripts import analysis, db_utils
+
+
+def dados_antigos():
+    """Comportamento antigo: carrega as faltas e agrupa/conta no pandas."""
+    df = db_utils.carregar_todas_faltas(status='Faltou', colunas=['data', 'status', 'nome_aluno'])
+    faltas = df[df['status'].str.lower() == 'faltou']
+    por_dia = faltas.groupby(faltas['data'].dt.date).size().reset_index(name='Faltas')
+    ranking = faltas['nome_aluno'].value_counts().reset_index()
+    ranking.columns = ['Aluno', 'Total de Faltas']
+    return por_dia, ranking, ranking.head(10)
+
+
+def dados_agregados():
+    return analysis.faltas_por_dia(), analysis.ranking_faltas(), analysis.ranking_faltas(top_n=10)
+
+
+def medir(nome: str, funcao, repeticoes: int = 5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    print(f"{nome:<52} {min(tempos) * 1000:9.1f} ms")
+    return resultado
+
+
+def main(linhas: int = 500_000) -> None:
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = Path(pasta) / "bench.db"
+        popular_banco(db_path, linhas)
+        with database_setup.transacao(db_path) as conn:
+            database_setup.reconstruir_resumo_diario(conn)
+        database_setup.DB_PATH = db_utils.DB_PATH = db_path
+
+        print(f"Chamadas sintéticas: {linhas:,}")
+        antigo = medir("carregar faltas + groupby/value_counts (antigo)", dados_antigos)
+        novo = medir("GROUP BY em resumo_diario (faltas_por_dia/ranking)", dados_agregados)
+        assert antigo[0]['Faltas'].tolist() == novo[0]['Faltas'].tolist()
+        assert sorted(antigo[1]['Total de Faltas'].tolist()) == sorted(novo[1]['Total de Faltas'].tolist())
+        print(f"Linhas entregues aos gráficos: dias={len(novo[0])}, alunos={len(novo[1])}, top 10={len(novo[2])}")
+        database_setup.fechar_conexoes(db_path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
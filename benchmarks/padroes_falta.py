@@ -0,0 +1,75 @@
+# Em benchmarks/padroes_falta.py
+"""Compara a detecção de padrões de falta antiga (laço por aluno) com
+scripts.analysis.detectar_padroes_de_falta, num histórico sintético de chamadas.
+
+Uso: python -m benchmarks.padroes_falta [chamadas] [alunos]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from scripts.analysis import detectar_padroes_de_falta
+
+
+def gerar_chamadas(chamadas: int = 120_000, alunos: int = 800) -> pd.DataFrame:
+    """Histórico no formato de carregar_todas_faltas: ~15% de faltas nos últimos 180 dias."""
+    rnd = np.random.default_rng(42)
+    hoje = pd.Timestamp(datetime.now().date())
+    return pd.DataFrame({
+        'id': np.arange(chamadas),
+        'nome_aluno': pd.Categorical([f"ALUNO {i:04d}" for i in rnd.integers(0, alunos, chamadas)]),
+        'data': hoje - pd.to_timedelta(rnd.integers(0, 180, chamadas), unit='D'),
+        'status': pd.Categorical(np.where(rnd.random(chamadas) < 0.15, 'Faltou', 'Presente')),
+    })
+
+
+def detectar_antigo(df_faltas: pd.DataFrame) -> pd.DataFrame:
+    """Implementação antiga (sobre uma cópia, pois ela alterava o DataFrame recebido)."""
+    df_faltas = df_faltas.copy()
+    df_faltas.columns = [col.lower() for col in df_faltas.columns]
+    df_faltas.dropna(subset=['data'], inplace=True)
+    alertas = []
+    for nome, grupo in df_faltas.groupby('nome_aluno', observed=True):
+        grupo_valido = grupo.dropna(subset=['data']).sort_values('data')
+        if len(grupo_valido) < 2:
+            continue
+        sete_dias_atras = datetime.now() - timedelta(days=7)
+        faltas_recentes = grupo_valido[
+            (grupo_valido['data'] >= sete_dias_atras) &
+            (grupo_valido['status'].str.lower() == 'faltou')
+        ]
+        if len(faltas_recentes) >= 3:
+            alertas.append({"Aluno": nome, "Alerta": f"⚠️ {len(faltas_recentes)} faltas nos últimos 7 dias"})
+        faltas = grupo_valido[grupo_valido['status'].str.lower() == 'faltou']
+        if len(faltas) > 1 and (faltas['data'].diff().dt.days == 1).any():
+            alertas.append({"Aluno": nome, "Alerta": "ℹ️ Possui faltas em dias consecutivos"})
+    return pd.DataFrame(alertas) if alertas else pd.DataFrame(columns=["Aluno", "Alerta"])
+
+
+def medir(nome: str, funcao, repeticoes: int = 5) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    print(f"{nome:<52} {min(tempos) * 1000:9.1f} ms")
+    return min(tempos)
+
+
+def main(chamadas: int = 120_000, alunos: int = 800) -> None:
+    df = gerar_chamadas(chamadas, alunos)
+    referencia = datetime.now()
+    antigo = detectar_antigo(df)
+    novo = detectar_padroes_de_falta(df, referencia)
+    assert antigo.reset_index(drop=True).astype(str).equals(novo.astype(str)), "Resultados divergentes"
+
+    print(f"Histórico sintético: {chamadas} chamadas de {alunos} alunos ({len(novo)} alertas)")
+    medir("  antiga (laço por aluno)", lambda: detectar_antigo(df), repeticoes=2)
+    medir("  analysis.detectar_padroes_de_falta", lambda: detectar_padroes_de_falta(df, referencia))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,91 @@
+# Em benchmarks/planilha_horarios.py
+"""Compara a interpretação antiga da planilha de horários (iterrows + laços por coluna)
+com scripts.planilha_horarios (e com o cache em disco), numa planilha sintética de
+6 abas x 30 horários x 40 linhas.
+
+Uso: python -m benchmarks.planilha_horarios [abas] [horarios] [linhas]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.planilha_horarios import DIAS_SEMANA, carregar_horarios_com_cache, interpretar_planilha, ler_planilha_horarios
+
+
+def gerar_planilha(caminho: Path, abas: int = 6, horarios: int = 30, linhas: int = 40) -> None:
+    """Grava uma planilha no formato real: título, linha de horários e alunos abaixo de cada horário."""
+    rnd = random.Random(42)
+    with pd.ExcelWriter(caminho) as writer:
+        for dia in (DIAS_SEMANA * (abas // len(DIAS_SEMANA) + 1))[:abas]:
+            cabecalho = [None] + [f"{7 + h // 4:02d}:{(h % 4) * 15:02d} às {8 + h // 4:02d}:{(h % 4) * 15:02d}" for h in range(horarios)]
+            corpo = []
+            for _ in range(linhas):
+                corpo.append([None] + [
+                    "PC EM MANUTENÇÃO" if rnd.random() < 0.05
+                    else None if rnd.random() < 0.2
+                    else f"ALUNO {rnd.randrange(2000):04d}"
+                    for _ in range(horarios)
+                ])
+            df = pd.DataFrame([[dia] + [None] * horarios, cabecalho] + corpo)
+            df.to_excel(writer, sheet_name=dia if abas <= len(DIAS_SEMANA) else f"{dia}{len(writer.sheets)}",
+                        header=False, index=False)
+
+
+def interpretar_aba_antiga(df_dia_raw: pd.DataFrame) -> dict:
+    """Lógica antiga de pagina_chamada, aplicada a todos os horários da aba."""
+    header_row_index = next(
+        (i for i, row in df_dia_raw.iterrows()
+         if row.astype(str).str.lower().str.contains('às').any()),
+        -1
+    )
+    if header_row_index == -1:
+        return {}
+    turmas = {}
+    header_series = df_dia_raw.iloc[header_row_index]
+    for horario in [h for h in header_series if "às" in str(h).lower()]:
+        col_index = next((i for i, col_name in enumerate(header_series) if str(col_name) == horario), -1)
+        lista_alunos_bruta = df_dia_raw.iloc[header_row_index + 1:, col_index].dropna()
+        turmas[horario] = [
+            aluno for aluno in lista_alunos_bruta
+            if "PC EM MANUTENÇÃO" not in str(aluno).upper()
+        ]
+    return turmas
+
+
+def medir(nome: str, funcao, repeticoes: int = 5) -> None:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    print(f"{nome:<52} {min(tempos) * 1000:9.1f} ms")
+
+
+def main(abas: int = 6, horarios: int = 30, linhas: int = 40) -> None:
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = Path(pasta) / "horarios.xlsx"
+        gerar_planilha(caminho, abas, horarios, linhas)
+        brutas = pd.read_excel(caminho, sheet_name=None, header=None)
+        nomes_abas = list(brutas)
+
+        def antiga_por_aba():
+            # Uma leitura de Excel por aba, como a tela de chamada fazia a cada rerun
+            return {aba: interpretar_aba_antiga(pd.read_excel(caminho, sheet_name=aba, header=None)) for aba in nomes_abas}
+
+        print(f"Planilha sintética: {abas} abas x {horarios} horários x {linhas} linhas")
+        print("Só interpretação (abas já lidas):")
+        medir("  antiga (iterrows + laços por coluna)", lambda: {a: interpretar_aba_antiga(df) for a, df in brutas.items()})
+        medir("  planilha_horarios.interpretar_planilha", lambda: interpretar_planilha(brutas))
+        print("Leitura + interpretação:")
+        medir("  antiga (read_excel por aba)", antiga_por_aba, repeticoes=2)
+        medir("  planilha_horarios.ler_planilha_horarios", lambda: ler_planilha_horarios(caminho), repeticoes=2)
+        carregar_horarios_com_cache(caminho)
+        medir("  cache em disco (hash + JSON)", lambda: carregar_horarios_com_cache(caminho))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
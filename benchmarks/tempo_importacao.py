@@ -0,0 +1,117 @@
+# Em benchmarks/tempo_importacao.py
+"""Mede o custo de importação da inicialização do app com `python -X importtime`.
+
+O app (main.py) só pode rodar dentro do Streamlit, então mede-se a importação dos
+módulos que ele carrega no topo. O custo do app é a soma do tempo próprio dos módulos
+importados além da base que ele sempre precisa (streamlit, pandas, toml): os módulos
+do projeto e tudo o que eles puxam. Cada medição roda em um interpretador novo, e o
+resultado é a rodada mediana entre algumas.
+
+Uso: python -m benchmarks.tempo_importacao [rodadas]
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Sequence
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+# Módulos importados no topo de main.py
+MODULOS_INICIALIZACAO = ["database_setup", "scripts.db_utils", "scripts.ui_pages", "scripts.ui_reports", "toml"]
+
+# Dependências que o app sempre carrega; o custo delas não conta para o orçamento
+MODULOS_BASE = ["streamlit", "pandas", "toml"]
+
+# Pacotes que só devem ser importados quando usados (scraper, login, gráficos)
+MODULOS_PESADOS = ["selenium", "webdriver_manager", "psutil", "bcrypt", "matplotlib", "plotly.express"]
+
+# Orçamento do custo próprio de importação do app, como fração do custo de importar a
+# base medido na mesma rodada: uma razão, e não milissegundos, para não depender da carga
+# da máquina (hoje o app fica perto de 0,01 da base)
+FRACAO_ORCAMENTO = 0.2
+
+
+class Importacao(NamedTuple):
+    modulo: str
+    proprio_us: int
+    acumulado_us: int
+
+
+def importacoes(modulos: Sequence[str]) -> List[Importacao]:
+    """Módulos importados (na ordem em que terminam) por `import <modulos>` em um interpretador novo."""
+    ambiente = {**os.environ, "PYTHONPATH": str(RAIZ)}
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modulos)}"],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True
+    )
+    resultado = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        proprio, acumulado, modulo = linha[len("import time:"):].split("|")
+        if proprio.strip().isdigit():
+            resultado.append(Importacao(modulo.strip(), int(proprio), int(acumulado)))
+    return resultado
+
+
+def custo_do_app(
+    modulos: Sequence[str] = MODULOS_INICIALIZACAO,
+    base: Sequence[str] = MODULOS_BASE,
+    rodadas: int = 1
+) -> Dict[str, int]:
+    """Tempo próprio (µs) de cada módulo importado pelo app que não faz parte da base.
+
+    Com várias rodadas, devolve a rodada de custo total mediano.
+    """
+    ja_na_base = {imp.modulo for imp in importacoes(base)}
+    medicoes = [
+        {imp.modulo: imp.proprio_us for imp in importacoes(modulos) if imp.modulo not in ja_na_base}
+        for _ in range(rodadas)
+    ]
+    medicoes.sort(key=lambda custo: sum(custo.values()))
+    return medicoes[len(medicoes) // 2]
+
+
+def custo_relativo(
+    modulos: Sequence[str] = MODULOS_INICIALIZACAO,
+    base: Sequence[str] = MODULOS_BASE,
+    rodadas: int = 1
+) -> float:
+    """Razão entre o custo próprio do app e o da base, medidos em sequência a cada rodada (mediana)."""
+    razoes = []
+    for _ in range(rodadas):
+        importacoes_base = importacoes(base)
+        ja_na_base = {imp.modulo for imp in importacoes_base}
+        custo_base = sum(imp.proprio_us for imp in importacoes_base)
+        custo_app = sum(imp.proprio_us for imp in importacoes(modulos) if imp.modulo not in ja_na_base)
+        razoes.append(custo_app / max(custo_base, 1))
+    razoes.sort()
+    return razoes[len(razoes) // 2]
+
+
+def pesados_importados(modulos_importados: Sequence[str]) -> List[str]:
+    """Quais MODULOS_PESADOS (ou submódulos deles) aparecem entre os importados."""
+    return sorted({
+        pesado for pesado in MODULOS_PESADOS
+        for modulo in modulos_importados
+        if modulo == pesado or modulo.startswith(pesado + ".")
+    })
+
+
+def total_ms(custo: Dict[str, int]) -> float:
+    return sum(custo.values()) / 1000
+
+
+def main(rodadas: int = 5) -> None:
+    custo = custo_do_app(rodadas=rodadas)
+    print(f"Módulos além da base ({', '.join(MODULOS_BASE)}): {len(custo)}")
+    for modulo, proprio in sorted(custo.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {modulo:<50} {proprio / 1000:9.1f} ms")
+    print(f"Pacotes pesados importados na inicialização: {pesados_importados(list(custo)) or 'nenhum'}")
+    print(f"{'custo de importação do app (mediana)':<52} {total_ms(custo):9.1f} ms")
+    print(f"{'custo do app / custo da base (mediana)':<52} {custo_relativo(rodadas=rodadas):9.3f} (orçamento {FRACAO_ORCAMENTO})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -3,7 +3,12 @@ import sqlite3
 from pathlib import Path
 import logging
 from datetime import date
-from typing import Optional
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FuturoTimeout
+from contextlib import contextmanager
+import argparse
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 # Configuração de logging
 logging.basicConfig(
@@ -13,101 +18,756 @@ logging.basicConfig(
 # DB_PATH global aqui para ser acessível pelas funções
 DB_PATH = Path(__file__).parent / "data" / "escola.db"
 
+# Quantidade máxima de conexões ociosas mantidas por arquivo de banco
+TAMANHO_POOL = 5
 
-def get_db_connection() -> Optional[sqlite3.Connection]:
-    """Estabelece conexão com o banco de dados SQLite."""
-    try:
-        conn = sqlite3.connect(str(DB_PATH), timeout=10, check_same_thread=False)
+# Ajustes das conexões analíticas (somente leitura): cache de páginas maior e leitura
+# via mmap, já que dashboard e relatórios varrem bem mais páginas que as telas de escrita.
+CACHE_LEITURA_KIB = 64 * 1024
+MMAP_LEITURA_BYTES = 256 * 1024 * 1024
+
+
+class ConexaoReutilizavel(sqlite3.Connection):
+    """Conexão SQLite que volta para o pool em vez de fechar.
+
+    Os chamadores continuam usando `conn.close()` normalmente; qualquer transação
+    pendente é desfeita antes de a conexão ser reaproveitada.
+    """
+
+    _pool: Optional["PoolConexoes"] = None
+    _em_uso: bool = False
+
+    def close(self) -> None:
+        pool = self._pool
+        if pool is None:
+            super().close()
+            return
+        if not self._em_uso:
+            return
+        self._em_uso = False
+        pool.devolver(self)
+
+    def fechar_definitivamente(self) -> None:
+        """Fecha de fato a conexão, sem devolvê-la ao pool."""
+        self._pool = None
+        self._em_uso = False
+        super().close()
+
+
+class PoolConexoes:
+    """Pool pequeno e limitado de conexões para um arquivo de banco.
+
+    Os PRAGMAs são aplicados uma única vez, na criação de cada conexão. Com
+    `somente_leitura=True` as conexões são abertas com `mode=ro` e `query_only`,
+    com cache e mmap maiores, para as consultas analíticas.
+    """
+
+    def __init__(self, db_path: Path, tamanho_max: int = TAMANHO_POOL, somente_leitura: bool = False):
+        self.db_path = Path(db_path)
+        self.tamanho_max = tamanho_max
+        self.somente_leitura = somente_leitura
+        self._ociosas: List[ConexaoReutilizavel] = []
+        self._lock = threading.Lock()
+
+    def _abrir(self) -> ConexaoReutilizavel:
+        if self.somente_leitura:
+            conn = sqlite3.connect(
+                f"{self.db_path.as_uri()}?mode=ro", uri=True, timeout=10,
+                check_same_thread=False, factory=ConexaoReutilizavel
+            )
+            conn.execute("PRAGMA query_only = ON")
+            conn.execute(f"PRAGMA cache_size = -{CACHE_LEITURA_KIB}")
+            conn.execute(f"PRAGMA mmap_size = {MMAP_LEITURA_BYTES}")
+        else:
+            conn = sqlite3.connect(
+                str(self.db_path), timeout=10, check_same_thread=False,
+                factory=ConexaoReutilizavel
+            )
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
         conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        conn.execute("PRAGMA journal_mode = WAL")
+        conn._pool = self
         return conn
+
+    def obter(self) -> ConexaoReutilizavel:
+        with self._lock:
+            conn = self._ociosas.pop() if self._ociosas else None
+        if conn is None:
+            conn = self._abrir()
+        conn._em_uso = True
+        return conn
+
+    def devolver(self, conn: ConexaoReutilizavel) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logging.warning(f"Descartando conexão inválida do pool: {e}")
+            conn.fechar_definitivamente()
+            return
+        with self._lock:
+            if len(self._ociosas) < self.tamanho_max:
+                self._ociosas.append(conn)
+                return
+        conn.fechar_definitivamente()
+
+    def fechar_todas(self) -> None:
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for conn in ociosas:
+            conn.fechar_definitivamente()
+
+
+_pools: Dict[Tuple[str, bool], PoolConexoes] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_para(db_path: Optional[Path] = None, somente_leitura: bool = False) -> PoolConexoes:
+    chave = str(Path(db_path or DB_PATH).resolve())
+    with _pools_lock:
+        pool = _pools.get((chave, somente_leitura))
+        if pool is None:
+            pool = _pools[(chave, somente_leitura)] = PoolConexoes(Path(chave), somente_leitura=somente_leitura)
+        return pool
+
+
+def fechar_conexoes(db_path: Optional[Path] = None) -> None:
+    """Encerra as filas de escrita e fecha as conexões ociosas de um banco (ou de todos)."""
+    with _pools_lock:
+        if db_path is None:
+            filas = list(_filas.values())
+            _filas.clear()
+            pools = list(_pools.values())
+            _pools.clear()
+        else:
+            chave = str(Path(db_path).resolve())
+            filas = [f for f in [_filas.pop(chave, None)] if f]
+            pools = [p for p in (_pools.pop((chave, False), None), _pools.pop((chave, True), None)) if p]
+    for fila in filas:
+        fila.parar()
+    for pool in pools:
+        pool.fechar_todas()
+
+
+def get_db_connection(db_path: Optional[Path] = None) -> Optional[sqlite3.Connection]:
+    """Obtém uma conexão do pool compartilhado do banco de dados SQLite.
+
+    `conn.close()` devolve a conexão ao pool para ser reutilizada.
+    """
+    try:
+        return _pool_para(db_path).obter()
     except sqlite3.Error as e:
         logging.error(f"Erro de conexão com o banco: {e}")
         return None
 
 
-def criar_banco_dados():
-    """Cria a estrutura do banco de dados SQLite com todas as tabelas necessárias"""
-    # Garante que a pasta 'data' existe
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    
-    conn = get_db_connection()
-    if not conn:
-        logging.error("Não foi possível obter conexão com o banco de dados para criar tabelas.")
-        return False
+def get_db_connection_leitura(db_path: Optional[Path] = None) -> Optional[sqlite3.Connection]:
+    """Obtém uma conexão analítica (somente leitura) do pool do banco.
 
-    cursor = None
+    Indicada para dashboard e relatórios: não disputa o lock de escrita e qualquer
+    tentativa de escrita falha com `sqlite3.OperationalError`.
+    """
     try:
-        cursor = conn.cursor()
-        
-        # Tabela de alunos
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS alunos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL UNIQUE COLLATE NOCASE,
-            nome_responsavel TEXT,
-            telefone_responsavel TEXT
-        );
-        """)
-        
-        # Tabela de chamadas
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS chamadas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            aluno_id INTEGER NOT NULL,
-            data TEXT NOT NULL,
-            horario TEXT,
-            status TEXT NOT NULL,
-            justificativa TEXT,
-            ligacao_feita BOOLEAN DEFAULT FALSE,
-            professor_responsavel TEXT,
-            categoria_justificativa TEXT,
-            FOREIGN KEY (aluno_id) REFERENCES alunos (id)
-        );
-        """)
-        
-        # Tabela de lembretes
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS lembretes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            aluno_id INTEGER NOT NULL,
-            data_criacao TEXT NOT NULL,
-            lembrete TEXT NOT NULL,
-            professor_responsavel TEXT,
-            concluido BOOLEAN DEFAULT FALSE,
-            FOREIGN KEY (aluno_id) REFERENCES alunos (id)
-        );
+        return _pool_para(db_path, somente_leitura=True).obter()
+    except sqlite3.Error as e:
+        logging.error(f"Erro de conexão (somente leitura) com o banco: {e}")
+        return None
+
+
+@contextmanager
+def transacao(db_path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    """Abre uma transação de escrita (BEGIN IMMEDIATE) com commit/rollback automáticos.
+
+    Exemplo:
+        with transacao() as conn:
+            conn.execute("UPDATE ...")
+    """
+    conn = _pool_para(db_path).obter()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+class EscritaIndeterminada(sqlite3.OperationalError):
+    """Tempo esgotado com a escrita já em execução na fila: ela pode ou não ser gravada."""
+
+
+class FilaEscrita:
+    """Escritor único em segundo plano para um arquivo de banco.
+
+    Todas as sessões enviam suas escritas para a mesma fila; uma única thread as
+    executa em transações agrupadas (um commit para o que estiver enfileirado), o que
+    elimina a disputa por lock entre sessões do Streamlit. Cada operação roda em um
+    SAVEPOINT próprio: se falhar, só ela é desfeita e o erro vai para o seu Future.
+    """
+
+    def __init__(self, db_path: Path, max_lote: int = 100, timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self.max_lote = max_lote
+        self.timeout = timeout
+        self._fila: "queue.Queue[Optional[Tuple[Callable[[sqlite3.Connection], Any], Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _garantir_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._executar_loop, name=f"fila-escrita-{self.db_path.name}", daemon=True
+                )
+                self._thread.start()
+
+    def enviar(self, operacao: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Enfileira `operacao(conn)` e retorna um Future com o seu resultado."""
+        futuro: Future = Future()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Escrita enfileirada de dentro da própria fila de escrita.")
+        self._garantir_thread()
+        self._fila.put((operacao, futuro))
+        return futuro
+
+    def executar(self, operacao: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Enfileira a operação e aguarda o resultado (ou propaga a exceção dela).
+
+        Esgotado o tempo, a operação ainda na fila é cancelada (a thread a pula) e
+        `sqlite3.OperationalError` garante que nada foi gravado. Se ela já estava em
+        execução, não há como saber se será gravada: levanta `EscritaIndeterminada`.
+        """
+        futuro = self.enviar(operacao)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FuturoTimeout:
+            if futuro.cancel():
+                raise sqlite3.OperationalError(
+                    "Tempo esgotado aguardando a fila de escrita; nada foi gravado."
+                ) from None
+            raise EscritaIndeterminada(
+                "Tempo esgotado com a escrita já em andamento: ela ainda pode ser gravada. "
+                "Confira os dados antes de repetir."
+            ) from None
+
+    def parar(self) -> None:
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._fila.put(None)
+            thread.join(timeout=self.timeout)
+
+    def _executar_loop(self) -> None:
+        conn = _pool_para(self.db_path).obter()
+        try:
+            while True:
+                item = self._fila.get()
+                if item is None:
+                    return
+                lote = [item]
+                while len(lote) < self.max_lote:
+                    try:
+                        proximo = self._fila.get_nowait()
+                    except queue.Empty:
+                        break
+                    if proximo is None:
+                        self._fila.put(None)  # encerra depois de gravar este lote
+                        break
+                    lote.append(proximo)
+                self._gravar_lote(conn, lote)
+        finally:
+            conn.close()
+
+    def _gravar_lote(self, conn: sqlite3.Connection, lote: list) -> None:
+        concluidos = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for operacao, futuro in lote:
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT operacao")
+                try:
+                    resultado = operacao(conn)
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO operacao")
+                    conn.execute("RELEASE operacao")
+                    futuro.set_exception(e)
+                    continue
+                conn.execute("RELEASE operacao")
+                concluidos.append((futuro, resultado))
+            conn.commit()
+        except BaseException as e:
+            logging.error(f"Erro ao gravar lote da fila de escrita: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            # Nada do lote foi gravado: todas as operações pendentes recebem o erro
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        for futuro, resultado in concluidos:
+            futuro.set_result(resultado)
+
+
+_filas: Dict[str, FilaEscrita] = {}
+
+
+def fila_escrita(db_path: Optional[Path] = None) -> FilaEscrita:
+    """Retorna a fila de escrita (única por processo) de um arquivo de banco."""
+    chave = str(Path(db_path or DB_PATH).resolve())
+    with _pools_lock:
+        fila = _filas.get(chave)
+        if fila is None:
+            fila = _filas[chave] = FilaEscrita(Path(chave))
+        return fila
+
+
+# --- Migrações de schema ---
+# Cada migração recebe uma conexão já dentro de uma transação (BEGIN IMMEDIATE) e deve
+# ser idempotente. A versão aplicada fica registrada em PRAGMA user_version.
+
+def _migracao_schema_inicial(conn: sqlite3.Connection) -> None:
+    """Tabelas principais e índices básicos."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS alunos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        nome_responsavel TEXT,
+        telefone_responsavel TEXT
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS chamadas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        aluno_id INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        horario TEXT,
+        status TEXT NOT NULL,
+        justificativa TEXT,
+        ligacao_feita BOOLEAN DEFAULT FALSE,
+        professor_responsavel TEXT,
+        categoria_justificativa TEXT,
+        FOREIGN KEY (aluno_id) REFERENCES alunos (id)
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS lembretes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        aluno_id INTEGER NOT NULL,
+        data_criacao TEXT NOT NULL,
+        lembrete TEXT NOT NULL,
+        professor_responsavel TEXT,
+        concluido BOOLEAN DEFAULT FALSE,
+        FOREIGN KEY (aluno_id) REFERENCES alunos (id)
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS comportamentos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        aluno_id INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        observacao TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        professor_responsavel TEXT,
+        FOREIGN KEY (aluno_id) REFERENCES alunos (id)
+    );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chamadas_aluno_id ON chamadas(aluno_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chamadas_data ON chamadas(data);")
+
+
+# Chaves de chamadas duplicadas listadas no log da migração 2 (o total vai sempre)
+MAX_CHAVES_NO_LOG = 50
+
+
+def _migracao_chave_unica_chamadas(conn: sqlite3.Connection) -> None:
+    """Chave única (aluno_id, data, horario) usada pelo upsert da chamada em lote.
+
+    Remove duplicatas antigas antes de criar o índice. Fica, de propósito, a linha de
+    maior id: a última gravada, como faria o upsert se a chave já existisse. As chaves
+    e a quantidade de linhas removidas vão para o log.
+    """
+    duplicadas = conn.execute("""
+    SELECT aluno_id, data, horario, COUNT(*) - 1 AS removidas
+    FROM chamadas
+    WHERE horario IS NOT NULL
+    GROUP BY aluno_id, data, horario
+    HAVING COUNT(*) > 1
+    ORDER BY aluno_id, data, horario;
+    """).fetchall()
+    if duplicadas:
+        total = sum(row[3] for row in duplicadas)
+        chaves = ", ".join(f"({row[0]}, {row[1]}, {row[2]})" for row in duplicadas[:MAX_CHAVES_NO_LOG])
+        if len(duplicadas) > MAX_CHAVES_NO_LOG:
+            chaves += f" e mais {len(duplicadas) - MAX_CHAVES_NO_LOG}"
+        logging.warning(
+            f"Removendo {total} chamada(s) duplicada(s) em {len(duplicadas)} chave(s) "
+            f"(aluno_id, data, horario), mantida a mais recente de cada: {chaves}"
+        )
+    conn.execute("""
+    DELETE FROM chamadas
+    WHERE horario IS NOT NULL
+      AND id NOT IN (
+        SELECT MAX(id) FROM chamadas
+        WHERE horario IS NOT NULL
+        GROUP BY aluno_id, data, horario
+      );
+    """)
+    conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_chamadas_aluno_data_horario
+    ON chamadas(aluno_id, data, horario);
+    """)
+
+
+def _migracao_indices_compostos(conn: sqlite3.Connection) -> None:
+    """Índices compostos para os formatos reais de consulta em scripts/db_utils.py.
+
+    - (aluno_id, status, data): justificativas e histórico de faltas do aluno,
+      já na ordem de data; torna redundante o antigo índice só em aluno_id.
+    - (status, data): faltas por período e agregados por status (igualdade
+      primeiro, intervalo de datas depois).
+    - lembretes/comportamentos: busca por aluno já ordenada por data.
+    """
+    conn.execute("DROP INDEX IF EXISTS idx_chamadas_aluno_id;")
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_chamadas_aluno_status_data
+    ON chamadas(aluno_id, status, data);
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chamadas_status_data ON chamadas(status, data);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lembretes_aluno_data ON lembretes(aluno_id, data_criacao);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_comportamentos_aluno_data ON comportamentos(aluno_id, data);")
+    conn.execute("ANALYZE;")
+
+
+def reconstruir_resumo_diario(conn: sqlite3.Connection) -> int:
+    """Recalcula resumo_diario inteiro a partir de chamadas. Retorna o número de linhas."""
+    conn.execute("DELETE FROM resumo_diario;")
+    cursor = conn.execute("""
+    INSERT INTO resumo_diario (data, aluno_id, status, total)
+    SELECT data, aluno_id, status, COUNT(*)
+    FROM chamadas
+    GROUP BY data, aluno_id, status;
+    """)
+    return cursor.rowcount
+
+
+def _migracao_resumo_diario(conn: sqlite3.Connection) -> None:
+    """Tabela agregada resumo_diario mantida por triggers em chamadas.
+
+    Guarda a contagem de chamadas por (data, aluno_id, status), para que gráficos e
+    rankings leiam algumas centenas de linhas em vez do histórico completo.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS resumo_diario (
+        data TEXT NOT NULL,
+        aluno_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (data, aluno_id, status)
+    ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_resumo_diario_status_data
+    ON resumo_diario(status, data, aluno_id, total);
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_chamadas_resumo_insert
+    AFTER INSERT ON chamadas
+    BEGIN
+        INSERT INTO resumo_diario (data, aluno_id, status, total)
+        VALUES (NEW.data, NEW.aluno_id, NEW.status, 1)
+        ON CONFLICT (data, aluno_id, status) DO UPDATE SET total = total + 1;
+    END;
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_chamadas_resumo_delete
+    AFTER DELETE ON chamadas
+    BEGIN
+        UPDATE resumo_diario SET total = total - 1
+        WHERE data = OLD.data AND aluno_id = OLD.aluno_id AND status = OLD.status;
+        DELETE FROM resumo_diario
+        WHERE data = OLD.data AND aluno_id = OLD.aluno_id AND status = OLD.status AND total <= 0;
+    END;
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_chamadas_resumo_update
+    AFTER UPDATE OF data, aluno_id, status ON chamadas
+    WHEN OLD.data IS NOT NEW.data OR OLD.aluno_id IS NOT NEW.aluno_id OR OLD.status IS NOT NEW.status
+    BEGIN
+        UPDATE resumo_diario SET total = total - 1
+        WHERE data = OLD.data AND aluno_id = OLD.aluno_id AND status = OLD.status;
+        DELETE FROM resumo_diario
+        WHERE data = OLD.data AND aluno_id = OLD.aluno_id AND status = OLD.status AND total <= 0;
+        INSERT INTO resumo_diario (data, aluno_id, status, total)
+        VALUES (NEW.data, NEW.aluno_id, NEW.status, 1)
+        ON CONFLICT (data, aluno_id, status) DO UPDATE SET total = total + 1;
+    END;
+    """)
+    reconstruir_resumo_diario(conn)
+
+
+# Tabelas cujas alterações incrementam o contador de geração em `meta`
+TABELAS_VERSIONADAS = ("alunos", "chamadas", "lembretes", "comportamentos")
+
+
+def _migracao_geracao_dados(conn: sqlite3.Connection) -> None:
+    """Contadores de geração de dados por tabela, usados para invalidar caches.
+
+    Triggers incrementam `meta.valor` a cada INSERT/UPDATE/DELETE, de modo que qualquer
+    caminho de escrita (db_utils, sync_data, migrate_to_db ou SQL manual) invalida os
+    loaders em cache. PRAGMA data_version não serve aqui porque só enxerga commits
+    de outras conexões.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS meta (
+        chave TEXT PRIMARY KEY,
+        valor INTEGER NOT NULL DEFAULT 0
+    );
+    """)
+    for tabela in TABELAS_VERSIONADAS:
+        conn.execute("INSERT OR IGNORE INTO meta (chave, valor) VALUES (?, 0);", (f"geracao_{tabela}",))
+        for operacao in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_geracao_{operacao.lower()}
+            AFTER {operacao} ON {tabela}
+            BEGIN
+                UPDATE meta SET valor = valor + 1 WHERE chave = 'geracao_{tabela}';
+            END;
+            """)
+
+
+def _migracao_turmas_matriculas(conn: sqlite3.Connection) -> None:
+    """Turmas (dia, horário) e matrículas importadas da planilha de horários.
+
+    A tela de chamada lê o roster de uma turma com uma consulta indexada em vez de
+    reinterpretar a planilha; `meta` guarda a assinatura do arquivo já importado.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS turmas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dia TEXT NOT NULL,
+        horario TEXT NOT NULL,
+        UNIQUE (dia, horario)
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS matriculas (
+        turma_id INTEGER NOT NULL,
+        aluno_id INTEGER NOT NULL,
+        PRIMARY KEY (turma_id, aluno_id),
+        FOREIGN KEY (turma_id) REFERENCES turmas(id) ON DELETE CASCADE,
+        FOREIGN KEY (aluno_id) REFERENCES alunos(id) ON DELETE CASCADE
+    ) WITHOUT ROWID;
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_matriculas_aluno ON matriculas (aluno_id);")
+
+
+def _migracao_apelidos_alunos(conn: sqlite3.Connection) -> None:
+    """Apelidos (nomes normalizados) aceitos na conciliação da planilha com o cadastro.
+
+    Um nome da planilha digitado diferente do cadastro (Sponte) passa a apontar para
+    o aluno certo sem renomear o cadastro. Tem contador de geração próprio para
+    invalidar o índice de nomes.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS apelidos_alunos (
+        apelido TEXT PRIMARY KEY,
+        aluno_id INTEGER NOT NULL,
+        FOREIGN KEY (aluno_id) REFERENCES alunos(id) ON DELETE CASCADE
+    );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_apelidos_alunos_aluno ON apelidos_alunos (aluno_id);")
+    conn.execute("INSERT OR IGNORE INTO meta (chave, valor) VALUES ('geracao_apelidos_alunos', 0);")
+    for operacao in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_apelidos_alunos_geracao_{operacao.lower()}
+        AFTER {operacao} ON apelidos_alunos
+        BEGIN
+            UPDATE meta SET valor = valor + 1 WHERE chave = 'geracao_apelidos_alunos';
+        END;
         """)
-        
-        # Tabela de comportamentos
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS comportamentos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            aluno_id INTEGER NOT NULL,
-            data TEXT NOT NULL,
-            observacao TEXT NOT NULL,
-            tipo TEXT NOT NULL,
-            professor_responsavel TEXT,
-            FOREIGN KEY (aluno_id) REFERENCES alunos (id)
-        );
+
+
+def _migracao_sequencias_faltas(conn: sqlite3.Connection) -> None:
+    """Feriados e sequências de faltas por aluno, calculadas em aulas previstas.
+
+    `sequencias_faltas` guarda o resultado por aluno para o dashboard só ler; triggers
+    em chamadas e matriculas marcam o aluno afetado como pendente e uma mudança em
+    feriados marca todos, para que db_utils recalcule só quem mudou.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS feriados (
+        data TEXT PRIMARY KEY,
+        descricao TEXT
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sequencias_faltas (
+        aluno_id INTEGER PRIMARY KEY,
+        atual INTEGER NOT NULL DEFAULT 0,
+        maior INTEGER NOT NULL DEFAULT 0,
+        inicio_atual TEXT,
+        inicio_maior TEXT,
+        calculado_ate TEXT,
+        pendente INTEGER NOT NULL DEFAULT 1,
+        FOREIGN KEY (aluno_id) REFERENCES alunos(id) ON DELETE CASCADE
+    );
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_sequencias_faltas_pendentes
+    ON sequencias_faltas (aluno_id) WHERE pendente = 1;
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sequencias_faltas_calculado ON sequencias_faltas (calculado_ate);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sequencias_faltas_atual ON sequencias_faltas (atual, maior);")
+
+    marcar_novo = """
+        INSERT INTO sequencias_faltas (aluno_id) VALUES (NEW.aluno_id)
+        ON CONFLICT (aluno_id) DO UPDATE SET pendente = 1;"""
+    marcar_antigo = """
+        UPDATE sequencias_faltas SET pendente = 1 WHERE aluno_id = OLD.aluno_id;"""
+    gatilhos = {
+        "trg_chamadas_sequencias_insert": ("AFTER INSERT ON chamadas", marcar_novo),
+        "trg_chamadas_sequencias_delete": ("AFTER DELETE ON chamadas", marcar_antigo),
+        "trg_chamadas_sequencias_update": (
+            "AFTER UPDATE OF data, aluno_id, status ON chamadas", marcar_antigo + marcar_novo
+        ),
+        "trg_matriculas_sequencias_insert": ("AFTER INSERT ON matriculas", marcar_novo),
+        "trg_matriculas_sequencias_delete": ("AFTER DELETE ON matriculas", marcar_antigo),
+    }
+    for operacao in ("INSERT", "UPDATE", "DELETE"):
+        gatilhos[f"trg_feriados_sequencias_{operacao.lower()}"] = (
+            f"AFTER {operacao} ON feriados", "\n        UPDATE sequencias_faltas SET pendente = 1;"
+        )
+    for nome, (evento, corpo) in gatilhos.items():
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {nome}
+        {evento}
+        BEGIN{corpo}
+        END;
         """)
-        
-        # Criar índices para melhor performance
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chamadas_aluno_id ON chamadas(aluno_id);")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chamadas_data ON chamadas(data);")
-        
-        conn.commit()
-        logging.info("✅ Banco de dados criado com sucesso!")
+    conn.execute("""
+    INSERT OR IGNORE INTO sequencias_faltas (aluno_id)
+    SELECT id FROM alunos
+    WHERE id IN (SELECT aluno_id FROM chamadas) OR id IN (SELECT aluno_id FROM matriculas);
+    """)
+
+
+def _migracao_hash_categorias(conn: sqlite3.Connection) -> None:
+    """Hash da configuração de categorias que produziu `categoria_justificativa`.
+
+    Justificativas sem hash ou com hash de outra configuração são as que o job de
+    reclassificação (db_utils.reclassificar_justificativas) precisa revisitar; o
+    índice parcial cobre só as chamadas com justificativa.
+    """
+    colunas = {row[1] for row in conn.execute("PRAGMA table_info(chamadas)")}
+    if "categoria_hash" not in colunas:
+        conn.execute("ALTER TABLE chamadas ADD COLUMN categoria_hash TEXT;")
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_chamadas_categoria_hash
+    ON chamadas (categoria_hash) WHERE justificativa IS NOT NULL;
+    """)
+
+
+
+def _migracao_indice_turma_chamadas(conn: sqlite3.Connection) -> None:
+    """Índice das chamadas por turma: horário, dia da semana da data e data.
+
+    O filtro `turma=` de db_utils.carregar_todas_faltas compara o dia da semana com
+    a mesma expressão `CAST(strftime('%w', data) AS INTEGER)`, então busca direto nas
+    chamadas da turma, já em ordem de data, mesmo sem intervalo de datas. Parcial:
+    o histórico importado não tem horário e nunca é filtrado por turma.
+    """
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_chamadas_turma_data
+    ON chamadas (horario, CAST(strftime('%w', data) AS INTEGER), data) WHERE horario IS NOT NULL;
+    """)
+
+def geracao_dados(tabela: str, db_path: Optional[Path] = None) -> int:
+    """Retorna o contador de geração de uma tabela (muda a cada escrita nela)."""
+    conn = get_db_connection(db_path)
+    if not conn:
+        return -1
+    try:
+        linha = conn.execute("SELECT valor FROM meta WHERE chave = ?", (f"geracao_{tabela}",)).fetchone()
+        return linha[0] if linha else -1
+    except sqlite3.Error:
+        return -1
+    finally:
+        conn.close()
+
+
+# Lista ordenada: (versão, descrição, função). Novas migrações entram sempre no final.
+MIGRACOES: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "schema inicial", _migracao_schema_inicial),
+    (2, "chave única de chamadas (aluno_id, data, horario)", _migracao_chave_unica_chamadas),
+    (3, "índices compostos para consultas de chamadas, lembretes e comportamentos", _migracao_indices_compostos),
+    (4, "tabela resumo_diario mantida por triggers", _migracao_resumo_diario),
+    (5, "contadores de geração de dados para invalidação de cache", _migracao_geracao_dados),
+    (6, "turmas e matrículas importadas da planilha de horários", _migracao_turmas_matriculas),
+    (7, "apelidos de alunos aceitos na conciliação da planilha", _migracao_apelidos_alunos),
+    (8, "feriados e sequências de faltas em aulas previstas", _migracao_sequencias_faltas),
+    (9, "hash da configuração de categorias das justificativas", _migracao_hash_categorias),
+    (10, "índice de chamadas por turma (horário e dia da semana)", _migracao_indice_turma_chamadas),
+]
+VERSAO_SCHEMA = MIGRACOES[-1][0]
+
+
+def versao_schema(db_path: Optional[Path] = None) -> int:
+    """Retorna a versão de schema registrada no banco (PRAGMA user_version)."""
+    if not Path(db_path or DB_PATH).exists():
+        return 0
+    conn = get_db_connection(db_path)
+    if not conn:
+        return 0
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def esquema_atualizado(db_path: Optional[Path] = None) -> bool:
+    """Verificação rápida: True se não há migrações pendentes."""
+    return versao_schema(db_path) >= VERSAO_SCHEMA
+
+
+def aplicar_migracoes(db_path: Optional[Path] = None) -> int:
+    """Aplica, em ordem, as migrações pendentes. Retorna quantas foram aplicadas.
+
+    Cada migração roda na própria transação junto com a atualização de
+    user_version; se falhar, nada dela é gravado e a exceção é propagada.
+    """
+    if esquema_atualizado(db_path):
+        return 0
+
+    aplicadas = 0
+    for versao, descricao, migracao in MIGRACOES:
+        with transacao(db_path) as conn:
+            # Relê a versão dentro da transação: outro processo pode ter migrado antes.
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= versao:
+                continue
+            logging.info(f"Aplicando migração {versao}: {descricao}...")
+            migracao(conn)
+            conn.execute(f"PRAGMA user_version = {int(versao)}")
+            aplicadas += 1
+    return aplicadas
+
+
+def criar_banco_dados():
+    """Cria ou atualiza a estrutura do banco de dados SQLite via migrações versionadas."""
+    # Garante que a pasta 'data' existe
+    Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        aplicadas = aplicar_migracoes()
+        if aplicadas:
+            logging.info(f"✅ Banco de dados atualizado para a versão {VERSAO_SCHEMA} ({aplicadas} migração(ões)).")
         return True
     except Exception as e:
         logging.error(f"❌ Erro ao criar banco de dados: {e}")
         return False
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
         
 def inserir_dados_iniciais():
     """Insere dados de teste na tabela alunos e chamadas se estiverem vazias."""
@@ -156,8 +816,36 @@ def setup_database():
     if criar_banco_dados():
         logging.info("Banco de dados configurado com sucesso!")
         inserir_dados_iniciais()
-    else:
-        logging.error("Ocorreu um erro ao configurar o banco de dados.")
+        return True
+    logging.error("Ocorreu um erro ao configurar o banco de dados.")
+    return False
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada de linha de comando para configuração e migração do banco."""
+    parser = argparse.ArgumentParser(description="Configuração e migrações do banco de dados.")
+    parser.add_argument(
+        "comando", nargs="?", default="setup", choices=["setup", "migrar", "status", "resumo"],
+        help="setup: migra e insere dados iniciais; migrar: apenas migrações; status: mostra a versão; "
+             "resumo: recalcula a tabela resumo_diario"
+    )
+    args = parser.parse_args(argv)
+
+    if args.comando == "status":
+        versao = versao_schema()
+        pendentes = [v for v, _, _ in MIGRACOES if v > versao]
+        print(f"Versão do schema: {versao} (atual: {VERSAO_SCHEMA}). Pendentes: {pendentes or 'nenhuma'}")
+        return 0
+    if args.comando == "migrar":
+        return 0 if criar_banco_dados() else 1
+    if args.comando == "resumo":
+        if not criar_banco_dados():
+            return 1
+        with transacao() as conn:
+            linhas = reconstruir_resumo_diario(conn)
+        print(f"resumo_diario recalculado: {linhas} linhas.")
+        return 0
+    setup_database()
+    return 0
 
 if __name__ == "__main__":
-    setup_database()
\ No newline at end of file
+    raise SystemExit(main())
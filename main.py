@@ -5,11 +5,10 @@ from datetime import date
 import time
 import sys
 import traceback
-import psutil
-from selenium.common.exceptions import TimeoutException, WebDriverException
-from selenium.webdriver.chrome.options import Options
+import importlib.util
 import logging
-import bcrypt # Usado para verificar senhas hasheadas
+# bcrypt (login) e selenium/webdriver_manager (página "Scraper Sponte") são importados
+# só onde são usados, para não pesar na inicialização nem em cada reexecução
 
 # --- GARANTIA ABSOLUTA DE CAMINHO PARA IMPORTAÇÕES LOCAIS ---
 project_root = Path(__file__).resolve().parent
@@ -18,15 +17,16 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 # --- IMPORTAÇÕES DE MÓDulos LOCAIS (DEPOIS DO sys.path) ---
-from scripts.sponte_scraper import configurar_driver, executar_scraper_sponte
 from scripts.ui_reports import pagina_relatorios
 from scripts.db_utils import (
     get_db_connection,
     carregar_alunos_db,
-    carregar_horarios,
-    salvar_justificativa_db,
+    importar_horarios,
+    salvar_justificativas_lote,
+    reclassificar_em_segundo_plano,
+    atualizar_no_banco,
 )
-from database_setup import setup_database
+from database_setup import setup_database, criar_banco_dados, esquema_atualizado
 from scripts.ui_pages import (
     pagina_chamada,
     pagina_gestao_individual,
@@ -41,14 +41,13 @@ def show_error(e):
         st.code(traceback.format_exc())
 
 def verificar_dependencias():
-    """Verifica se as dependências essenciais estão instaladas."""
-    try:
-        import pandas, streamlit, selenium
-        return True
-    except ImportError as e:
-        st.error(f"Faltam dependências: {str(e)}")
+    """Verifica se as dependências essenciais estão instaladas (sem importá-las)."""
+    faltando = [modulo for modulo in ("pandas", "streamlit", "selenium") if importlib.util.find_spec(modulo) is None]
+    if faltando:
+        st.error(f"Faltam dependências: {', '.join(faltando)}")
         st.info("Execute: pip install -r requirements.txt")
         return False
+    return True
 
 def verificar_credenciais_sponte():
     """Verifica se as credenciais do Sponte estão configuradas no secrets.toml."""
@@ -61,8 +60,9 @@ def verificar_credenciais_sponte():
 
 def verificar_driver_local():
     """Verifica se o ChromeDriver pode ser inicializado e se comunica."""
+    from selenium.common.exceptions import WebDriverException
+    from scripts.sponte_scraper import configurar_driver
     try:
-        from scripts.sponte_scraper import configurar_driver
         driver_test = configurar_driver()
         driver_test.get("https://www.google.com")
         driver_test.quit()
@@ -104,8 +104,11 @@ def inicializar_sistema_app():
                 st.stop()
             else:
                 st.success("Banco de dados criado com sucesso!")
-        
-        setup_database()
+        elif not esquema_atualizado():
+            # Só executa DDL quando há migrações pendentes
+            if not criar_banco_dados():
+                st.error("Falha ao atualizar a estrutura do banco de dados. Verifique os logs.")
+                st.stop()
 
         conn = get_db_connection()
         try:
@@ -138,6 +141,10 @@ except Exception as e:
 # --- CONFIGURAÇÃO DA PÁGINA E AUTENTICAÇÃO ---
 st.set_page_config(layout="wide", page_title="Assistente de Chamada")
 
+# Classifica, em segundo plano e uma vez por configuração de [categorias], as justificativas
+# sem categoria ou cujo rótulo a configuração atual pode ter mudado
+reclassificar_em_segundo_plano(CATEGORIAS_JUSTIFICATIVAS)
+
 if 'authentication_status' not in st.session_state:
     st.session_state['authentication_status'] = None
 
@@ -155,6 +162,7 @@ if st.session_state['authentication_status'] is None:
 
                 # --- VERIFICAÇÃO DE SENHA APENAS COM BCRYPT (MAIS SEGURO) ---
                 if isinstance(stored_password_hash, str) and stored_password_hash.startswith('$2b$'):
+                    import bcrypt
                     if bcrypt.checkpw(password_input.encode('utf-8'), stored_password_hash.encode('utf-8')):
                         st.session_state['authentication_status'] = True
                         st.session_state['name'] = credentials[username_input]["name"]
@@ -202,7 +210,8 @@ if st.session_state.get('authentication_status') is True:
 
     pagina = st.sidebar.radio(
         "Escolha uma ferramenta:",
-        ["Realizar Chamada", "Gestão Individual", "Dashboard de Análise", "Relatórios e Ferramentas", "Scraper Sponte"]
+        ["Realizar Chamada", "Gestão Individual", "Dashboard de Análise", "Relatórios e Ferramentas", "Scraper Sponte"],
+        key="pagina"
     )
 
     if 'ausentes_do_dia' not in st.session_state:
@@ -239,14 +248,19 @@ if st.session_state.get('authentication_status') is True:
 
         if st.sidebar.button("💾 Salvar Justificativas no BD", type="primary"):
             with st.spinner("A salvar..."):
-                for aluno, dados in st.session_state.ausentes_do_dia.items():
-                    if dados.get('id'):
-                        sucesso, erro = salvar_justificativa_db(
-                            dados['id'], date.today(), dados['justificativa'],
-                            professor_logado, dados['ligacao']
-                        )
-                        if not sucesso:
-                            st.sidebar.error(f"Erro ao salvar para {aluno}: {erro}")
+                ausentes = [
+                    (aluno, dados) for aluno, dados in st.session_state.ausentes_do_dia.items()
+                    if dados.get('id')
+                ]
+                resultados = salvar_justificativas_lote(
+                    [(dados['id'], dados['justificativa'], dados['ligacao']) for _, dados in ausentes],
+                    date.today(),
+                    professor_logado,
+                    categorias_config=CATEGORIAS_JUSTIFICATIVAS
+                )
+                for (aluno, _), resultado in zip(ausentes, resultados):
+                    if not resultado['salvo']:
+                        st.sidebar.error(f"Erro ao salvar para {aluno}: {resultado['erro']}")
             st.sidebar.success("Justificativas salvas!")
             time.sleep(1)
             st.rerun()
@@ -257,9 +271,9 @@ if st.session_state.get('authentication_status') is True:
     # --- ROTEAMENTO DAS PÁGINAS ---
     if pagina == "Realizar Chamada":
         try:
-            xls_horarios = carregar_horarios()
-            if xls_horarios:
-                pagina_chamada(xls_horarios, df_base_alunos, professor_logado)
+            resultado_horarios = importar_horarios()
+            if resultado_horarios is not None:
+                pagina_chamada(df_base_alunos, professor_logado, resultado_horarios['sem_cadastro_por_turma'])
         except Exception as e:
             st.error(f"Erro ao carregar horários: {e}")
 
@@ -275,27 +289,11 @@ if st.session_state.get('authentication_status') is True:
             novo_status = st.radio("Novo status:", ("Presente", "Faltou"), key="status_radio")
 
             if st.button("Atualizar Status"):
-                conn = None
-                try:
-                    conn = get_db_connection()
-                    cursor = conn.cursor()
-                    status_db = "P" if novo_status == "Presente" else "F"
-                    
-                    cursor.execute("""
-                        UPDATE chamadas SET status = ?
-                        WHERE aluno_id = (SELECT id FROM alunos WHERE nome = ?) AND data = date('now')
-                    """, (status_db, aluno_selecionado))
-                    
-                    conn.commit()
-                    if cursor.rowcount > 0:
-                        st.success(f"Status de {aluno_selecionado} atualizado para {novo_status}!")
-                    else:
-                        st.warning(f"Nenhum registo de chamada encontrado para {aluno_selecionado} na data de hoje.")
-                except Exception as e:
-                    st.error(f"Erro ao atualizar: {str(e)}")
-                finally:
-                    if conn:
-                        conn.close()
+                status_db = "P" if novo_status == "Presente" else "F"
+                if atualizar_no_banco(aluno_selecionado, status_db):
+                    st.success(f"Status de {aluno_selecionado} atualizado para {novo_status}!")
+                else:
+                    st.warning(f"Nenhum registo de chamada encontrado para {aluno_selecionado} na data de hoje.")
         pagina_gestao_individual(df_base_alunos, professor_logado)
 
     elif pagina == "Relatórios e Ferramentas":
@@ -317,6 +315,7 @@ if st.session_state.get('authentication_status') is True:
             st.stop()
 
         if st.button("Executar Scraper Sponte Agora", type="primary"):
+            from scripts.sponte_scraper import executar_scraper_sponte
             with st.spinner("Conectando ao Sponte... Isso pode levar alguns minutos."):
                 if not verificar_driver_local():
                     st.error("Scraper não pode ser executado sem um ChromeDriver funcional.")
@@ -4,8 +4,11 @@ from pathlib import Path
 import logging
 from rich.console import Console
 from rich.theme import Theme
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from database_setup import get_db_connection, criar_banco_dados # Importado para garantir a criação do DB
+from scripts.db_utils import normalizar_nome, construir_indice_nomes, atualizar_sequencias_faltas
+from scripts.historico import eh_planilha_historico, ler_historico_chamadas
+from scripts.paralelo import mapear_em_processos
 
 # Configuração de logging
 logging.basicConfig(
@@ -37,6 +40,8 @@ def _processar_e_inserir_alunos(df: pd.DataFrame, filename: str) -> int:
     
     cursor = conn.cursor()
     migrados = 0
+    # Índice {nome normalizado -> id} montado uma vez e atualizado a cada inserção
+    indice_nomes = construir_indice_nomes(cursor.execute("SELECT id, nome FROM alunos").fetchall())
     
     for _, row in df.iterrows():
         try:
@@ -49,20 +54,21 @@ def _processar_e_inserir_alunos(df: pd.DataFrame, filename: str) -> int:
             nome_responsavel = str(row.get('Nome Responsavel', '')).strip() if pd.notna(row.get('Nome Responsavel')) else None
             telefone_responsavel = str(row.get('Telefone Responsavel', '')).strip() if pd.notna(row.get('Telefone Responsavel')) else None
             
-            cursor.execute("SELECT id FROM alunos WHERE nome = ?", (nome_aluno_upper,))
-            aluno_existente = cursor.fetchone()
+            chave_nome = normalizar_nome(nome_aluno_original)
+            aluno_existente = indice_nomes.get(chave_nome)
 
             if aluno_existente:
                 cursor.execute("""
                     UPDATE alunos 
                     SET nome_responsavel = ?, telefone_responsavel = ?
                     WHERE id = ?
-                """, (nome_responsavel, telefone_responsavel, aluno_existente[0]))
+                """, (nome_responsavel, telefone_responsavel, aluno_existente))
             else:
                 cursor.execute("""
                     INSERT INTO alunos (nome, nome_responsavel, telefone_responsavel) 
                     VALUES (?, ?, ?)
                 """, (nome_aluno_upper, nome_responsavel, telefone_responsavel))
+                indice_nomes[chave_nome] = cursor.lastrowid
                 migrados += 1
             
             conn.commit()
@@ -119,72 +125,84 @@ def migrar_base_alunos():
 
     return _processar_e_inserir_alunos(df, ARQUIVO_BASE_ALUNOS.name)
 
-def migrar_historico_chamadas():
-    """Lê o arquivo Excel de histórico de chamadas e insere no banco de dados."""
-    console.print(f"[info]Migrando histórico de chamadas do arquivo: '{ARQUIVO_CHAMADA_DIARIA_UNICO.name}'...[/info]")
-    
-    if not ARQUIVO_CHAMADA_DIARIA_UNICO.exists():
-        console.print(f"[warning]Aviso: Arquivo '{ARQUIVO_CHAMADA_DIARIA_UNICO.name}' NÃO ENCONTRADO. Pulando migração.[/warning]")
-        return
+def arquivos_historico() -> List[Path]:
+    """Planilhas de histórico de chamadas em data/, reconhecidas pelo conteúdo, em ordem de nome."""
+    return sorted(p for p in DATA_DIR.iterdir() if p.is_file() and eh_planilha_historico(p))
+
+def _textos_aparados(coluna: pd.Series) -> list:
+    """Valores da coluna como texto aparado, com None no lugar de vazios."""
+    aparado = coluna.astype('string').str.strip()
+    return aparado.astype(object).where(aparado.notna(), None).tolist()
+
+def migrar_historico_chamadas(arquivos: Optional[List[Path]] = None, max_processos: Optional[int] = None) -> int:
+    """Lê as planilhas de histórico de chamadas e insere as faltas no banco de dados.
+
+    As planilhas são lidas em paralelo (scripts.paralelo) e gravadas em série, na ordem
+    de `arquivos` (padrão: arquivos_historico()), em uma única conexão; ao final, as
+    sequências de faltas dos alunos afetados são recalculadas. Retorna quantos
+    registros foram inseridos.
+    """
+    arquivos = list(arquivos) if arquivos is not None else arquivos_historico()
+    if not arquivos:
+        console.print(f"[warning]Aviso: Nenhuma planilha de histórico de chamadas encontrada em '{DATA_DIR}'. Pulando migração.[/warning]")
+        return 0
+    console.print(f"[info]Migrando histórico de chamadas de {len(arquivos)} arquivo(s): {', '.join(a.name for a in arquivos)}...[/info]")
+
+    lidos = mapear_em_processos(ler_historico_chamadas, arquivos, max_processos)
 
     conn = get_db_connection()
     if not conn:
         console.print("[error]Não foi possível obter conexão com o banco de dados.[/error]")
-        return
+        return 0
 
+    migrados_total = 0
     try:
         cursor = conn.cursor()
-        df_chamada = pd.read_excel(ARQUIVO_CHAMADA_DIARIA_UNICO, header=5)
-        df_chamada.columns = [str(c).strip() for c in df_chamada.columns]
-
-        df_chamada.rename(columns={
-            'NOME': 'nome_aluno', 'TELEFONE': 'telefone_responsavel',
-            'PROFESSOR': 'professor_responsavel', 'DATA': 'data', 'RELATO': 'justificativa'
-        }, inplace=True)
-
-        required_cols = ['nome_aluno', 'data']
-        if not all(col in df_chamada.columns for col in required_cols):
-            missing = [col for col in required_cols if col not in df_chamada.columns]
-            console.print(f"[error]Colunas essenciais ausentes em '{ARQUIVO_CHAMADA_DIARIA_UNICO.name}': {missing}.[/error]")
-            return
-
-        df_chamada['nome_aluno'] = df_chamada['nome_aluno'].astype(str).str.strip().str.upper()
-        df_chamada['data'] = pd.to_datetime(df_chamada['data'], errors='coerce').dt.strftime('%Y-%m-%d')
-        df_chamada.dropna(subset=['data', 'nome_aluno'], inplace=True)
-
-        migrados_arquivo = 0
-        for _, row in df_chamada.iterrows():
-            try:
-                cursor.execute("SELECT id FROM alunos WHERE nome = ?", (row['nome_aluno'],))
-                aluno_id_result = cursor.fetchone()
-                if aluno_id_result:
-                    aluno_id = aluno_id_result[0]
-                    cursor.execute("SELECT id FROM chamadas WHERE aluno_id = ? AND data = ?", (aluno_id, row['data']))
-                    chamada_existente = cursor.fetchone()
-                    
-                    status = 'F'
-                    justificativa = str(row.get('justificativa', '')).strip() if pd.notna(row.get('justificativa')) else None
-                    professor = str(row.get('professor_responsavel', '')).strip() if pd.notna(row.get('professor_responsavel')) else None
-
-                    if not chamada_existente:
-                        cursor.execute("""
-                            INSERT INTO chamadas (aluno_id, data, status, justificativa, professor_responsavel) 
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (aluno_id, row['data'], status, justificativa, professor))
-                        migrados_arquivo += 1
-                else:
-                    console.print(f"[warning]Aluno '{row['nome_aluno']}' não encontrado no DB. Pulando registro.[/warning]")
-            except Exception as e_row:
-                console.print(f"[error]Erro ao processar linha de chamada: {e_row}[/error]")
-        
-        conn.commit()
-        console.print(f"[success]✔ {migrados_arquivo} registros de chamada migrados de '{ARQUIVO_CHAMADA_DIARIA_UNICO.name}'.[/success]")
+        indice_nomes = construir_indice_nomes(cursor.execute("SELECT id, nome FROM alunos").fetchall())
+
+        for caminho, (df_chamada, erro) in zip(arquivos, lidos):
+            if erro:
+                console.print(f"[error]{erro}[/error]")
+                continue
+
+            df_chamada['aluno_id'] = df_chamada['nome_aluno'].map(normalizar_nome).map(indice_nomes)
+            desconhecidos = df_chamada['aluno_id'].isna()
+            for nome in df_chamada.loc[desconhecidos, 'nome_aluno'].unique():
+                console.print(f"[warning]Aluno '{nome}' não encontrado no DB. Pulando registro.[/warning]")
+
+            # Uma falta por aluno e dia: vale a primeira linha da planilha, e os dias que o
+            # aluno já tem no banco (anti-join com as chamadas do período) ficam de fora
+            novas = df_chamada[~desconhecidos].astype({'aluno_id': int}).drop_duplicates(['aluno_id', 'data'])
+            existentes = pd.read_sql_query(
+                "SELECT DISTINCT aluno_id, data FROM chamadas WHERE data BETWEEN ? AND ?",
+                conn, params=(novas['data'].min(), novas['data'].max())
+            ) if not novas.empty else pd.DataFrame(columns=['aluno_id', 'data'])
+            novas = novas.merge(existentes.astype({'aluno_id': int}), on=['aluno_id', 'data'], how='left', indicator=True)
+            novas = novas[novas['_merge'] == 'left_only']
+
+            cursor.executemany("""
+                INSERT INTO chamadas (aluno_id, data, status, justificativa, professor_responsavel)
+                VALUES (?, ?, 'F', ?, ?)
+                ON CONFLICT DO NOTHING
+            """, zip(
+                novas['aluno_id'].tolist(), novas['data'].tolist(),
+                _textos_aparados(novas['justificativa']), _textos_aparados(novas['professor_responsavel'])
+            ))
+            migrados_arquivo = max(cursor.rowcount, 0)
+            
+            conn.commit()
+            migrados_total += migrados_arquivo
+            console.print(f"[success]✔ {migrados_arquivo} registros de chamada migrados de '{caminho.name}'.[/success]")
 
     except Exception as e:
-        console.print(f"[error]Erro ao ler ou processar '{ARQUIVO_CHAMADA_DIARIA_UNICO.name}': {e}[/error]")
+        console.print(f"[error]Erro ao processar o histórico de chamadas: {e}[/error]")
     finally:
         if conn:
             conn.close()
+    if migrados_total:
+        # As faltas importadas deixaram os alunos pendentes; recalcula as sequências agora
+        atualizar_sequencias_faltas()
+    return migrados_total
 
 if __name__ == "__main__":
     console.print("[info]Iniciando migração de dados para o banco...[/info]")
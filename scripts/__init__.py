@@ -1,44 +1,95 @@
 # scripts/__init__.py
 
-# Importa funções que serão diretamente acessíveis via 'from scripts import funcao'
-# Ou importadas pelos outros módulos dentro de 'scripts'
-from .db_utils import (
-    get_db_connection,
-    carregar_alunos_db,
-    carregar_horarios,
-    salvar_justificativa_db,
-    salvar_chamada_db,
-    atualizar_no_banco,
-    carregar_todas_faltas,
-    classificar_justificativa,
-    salvar_lembrete,
-    carregar_lembretes_aluno,
-    salvar_comportamento,
-    carregar_comportamento_aluno,
-)
-
-from .ui_pages import (
-    pagina_chamada,
-    pagina_gestao_individual,
-    pagina_dashboard
-)
-
-from .ui_reports import pagina_relatorios
-
-from .analysis import (
-    detectar_padroes_de_falta,
-    gerar_ranking_faltas,
-    gerar_grafico_calendario,
-    gerar_grafico_top_faltas,
-    gerar_resumo_estatistico
-)
-
-from .reports import (
-    gerar_relatorio_excel_completo
-)
-
-from .sponte_scraper import (
-    configurar_driver,
-    executar_scraper_sponte,
-    buscar_alunos_sponte
-)
\ No newline at end of file
+# Funções diretamente acessíveis via 'from scripts import funcao', agrupadas pelo
+# submódulo que as define. Os submódulos só são importados no primeiro acesso a um
+# dos seus nomes (PEP 562): 'from scripts.db_utils import ...' não carrega mais a
+# interface, os gráficos (matplotlib/plotly) nem o scraper (selenium).
+import importlib
+from typing import Any, Dict, List, Tuple
+
+_EXPORTACOES: Dict[str, Tuple[str, ...]] = {
+    "db_utils": (
+        "get_db_connection",
+        "get_db_connection_leitura",
+        "transacao",
+        "carregar_alunos_db",
+        "normalizar_nome",
+        "indice_nomes_alunos",
+        "buscar_aluno_id",
+        "sugerir_correspondencias",
+        "aplicar_correspondencias",
+        "geracao_dados",
+        "token_dados",
+        "carregar_horarios",
+        "importar_horarios",
+        "carregar_turmas",
+        "carregar_alunos_turma",
+        "atualizar_sequencias_faltas",
+        "carregar_sequencias_faltas",
+        "carregar_feriados",
+        "salvar_feriado",
+        "remover_feriado",
+        "salvar_justificativa_db",
+        "salvar_justificativas_lote",
+        "reclassificar_justificativas",
+        "existem_justificativas_pendentes",
+        "reclassificar_em_segundo_plano",
+        "salvar_chamada_db",
+        "salvar_chamadas_lote",
+        "atualizar_no_banco",
+        "carregar_todas_faltas",
+        "carregar_resumo_agregado",
+        "classificar_justificativa",
+        "classificar_series",
+        "salvar_lembrete",
+        "carregar_lembretes_aluno",
+        "salvar_comportamento",
+        "carregar_comportamento_aluno",
+    ),
+    "ui_pages": (
+        "pagina_chamada",
+        "pagina_gestao_individual",
+        "pagina_dashboard",
+    ),
+    "ui_reports": (
+        "pagina_relatorios",
+    ),
+    "analysis": (
+        "detectar_padroes_de_falta",
+        "gerar_ranking_faltas",
+        "gerar_grafico_calendario",
+        "gerar_grafico_top_faltas",
+        "grafico_calendario_em_cache",
+        "grafico_top_faltas_em_cache",
+        "gerar_resumo_estatistico",
+        "faltas_por_mes",
+        "faltas_por_dia",
+        "ranking_faltas",
+        "ranking_presencas",
+    ),
+    "reports": (
+        "gerar_relatorio_excel_completo",
+    ),
+    "sponte_scraper": (
+        "configurar_driver",
+        "executar_scraper_sponte",
+        "buscar_alunos_sponte",
+    ),
+}
+
+_MODULO_DE: Dict[str, str] = {nome: modulo for modulo, nomes in _EXPORTACOES.items() for nome in nomes}
+
+__all__ = list(_MODULO_DE)
+
+
+def __getattr__(nome: str) -> Any:
+    modulo = _MODULO_DE.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,10 +1,15 @@
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
 import pandas as pd
-import plotly.express as px
-import matplotlib.pyplot as plt
 from datetime import timedelta, datetime
 import logging
-from plotly.graph_objs import Figure
+
+# matplotlib e plotly são importados dentro das funções que desenham, no primeiro gráfico
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure as FiguraMatplotlib
+    from plotly.graph_objs import Figure
+
+from .db_utils import carregar_resumo_agregado, token_dados, STATUS_FALTA, STATUS_PRESENCA
+from .cache_graficos import CACHE_GRAFICOS, figura_de_json, figura_para_png
 
 # Configuração de logging
 logging.basicConfig(
@@ -12,57 +17,86 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def detectar_padroes_de_falta(df_faltas: pd.DataFrame) -> pd.DataFrame:
-    """Detecta padrões preocupantes de frequência escolar."""
-    if df_faltas.empty:
-        return pd.DataFrame(columns=["Aluno", "Alerta"])
-    
-    df_faltas.columns = [col.lower() for col in df_faltas.columns]
-    
-    if 'data' not in df_faltas.columns or 'nome_aluno' not in df_faltas.columns:
-        logging.warning("DataFrame de faltas vazio ou colunas 'data'/'nome_aluno' ausentes para detectar padrões.")
-        return pd.DataFrame(columns=["Aluno", "Alerta"]) # Retorna DataFrame vazio
-    
-    alertas = []
-    df_faltas['data'] = pd.to_datetime(df_faltas['data'], errors='coerce')
-    df_faltas.dropna(subset=['data'], inplace=True) # Remove linhas com data inválida
-    
+COLUNAS_ALERTAS = ["Aluno", "Alerta"]
+
+
+def _eh_falta(status: pd.Series) -> pd.Series:
+    """Máscara das chamadas com status de falta (STATUS_FALTA, sem diferenciar maiúsculas)."""
+    faltas = {s.lower() for s in STATUS_FALTA}
+    return status.astype(object).str.lower().isin(faltas).astype(bool)
+
+
+def detectar_padroes_de_falta(df_faltas: pd.DataFrame, referencia: Optional[datetime] = None) -> pd.DataFrame:
+    """Detecta padrões preocupantes de frequência escolar.
+
+    Alunos com pelo menos duas chamadas válidas recebem até dois alertas: 3 ou mais
+    faltas nos 7 dias anteriores a `referencia` (padrão: agora) e faltas em dias
+    consecutivos. Tudo é calculado de uma vez sobre o DataFrame ordenado por aluno e
+    data, sem laço por aluno; o DataFrame recebido não é alterado.
+    """
     if df_faltas.empty:
+        return pd.DataFrame(columns=COLUNAS_ALERTAS)
+
+    df = df_faltas.rename(columns=str.lower)
+    if 'data' not in df.columns or 'nome_aluno' not in df.columns or 'status' not in df.columns:
+        logging.warning("DataFrame de faltas vazio ou colunas 'data'/'nome_aluno'/'status' ausentes para detectar padrões.")
+        return pd.DataFrame(columns=COLUNAS_ALERTAS)
+
+    datas = df['data']
+    if not pd.api.types.is_datetime64_any_dtype(datas):
+        datas = pd.to_datetime(datas, errors='coerce')
+    chamadas = pd.DataFrame({
+        'nome_aluno': df['nome_aluno'].astype(object),
+        'data': datas,
+        'faltou': _eh_falta(df['status']),
+    }).dropna(subset=['nome_aluno', 'data'])
+
+    if chamadas.empty:
         logging.info("Nenhum dado válido de faltas após processamento para detectar padrões.")
-        return pd.DataFrame(columns=["Aluno", "Alerta"])
-
-    for nome, grupo in df_faltas.groupby('nome_aluno'):
-        grupo_valido = grupo.dropna(subset=['data']).sort_values('data')
-        if len(grupo_valido) < 2:
-            continue
-            
-        sete_dias_atras = datetime.now() - timedelta(days=7)
-        faltas_recentes = grupo_valido[
-            (grupo_valido['data'] >= sete_dias_atras) &
-            (grupo_valido['status'].str.lower() == 'faltou')
-        ]
-        if len(faltas_recentes) >= 3:
-            alertas.append({
-                "Aluno": nome, 
-                "Alerta": f"⚠️ {len(faltas_recentes)} faltas nos últimos 7 dias"
-            })
-        
-        faltas_consecutivas_grupo = grupo_valido[grupo_valido['status'].str.lower() == 'faltou'].copy()
-        if len(faltas_consecutivas_grupo) > 1:
-            faltas_consecutivas_grupo = faltas_consecutivas_grupo.sort_values('data')
-            dias_faltas = faltas_consecutivas_grupo['data'].diff().dt.days
-            if (dias_faltas == 1).any():
-                alertas.append({
-                    "Aluno": nome, 
-                    "Alerta": "ℹ️ Possui faltas em dias consecutivos"
-                })
-    
-    return pd.DataFrame(alertas) if alertas else pd.DataFrame(columns=["Aluno", "Alerta"])
+        return pd.DataFrame(columns=COLUNAS_ALERTAS)
+
+    chamadas = chamadas.sort_values(['nome_aluno', 'data'], kind='stable')
+    sete_dias_atras = (referencia or datetime.now()) - timedelta(days=7)
+    chamadas['recente'] = chamadas['faltou'] & (chamadas['data'] >= sete_dias_atras)
+
+    # Dias consecutivos: diferença entre cada falta e a falta anterior do mesmo aluno
+    faltas = chamadas[chamadas['faltou']]
+    mesmo_aluno = faltas['nome_aluno'].eq(faltas['nome_aluno'].shift())
+    consecutiva = mesmo_aluno & faltas['data'].diff().dt.days.eq(1)
+    chamadas['consecutiva'] = consecutiva.reindex(chamadas.index, fill_value=False)
+
+    por_aluno = chamadas.groupby('nome_aluno', sort=True).agg(
+        chamadas=('data', 'size'),
+        recentes=('recente', 'sum'),
+        consecutiva=('consecutiva', 'any'),
+    )
+    por_aluno = por_aluno[por_aluno['chamadas'] >= 2]
+
+    recentes = por_aluno[por_aluno['recentes'] >= 3]
+    consecutivos = por_aluno[por_aluno['consecutiva']]
+    alertas = pd.concat([
+        pd.DataFrame({
+            "Aluno": recentes.index,
+            "Alerta": [f"⚠️ {n} faltas nos últimos 7 dias" for n in recentes['recentes'].tolist()],
+            "ordem": 0,
+        }),
+        pd.DataFrame({
+            "Aluno": consecutivos.index,
+            "Alerta": "ℹ️ Possui faltas em dias consecutivos",
+            "ordem": 1,
+        }),
+    ], ignore_index=True)
+    if alertas.empty:
+        return pd.DataFrame(columns=COLUNAS_ALERTAS)
+    # Mesma ordem de antes: por aluno, com o alerta de faltas recentes primeiro
+    return alertas.sort_values(["Aluno", "ordem"], kind='stable')[COLUNAS_ALERTAS].reset_index(drop=True)
 
 def gerar_ranking_faltas(df_faltas: pd.DataFrame) -> pd.DataFrame:
     """
     Gera um ranking dos alunos com mais faltas.
-    Espera um DataFrame com as colunas 'nome_aluno' e 'status'.
+    Espera um DataFrame com as colunas 'nome_aluno' e 'status' (ex.: as faltas de um
+    relatório já filtradas por período e categoria). Para o histórico inteiro, use
+    `ranking_faltas`, que agrega no banco.
     """
     try:
         # Garante que as colunas existem antes de tentar acessá-las
@@ -71,7 +105,7 @@ def gerar_ranking_faltas(df_faltas: pd.DataFrame) -> pd.DataFrame:
             return pd.DataFrame(columns=['Aluno', 'Total de Faltas']) # Retorna um DataFrame vazio com as colunas esperadas
         
         # Filtra apenas as faltas
-        df_faltas_apenas = df_faltas[df_faltas['status'].str.lower() == 'faltou'].copy()
+        df_faltas_apenas = df_faltas[_eh_falta(df_faltas['status'])].copy()
         
         if df_faltas_apenas.empty:
             logging.info("Nenhuma falta registrada para gerar o ranking.")
@@ -86,27 +120,21 @@ def gerar_ranking_faltas(df_faltas: pd.DataFrame) -> pd.DataFrame:
         logging.error(f"Erro ao gerar ranking: {e}")
         return pd.DataFrame(columns=['Aluno', 'Total de Faltas']) # Retorna DataFrame vazio em caso de erro
 
-def gerar_grafico_calendario(df_faltas: pd.DataFrame) -> Optional[Figure]:
-    """Gera um gráfico de calor (heatmap) para faltas por dia."""
-    if df_faltas.empty or 'data' not in df_faltas.columns or 'status' not in df_faltas.columns:
-        logging.warning("DataFrame de faltas vazio ou colunas 'data'/'status' ausentes para o calendário.")
+def gerar_grafico_calendario(faltas_dia: pd.DataFrame) -> Optional["Figure"]:
+    """Gera um gráfico de calor (heatmap) para faltas por dia.
+
+    Espera o resultado de `faltas_por_dia` (colunas Data/Faltas, uma linha por dia),
+    agregado no banco: o custo depende do número de dias, não de chamadas.
+    """
+    if faltas_dia.empty or 'Data' not in faltas_dia.columns or 'Faltas' not in faltas_dia.columns:
+        logging.info("Nenhuma falta registrada para o gráfico de calendário.")
         return None
-        
+
     try:
-        df_faltas['data'] = pd.to_datetime(df_faltas['data'])
-        df_faltas.dropna(subset=['data'], inplace=True) # Remove linhas com data inválida
+        import plotly.express as px
 
-        faltas_por_dia = df_faltas[df_faltas['status'].str.lower() == 'faltou']
-        
-        if faltas_por_dia.empty:
-            logging.info("Nenhuma falta registrada para o gráfico de calendário.")
-            return None
-            
-        faltas_por_dia = faltas_por_dia.groupby(faltas_por_dia['data'].dt.date).size().reset_index(name='Faltas')
-        faltas_por_dia.columns = ['Data', 'Faltas']
-        
         fig = px.density_heatmap(
-            faltas_por_dia,
+            faltas_dia,
             x='Data',
             y='Faltas',
             title="Faltas por Dia",
@@ -117,15 +145,20 @@ def gerar_grafico_calendario(df_faltas: pd.DataFrame) -> Optional[Figure]:
         logging.error(f"Erro ao gerar gráfico de calendário: {e}")
         return None
 
-def gerar_grafico_top_faltas(df_faltas: pd.DataFrame, top_n: int = 10) -> Optional[plt.Figure]:
-    """Gera gráfico de barras com alunos com mais faltas."""
+def gerar_grafico_top_faltas(ranking_df: pd.DataFrame, top_n: int = 10) -> Optional["FiguraMatplotlib"]:
+    """Gera gráfico de barras com alunos com mais faltas.
+
+    Espera o resultado de `ranking_faltas(top_n=...)` (colunas Aluno/Total de Faltas);
+    alunos empatados na última posição aparecem todos.
+    """
     try:
-        ranking_df = gerar_ranking_faltas(df_faltas) # Esta função agora retorna DataFrame vazio em caso de erro/sem dados
-        if ranking_df.empty: # Verifica se está vazio, não se é None
+        if ranking_df.empty:
             logging.info("Nenhum dado de ranking para gerar o gráfico Top N faltas.")
             return None
-            
-        top_alunos = ranking_df.head(top_n)
+
+        import matplotlib.pyplot as plt
+
+        top_alunos = ranking_df
         fig, ax = plt.subplots(figsize=(10, 6))
         
         bars = ax.barh(
@@ -138,13 +171,44 @@ def gerar_grafico_top_faltas(df_faltas: pd.DataFrame, top_n: int = 10) -> Option
         ax.invert_yaxis()
         ax.set_xlabel('Total de Faltas', fontsize=12)
         ax.set_title(f"Top {top_n} Alunos com Mais Faltas", fontsize=14, pad=20)
-        plt.tight_layout()
+        fig.tight_layout()
         
         return fig
     except Exception as e:
         logging.error(f"Erro ao gerar gráfico de top faltas: {e}")
         return None
 
+def _iso(data: Optional[datetime]) -> Optional[str]:
+    return data.isoformat() if data is not None else None
+
+def grafico_calendario_em_cache(
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None
+) -> Optional["Figure"]:
+    """Calendário de faltas do período, montado uma vez por geração de `chamadas`.
+
+    O gráfico fica em CACHE_GRAFICOS como JSON do plotly; reexecuções e outras sessões
+    só o desserializam, sem consultar o banco nem recriar a figura.
+    """
+    def gerar() -> Optional[str]:
+        fig = gerar_grafico_calendario(faltas_por_dia(data_inicio, data_fim))
+        return fig.to_json() if fig is not None else None
+
+    chave = ('calendario', _iso(data_inicio), _iso(data_fim), token_dados('chamadas'))
+    json_plotly = CACHE_GRAFICOS.obter_ou_gerar(chave, gerar)
+    return figura_de_json(json_plotly) if json_plotly is not None else None
+
+def grafico_top_faltas_em_cache(top_n: int = 10) -> Optional[bytes]:
+    """PNG do gráfico Top N faltas, gerado uma vez por geração de `chamadas`/`alunos`.
+
+    A figura matplotlib é fechada logo após virar PNG; exiba com `st.image`.
+    """
+    def gerar() -> Optional[bytes]:
+        fig = gerar_grafico_top_faltas(ranking_faltas(top_n=top_n), top_n)
+        return figura_para_png(fig) if fig is not None else None
+
+    return CACHE_GRAFICOS.obter_ou_gerar(('top_faltas', top_n, token_dados('chamadas', 'alunos')), gerar)
+
 def gerar_resumo_estatistico(df_faltas: pd.DataFrame) -> pd.DataFrame:
     """Gera um resumo estatístico das faltas."""
     if df_faltas.empty:
@@ -176,4 +240,58 @@ def gerar_resumo_estatistico(df_faltas: pd.DataFrame) -> pd.DataFrame:
         else:
             logging.info("Nenhum status de 'ligacao_feita' encontrado.")
     
-    return resumo
\ No newline at end of file
+    return resumo
+
+
+# --- Leituras a partir de resumo_diario (agregados pré-somados no banco) ---
+
+def faltas_por_mes(data_inicio: Optional[datetime] = None, data_fim: Optional[datetime] = None) -> pd.Series:
+    """Total de faltas por mês (índice 'Mês Ano'), lido de resumo_diario.
+
+    Conexão: analítica (somente leitura), via carregar_resumo_agregado.
+    """
+    df = carregar_resumo_agregado('mes', STATUS_FALTA, data_inicio, data_fim)
+    if df.empty:
+        return pd.Series(dtype='int64')
+    meses = pd.to_datetime(df['mes'], format='%Y-%m')
+    return pd.Series(df['total'].to_numpy(), index=meses.dt.strftime('%B %Y'), name='Faltas')
+
+def faltas_por_dia(data_inicio: Optional[datetime] = None, data_fim: Optional[datetime] = None) -> pd.DataFrame:
+    """Total de faltas por dia (colunas Data/Faltas), lido de resumo_diario.
+
+    Conexão: analítica (somente leitura), via carregar_resumo_agregado.
+    """
+    df = carregar_resumo_agregado('dia', STATUS_FALTA, data_inicio, data_fim)
+    if df.empty:
+        return pd.DataFrame(columns=['Data', 'Faltas'])
+    return pd.DataFrame({'Data': pd.to_datetime(df['data']).dt.date, 'Faltas': df['total']})
+
+def ranking_faltas(
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+    top_n: Optional[int] = None
+) -> pd.DataFrame:
+    """Alunos por total de faltas (colunas Aluno/Total de Faltas), agregado em resumo_diario.
+
+    Com `top_n`, entram os alunos até a posição `top_n`, incluindo todos os empatados
+    com o último. Conexão: analítica (somente leitura), via carregar_resumo_agregado.
+    """
+    df = carregar_resumo_agregado('aluno', STATUS_FALTA, data_inicio, data_fim, limite=top_n, com_empates=True)
+    if df.empty:
+        return pd.DataFrame(columns=['Aluno', 'Total de Faltas'])
+    return df.rename(columns={'nome_aluno': 'Aluno', 'total': 'Total de Faltas'})[['Aluno', 'Total de Faltas']]
+
+def ranking_presencas(
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+    top_n: int = 5
+) -> pd.DataFrame:
+    """Alunos com mais presenças no período (colunas Aluno/Total de Presenças), lido de resumo_diario.
+
+    Conexão: analítica (somente leitura), via carregar_resumo_agregado.
+    """
+    df = carregar_resumo_agregado('aluno', STATUS_PRESENCA, data_inicio, data_fim, limite=top_n)
+    if df.empty:
+        return pd.DataFrame(columns=['Aluno', 'Total de Presenças'])
+    return df.rename(columns={'nome_aluno': 'Aluno', 'total': 'Total de Presenças'})[['Aluno', 'Total de Presenças']]
+
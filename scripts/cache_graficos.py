@@ -0,0 +1,115 @@
+# Em scripts/cache_graficos.py
+"""Cache de gráficos já serializados, compartilhado por todas as sessões do servidor.
+
+Cada gráfico é guardado pronto para exibir (PNG do matplotlib ou JSON do plotly) sob
+a chave (tipo, parâmetros, token dos dados). O token traz as gerações das tabelas de
+origem, então um gráfico nunca é servido com dados antigos; as entradas de tokens
+velhos apenas deixam de ser usadas e saem pelo despejo LRU, que mantém o total de
+bytes abaixo de `limite_bytes`.
+
+Figuras matplotlib são fechadas assim que viram PNG (mesmo se a serialização
+falhar), para não se acumularem no estado global do pyplot no processo do servidor.
+"""
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable, Optional, Tuple, Union
+
+# matplotlib e plotly só são importados ao serializar/desserializar o primeiro gráfico
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure as FiguraMatplotlib
+    from plotly.graph_objs import Figure
+
+# Gráfico serializado: PNG (bytes) ou JSON do plotly (str)
+Serializado = Union[bytes, str]
+
+# Teto padrão de memória dos gráficos guardados
+LIMITE_BYTES_PADRAO = 32 * 1024 * 1024
+
+
+def _tamanho(valor: Serializado) -> int:
+    """Tamanho de um gráfico serializado (para o JSON, em caracteres: basta para o limite)."""
+    return len(valor)
+
+
+def figura_para_png(fig: "FiguraMatplotlib", dpi: int = 100) -> bytes:
+    """Serializa a figura matplotlib em PNG e a fecha."""
+    import matplotlib.pyplot as plt
+
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi)
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def figura_de_json(json_plotly: str) -> "Figure":
+    """Reconstrói a figura plotly guardada no cache (bem mais barato que recriá-la)."""
+    import plotly.io as pio
+
+    return pio.from_json(json_plotly, skip_invalid=True)
+
+
+class CacheGraficos:
+    """Gráficos serializados em ordem de uso (LRU), limitados pelo total de bytes."""
+
+    def __init__(self, limite_bytes: int = LIMITE_BYTES_PADRAO):
+        self.limite_bytes = limite_bytes
+        self._entradas: "OrderedDict[Tuple[Hashable, ...], Serializado]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    @property
+    def bytes_ocupados(self) -> int:
+        return self._bytes
+
+    def obter(self, chave: Tuple[Hashable, ...]) -> Optional[Serializado]:
+        """Gráfico guardado sob `chave` (marcado como o mais recente), ou None."""
+        with self._lock:
+            valor = self._entradas.get(chave)
+            if valor is not None:
+                self._entradas.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave: Tuple[Hashable, ...], valor: Serializado) -> None:
+        """Guarda o gráfico e despeja os menos usados até caber no limite."""
+        tamanho = _tamanho(valor)
+        if tamanho > self.limite_bytes:
+            logging.info(f"Gráfico '{chave[0]}' ({tamanho} bytes) maior que o cache; não guardado.")
+            return
+        with self._lock:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= _tamanho(anterior)
+            self._entradas[chave] = valor
+            self._bytes += tamanho
+            while self._bytes > self.limite_bytes:
+                _, removido = self._entradas.popitem(last=False)
+                self._bytes -= _tamanho(removido)
+
+    def obter_ou_gerar(
+        self,
+        chave: Tuple[Hashable, ...],
+        gerar: Callable[[], Optional[Serializado]]
+    ) -> Optional[Serializado]:
+        """Gráfico do cache ou, na falta, gerado por `gerar()` e guardado (None não é guardado)."""
+        valor = self.obter(chave)
+        if valor is None:
+            valor = gerar()
+            if valor is not None:
+                self.guardar(chave, valor)
+        return valor
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+
+# Cache do processo, usado pelas funções de scripts.analysis
+CACHE_GRAFICOS = CacheGraficos()
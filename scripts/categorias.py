@@ -0,0 +1,156 @@
+# Em scripts/categorias.py
+"""Classificação de justificativas de falta pelas palavras-chave de `[categorias]` do config.toml.
+
+A configuração é compilada uma única vez em um `ClassificadorJustificativas`: uma
+expressão regular (alternância das palavras-chave) por categoria, já com acentos e
+caixa dobrados. A ordem das categorias no config é a prioridade: vence a primeira
+categoria com alguma palavra contida no texto. `classificar_series` classifica uma
+coluna inteira com as operações de string do pandas, uma vez por texto distinto.
+
+Cada rótulo tem um hash das categorias que decidem por ele: a própria categoria e
+todas as anteriores (um texto só é 'Transporte' se não casou com nenhuma categoria
+de maior prioridade). 'Outros' depende de todas, e seu hash cobre a configuração
+inteira mais uma marca própria. O hash do rótulo é gravado junto com a categoria em
+`chamadas`; se a configuração muda, só os rótulos cujo prefixo mudou precisam ser
+refeitos (mexer em 'Transporte' não invalida quem é 'Saude', que vem antes).
+"""
+import hashlib
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+SEM_CATEGORIA = "Outros"
+NAO_ESPECIFICADO = "Não Especificado"
+
+# Versão das regras de classificação (dobra de acentos, prioridade); entra no hash,
+# então incrementá-la faz todas as justificativas serem reclassificadas
+VERSAO_CLASSIFICADOR = 1
+
+# Marcas diacríticas combinantes que sobram após a decomposição NFKD ('é' -> 'e' + '´')
+_MARCAS = '[\u0300-\u036f]'
+_RE_MARCAS = re.compile(_MARCAS)
+
+ConfigCategorias = Dict[str, List[str]]
+
+
+def dobrar_texto(texto: str) -> str:
+    """Minúsculas e sem acentos ('Médico' -> 'medico')."""
+    return _RE_MARCAS.sub('', unicodedata.normalize('NFKD', texto)).lower()
+
+
+def rotulo_categoria(chave: str) -> str:
+    """Rótulo exibido e gravado para uma chave do config ('motivo_saude' -> 'Saude')."""
+    return chave.replace("motivo_", "").replace("_", " ").title()
+
+
+def _hash_categorias(categorias: List[Tuple[str, str]]) -> str:
+    conteudo = json.dumps([VERSAO_CLASSIFICADOR, categorias], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16]
+
+
+class ClassificadorJustificativas:
+    """Categorias do config compiladas, na ordem de prioridade."""
+
+    def __init__(self, categorias_config: Optional[ConfigCategorias]):
+        self.categorias: List[Tuple[str, str]] = []
+        for chave, palavras in (categorias_config or {}).items():
+            if not isinstance(palavras, list):
+                continue
+            dobradas = sorted({dobrar_texto(str(p)) for p in palavras if str(p)}, key=lambda p: (-len(p), p))
+            if dobradas:
+                self.categorias.append((rotulo_categoria(chave), '|'.join(re.escape(p) for p in dobradas)))
+        self._regex = [(rotulo, re.compile(padrao)) for rotulo, padrao in self.categorias]
+        self.hash = _hash_categorias(self.categorias)
+        # Rótulo -> hash das categorias até ele (rótulo repetido: vale a última posição)
+        self.hashes: Dict[str, str] = {
+            rotulo: _hash_categorias(self.categorias[:posicao + 1])
+            for posicao, (rotulo, _) in enumerate(self.categorias)
+        }
+        # 'Outros' depende de todas; a marca final o distingue do hash da última categoria
+        self.hashes[SEM_CATEGORIA] = _hash_categorias(self.categorias + [(SEM_CATEGORIA, "")])
+
+    def hash_de(self, rotulo: Optional[str]) -> str:
+        """Hash gravado junto com `rotulo` (ver `hashes`); rótulo desconhecido usa o de 'Outros'."""
+        return self.hashes.get(rotulo, self.hashes[SEM_CATEGORIA])
+
+    @property
+    def rotulos(self) -> List[str]:
+        """Todos os rótulos possíveis, na ordem de prioridade."""
+        return list(dict.fromkeys([rotulo for rotulo, _ in self.categorias] + [SEM_CATEGORIA, NAO_ESPECIFICADO]))
+
+    def classificar(self, texto: Any) -> str:
+        """Categoria de um único texto; não-texto (None/NaN) vira 'Não Especificado'."""
+        if not isinstance(texto, str):
+            return NAO_ESPECIFICADO
+        dobrado = dobrar_texto(texto)
+        return next((rotulo for rotulo, regex in self._regex if regex.search(dobrado)), SEM_CATEGORIA)
+
+    def classificar_series(self, textos: pd.Series) -> pd.Series:
+        """Categoria de cada texto da série (categórica, mesmo índice).
+
+        Os textos distintos são dobrados e testados categoria a categoria com
+        `str.contains`; cada categoria só olha os textos que ainda não têm rótulo.
+        """
+        rotulos = self.rotulos
+        codigo_de = {rotulo: i for i, rotulo in enumerate(rotulos)}
+        codigos, distintos = pd.factorize(textos, use_na_sentinel=True)
+        if isinstance(textos.dtype, pd.StringDtype):
+            eh_texto = np.ones(len(distintos), dtype=bool)
+        else:
+            # object, category (ex.: colunas de ler_chamadas_tipadas) etc.: confere valor a valor
+            eh_texto = np.fromiter((isinstance(t, str) for t in distintos), dtype=bool, count=len(distintos))
+        # Código da categoria de cada texto distinto (índices em `rotulos`)
+        categoria_distintos = np.where(eh_texto, codigo_de[SEM_CATEGORIA], codigo_de[NAO_ESPECIFICADO])
+
+        if eh_texto.any() and self.categorias:
+            posicoes = np.flatnonzero(eh_texto)
+            dobrados = (
+                pd.Series(np.asarray(distintos)[posicoes], dtype="string")
+                .str.normalize('NFKD')
+                .str.replace(_MARCAS, '', regex=True)
+                .str.lower()
+            )
+            restantes = np.ones(len(posicoes), dtype=bool)
+            for rotulo, padrao in self.categorias:
+                achou = restantes & dobrados.str.contains(padrao, regex=True).to_numpy(dtype=bool, na_value=False)
+                categoria_distintos[posicoes[achou]] = codigo_de[rotulo]
+                restantes &= ~achou
+                if not restantes.any():
+                    break
+
+        # O sentinela -1 do factorize (valores ausentes) cai no último elemento: 'Não Especificado'
+        codigos_categoria = np.append(categoria_distintos, codigo_de[NAO_ESPECIFICADO])[codigos]
+        return pd.Series(
+            pd.Categorical.from_codes(codigos_categoria, categories=rotulos),
+            index=textos.index, name=textos.name
+        )
+
+
+def _chave_config(categorias_config: Optional[ConfigCategorias]) -> Tuple:
+    if not isinstance(categorias_config, dict):
+        return ()
+    return tuple(
+        (chave, tuple(str(p) for p in palavras))
+        for chave, palavras in categorias_config.items()
+        if isinstance(palavras, list)
+    )
+
+
+@lru_cache(maxsize=8)
+def _compilar(chave: Tuple) -> ClassificadorJustificativas:
+    return ClassificadorJustificativas({categoria: list(palavras) for categoria, palavras in chave})
+
+
+def compilar_categorias(categorias_config: Optional[ConfigCategorias]) -> ClassificadorJustificativas:
+    """Classificador da configuração, compilado uma vez e reaproveitado enquanto ela não muda."""
+    return _compilar(_chave_config(categorias_config))
+
+
+def classificar_series(textos: pd.Series, categorias_config: Optional[ConfigCategorias]) -> pd.Series:
+    """Classifica uma série de justificativas de uma vez (ver ClassificadorJustificativas)."""
+    return compilar_categorias(categorias_config).classificar_series(textos)
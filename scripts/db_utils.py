@@ -1,14 +1,24 @@
-from typing import List, Tuple, Optional, Dict, Any, Union
+from typing import Callable, Iterable, List, Tuple, Optional, Dict, Any, Union
 import sqlite3
-<<<<<<< HEAD
-import streamlit as st
-=======
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
 import pandas as pd
 from pathlib import Path
 from datetime import date, datetime
 import streamlit as st # Necessário se st.error for usado aqui
 import logging
+import threading
+import unicodedata
+
+from database_setup import (
+    get_db_connection as _obter_conexao_pool,
+    get_db_connection_leitura as _obter_conexao_leitura_pool,
+    transacao as _transacao_pool,
+    geracao_dados as _geracao_dados_pool,
+    fila_escrita as _fila_escrita,
+)
+from .planilha_horarios import Horarios, DIAS_SEMANA, carregar_horarios_com_cache, nomes_da_planilha, vigiar_planilha
+from .reconciliacao import IndiceTrigramas
+from .categorias import ClassificadorJustificativas, classificar_series, compilar_categorias
+from .sequencias import calcular_sequencia, dia_da_semana
 
 # Configuração de logging
 logging.basicConfig(
@@ -24,53 +34,79 @@ ARQUIVO_HORARIOS = ROOT / "data" / "Planilha de alunos Digital novo (2).xlsx" #
 EXPORT_DIR = ROOT / "export"
 EXPORT_DIR.mkdir(exist_ok=True)
 
+# Status gravados para falta/presença (inclui os códigos antigos 'F'/'P' das migrações)
+STATUS_FALTA = ('Faltou', 'F')
+STATUS_PRESENCA = ('Presente', 'P')
+
 
 # classificar_justificativa agora precisa de categorias_config vindo do main.py
 def classificar_justificativa(texto: str, categorias_config: Dict[str, List[str]]) -> str:
-    """Classifica uma justificativa de falta em categorias pré-definidas."""
-    if pd.isna(texto) or not isinstance(texto, str):
-        return "Não Especificado"
-    
-    texto_lower = str(texto).lower()
-    # Verifica se categorias_config não está vazio e é um dicionário
-    if categorias_config and isinstance(categorias_config, dict):
-        for categoria, palavras in categorias_config.items():
-            if isinstance(palavras, list) and any(palavra.lower() in texto_lower for palavra in palavras):
-                return categoria.replace("motivo_", "").replace("_", " ").title()
-    return "Outros"
+    """Classifica uma justificativa de falta em categorias pré-definidas.
+
+    A configuração é compilada uma vez (ver scripts.categorias); para uma coluna
+    inteira, use `classificar_series`.
+    """
+    return compilar_categorias(categorias_config).classificar(texto)
 
 def get_db_connection() -> Optional[sqlite3.Connection]:
-    """Estabelece conexão com o banco de dados SQLite."""
-    try:
-        conn = sqlite3.connect(str(DB_PATH), timeout=10, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
-        conn.execute("PRAGMA journal_mode = WAL")
-        return conn
-    except sqlite3.Error as e:
-        logging.error(f"Erro de conexão com o banco: {e}")
-        return None
+    """Obtém uma conexão do pool compartilhado com database_setup.
+
+    As conexões são reaproveitadas entre chamadas e reruns do Streamlit; `conn.close()`
+    apenas as devolve ao pool.
+    """
+    return _obter_conexao_pool(DB_PATH)
+
+def get_db_connection_leitura() -> Optional[sqlite3.Connection]:
+    """Obtém uma conexão analítica (somente leitura) para dashboard e relatórios.
+
+    Abre o banco com `mode=ro` e `query_only`, cache maior e mmap; não concorre com
+    a fila de escrita e nunca grava nada por engano.
+    """
+    return _obter_conexao_leitura_pool(DB_PATH)
+
+def transacao():
+    """Context manager de transação de escrita sobre o banco da aplicação."""
+    return _transacao_pool(DB_PATH)
+
+def executar_escrita(operacao: Callable[[sqlite3.Connection], Any]) -> Any:
+    """Executa `operacao(conn)` na fila de escrita única do banco e devolve o resultado.
+
+    As escritas de todas as sessões são serializadas e agrupadas em transações pela
+    thread da fila (ver database_setup.FilaEscrita); exceções da operação são
+    propagadas para quem chamou.
+    """
+    return _fila_escrita(DB_PATH).executar(operacao)
 
 # setup_database, criar_banco_dados, verificar_e_inserir_dados_teste
 # Essas funções foram movidas para database_setup.py e são importadas de lá em main.py
 
 
-<<<<<<< HEAD
-@st.cache_data
-def carregar_alunos_db():
-    """Carrega todos os alunos do banco de dados."""
-    conn = get_db_connection()
-    if not conn:
-        st.error("Erro de conexão com o banco de dados.")
-        return pd.DataFrame()
-=======
-@st.cache_data(ttl=600)
+def geracao_dados(tabela: str) -> int:
+    """Contador de geração da tabela no banco da aplicação (muda a cada escrita)."""
+    return _geracao_dados_pool(tabela, DB_PATH)
+
+def token_dados(*tabelas: str) -> Tuple[Any, ...]:
+    """Estado atual das `tabelas` (banco + gerações), para compor chaves de cache."""
+    return (str(DB_PATH),) + tuple(geracao_dados(tabela) for tabela in tabelas)
+
 def carregar_alunos_db() -> Tuple[pd.DataFrame, str]:
-    """Carrega todos os alunos do banco de dados."""
+    """Carrega todos os alunos do banco de dados.
+
+    O cache é indexado pelo contador de geração da tabela `alunos`, então nunca
+    fica desatualizado após sincronizações, migrações ou cadastros.
+    """
+    try:
+        return _carregar_alunos_db_cache(str(DB_PATH), geracao_dados('alunos'))
+    except Exception as e:
+        logging.error(f"Erro ao carregar alunos: {e}")
+        return pd.DataFrame(), f"Erro ao carregar dados dos alunos: {e}"
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _carregar_alunos_db_cache(db_path: str, geracao: int) -> Tuple[pd.DataFrame, str]:
+    """Leitura efetiva de carregar_alunos_db; erros são propagados para não ficarem em cache."""
     conn = get_db_connection()
     if not conn:
-        return pd.DataFrame(), "Erro de conexão com o banco de dados."
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
+        raise sqlite3.OperationalError("Erro de conexão com o banco de dados.")
     try:
         query = """
         SELECT id, nome, nome_responsavel, telefone_responsavel
@@ -82,42 +118,267 @@ def carregar_alunos_db() -> Tuple[pd.DataFrame, str]:
         if df.empty:
             return df, "Nenhum aluno cadastrado no banco de dados."
             
-        df['nome_norm'] = df['nome'].str.strip().str.upper()
+        df['nome_norm'] = df['nome'].map(normalizar_nome)
         return df, f"Base de dados carregada com {len(df)} alunos."
-    except Exception as e:
-        logging.error(f"Erro ao carregar alunos: {e}")
-        return pd.DataFrame(), f"Erro ao carregar dados dos alunos: {e}"
     finally:
         if conn:
             conn.close()
 
-<<<<<<< HEAD
-@st.cache_resource
-def carregar_horarios():
-=======
-@st.cache_resource(ttl=3600)
-def carregar_horarios() -> Optional[pd.ExcelFile]:
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
-    """Carrega o arquivo Excel com horários das turmas."""
+def normalizar_nome(nome: Any) -> str:
+    """Forma canônica de um nome para comparação: sem acentos, maiúsculas e espaços únicos.
+
+    Ex.: '  joão   da  Silva ' -> 'JOAO DA SILVA'.
+    """
+    if nome is None or (not isinstance(nome, str) and pd.isna(nome)):
+        return ""
+    decomposto = unicodedata.normalize('NFKD', str(nome))
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.upper().split())
+
+def construir_indice_nomes(alunos: Iterable[Tuple[int, str]]) -> Dict[str, int]:
+    """Monta {nome normalizado -> id} a partir de pares (id, nome).
+
+    Se dois cadastros colidem após a normalização, vale o de menor id.
+    """
+    indice: Dict[str, int] = {}
+    for aluno_id, nome in sorted(alunos, key=lambda par: par[0]):
+        chave = normalizar_nome(nome)
+        if not chave:
+            continue
+        if chave in indice:
+            logging.warning(f"Nomes duplicados após normalização: '{nome}' (id {aluno_id}) e id {indice[chave]}.")
+            continue
+        indice[chave] = aluno_id
+    return indice
+
+def ler_indice_nomes(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Monta o índice de nomes a partir do banco: cadastros de `alunos` mais os apelidos aceitos.
+
+    Um apelido nunca sobrepõe o nome de outro aluno cadastrado.
+    """
+    indice = construir_indice_nomes((row['id'], row['nome']) for row in conn.execute("SELECT id, nome FROM alunos"))
+    for row in conn.execute("SELECT apelido, aluno_id FROM apelidos_alunos"):
+        indice.setdefault(row['apelido'], row['aluno_id'])
+    return indice
+
+def indice_nomes_alunos() -> Dict[str, int]:
+    """Índice compartilhado {nome normalizado -> id} dos alunos cadastrados e seus apelidos.
+
+    Construído uma vez por geração das tabelas `alunos`/`apelidos_alunos` e compartilhado
+    entre sessões; use `normalizar_nome` na chave de busca e não modifique o dicionário.
+    """
+    try:
+        return _indice_nomes_alunos_cache(str(DB_PATH), geracao_dados('alunos'), geracao_dados('apelidos_alunos'))
+    except Exception as e:
+        logging.error(f"Erro ao montar índice de nomes dos alunos: {e}")
+        return {}
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _indice_nomes_alunos_cache(db_path: str, geracao: int, geracao_apelidos: int) -> Dict[str, int]:
+    """Leitura efetiva de indice_nomes_alunos; erros são propagados para não ficarem em cache."""
+    conn = get_db_connection()
+    if not conn:
+        raise sqlite3.OperationalError("Erro de conexão com o banco de dados.")
+    try:
+        return ler_indice_nomes(conn)
+    finally:
+        conn.close()
+
+def buscar_aluno_id(nome: str) -> Optional[int]:
+    """Id do aluno pelo nome, ignorando maiúsculas, acentos e espaços extras."""
+    return indice_nomes_alunos().get(normalizar_nome(nome))
+
+def carregar_horarios() -> Optional[Horarios]:
+    """Carrega a planilha de horários já interpretada: dia -> horário -> lista de alunos.
+
+    Todas as abas são lidas e interpretadas uma única vez; o cache em memória é indexado
+    pelo mtime e tamanho do arquivo, e por trás dele há um cache em disco validado pelo
+    hash do conteúdo, refeito em segundo plano quando a planilha muda.
+    """
     if not ARQUIVO_HORARIOS.exists():
         st.error(f"Arquivo '{ARQUIVO_HORARIOS.name}' não encontrado em {ARQUIVO_HORARIOS}.")
         logging.error(f"Arquivo de horários não encontrado: {ARQUIVO_HORARIOS}")
         return None
-        
+
     try:
-        xls = pd.ExcelFile(ARQUIVO_HORARIOS)
-        dias_semana = ['SEGUNDA', 'TERÇA', 'QUARTA', 'QUINTA', 'SEXTA', 'SÁBADO']
-        abas_validas = [aba for aba in xls.sheet_names if aba.upper() in dias_semana]
-        if not abas_validas:
-            st.error("Nenhuma aba válida (SEGUNDA, TERÇA, etc.) encontrada no arquivo de horários.")
-            logging.error("Nenhuma aba válida encontrada no arquivo de horários.")
-            return None
-        return xls
+        vigiar_planilha(ARQUIVO_HORARIOS)
+        info = ARQUIVO_HORARIOS.stat()
+        horarios = _carregar_horarios_cache(str(ARQUIVO_HORARIOS), info.st_mtime_ns, info.st_size)
     except Exception as e:
         st.error(f"Erro ao ler arquivo de horários: {e}")
         logging.error(f"Erro ao ler arquivo de horários: {e}")
         return None
 
+    if not any(dia.upper() in DIAS_SEMANA for dia in horarios):
+        st.error("Nenhuma aba válida (SEGUNDA, TERÇA, etc.) encontrada no arquivo de horários.")
+        logging.error("Nenhuma aba válida encontrada no arquivo de horários.")
+        return None
+    return horarios
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _carregar_horarios_cache(caminho: str, mtime_ns: int, tamanho: int) -> Horarios:
+    """Leitura efetiva de carregar_horarios; erros são propagados para não ficarem em cache."""
+    return carregar_horarios_com_cache(caminho)
+
+# Chaves de `meta` com a assinatura da planilha já importada para turmas/matrículas
+CHAVES_ASSINATURA_HORARIOS = (
+    'horarios_mtime_ns', 'horarios_tamanho', 'horarios_geracao_alunos', 'horarios_geracao_apelidos'
+)
+
+def _sem_cadastro(horarios: Horarios, ids_por_nome: Dict[str, int]) -> Dict[str, Any]:
+    """Nomes da planilha que não correspondem a nenhum aluno ou apelido cadastrado."""
+    por_turma = {
+        (dia, horario): faltando
+        for dia, turmas in horarios.items()
+        for horario, alunos in turmas.items()
+        if (faltando := [nome for nome in alunos if normalizar_nome(nome) not in ids_por_nome])
+    }
+    return {
+        'sem_cadastro': sorted({nome for nomes in por_turma.values() for nome in nomes}),
+        'sem_cadastro_por_turma': por_turma,
+    }
+
+def importar_horarios(forcar: bool = False) -> Optional[Dict[str, Any]]:
+    """Sincroniza as tabelas `turmas` e `matriculas` com a planilha de horários.
+
+    A assinatura da última importação (mtime e tamanho do arquivo, gerações de `alunos`
+    e `apelidos_alunos`)
+    fica em `meta`: sem mudanças, o custo é um stat e uma leitura. Quando algo muda,
+    só as diferenças são gravadas. Retorna as contagens da sincronização e, mesmo sem
+    mudanças, os nomes da planilha sem cadastro: 'sem_cadastro' (todos, ordenados) e
+    'sem_cadastro_por_turma' ({(dia, horário) -> nomes}), que não entram nas matrículas
+    e por isso não aparecem na chamada; None se a planilha não pôde ser lida.
+    """
+    if not ARQUIVO_HORARIOS.exists():
+        logging.error(f"Arquivo de horários não encontrado: {ARQUIVO_HORARIOS}")
+        return None
+    info = ARQUIVO_HORARIOS.stat()
+    assinatura = (info.st_mtime_ns, info.st_size, geracao_dados('alunos'), geracao_dados('apelidos_alunos'))
+
+    if not forcar:
+        conn = get_db_connection()
+        if not conn:
+            return None
+        try:
+            placeholders = ', '.join(['?'] * len(CHAVES_ASSINATURA_HORARIOS))
+            gravada = dict(conn.execute(
+                f"SELECT chave, valor FROM meta WHERE chave IN ({placeholders})", CHAVES_ASSINATURA_HORARIOS
+            ).fetchall())
+        finally:
+            conn.close()
+        if tuple(gravada.get(chave) for chave in CHAVES_ASSINATURA_HORARIOS) == assinatura:
+            horarios = carregar_horarios()
+            if horarios is None:
+                return None
+            return {'importado': False, **_sem_cadastro(horarios, indice_nomes_alunos())}
+
+    horarios = carregar_horarios()
+    if horarios is None:
+        return None
+
+    def _sincronizar(conn: sqlite3.Connection) -> Dict[str, Any]:
+        ids_por_nome = ler_indice_nomes(conn)
+        turmas_existentes = {
+            (row['dia'], row['horario']): row['id'] for row in conn.execute("SELECT id, dia, horario FROM turmas")
+        }
+        desejadas = {(dia, horario) for dia, turmas in horarios.items() for horario in turmas}
+
+        removidas = [turmas_existentes.pop(chave) for chave in list(turmas_existentes) if chave not in desejadas]
+        conn.executemany("DELETE FROM turmas WHERE id = ?", [(turma_id,) for turma_id in removidas])
+        novas = sorted(desejadas - set(turmas_existentes))
+        for dia, horario in novas:
+            cursor = conn.execute("INSERT INTO turmas (dia, horario) VALUES (?, ?)", (dia, horario))
+            turmas_existentes[(dia, horario)] = cursor.lastrowid
+
+        matriculas_desejadas = set()
+        for dia, turmas in horarios.items():
+            for horario, alunos in turmas.items():
+                for nome in alunos:
+                    aluno_id = ids_por_nome.get(normalizar_nome(nome))
+                    if aluno_id is not None:
+                        matriculas_desejadas.add((turmas_existentes[(dia, horario)], aluno_id))
+        matriculas_existentes = {
+            (row['turma_id'], row['aluno_id']) for row in conn.execute("""
+                SELECT m.turma_id, m.aluno_id
+                FROM turmas t
+                JOIN matriculas m ON m.turma_id = t.id
+            """)
+        }
+        conn.executemany(
+            "DELETE FROM matriculas WHERE turma_id = ? AND aluno_id = ?",
+            sorted(matriculas_existentes - matriculas_desejadas)
+        )
+        conn.executemany(
+            "INSERT INTO matriculas (turma_id, aluno_id) VALUES (?, ?)",
+            sorted(matriculas_desejadas - matriculas_existentes)
+        )
+        conn.executemany(
+            "INSERT INTO meta (chave, valor) VALUES (?, ?) ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor",
+            list(zip(CHAVES_ASSINATURA_HORARIOS, assinatura))
+        )
+        _atualizar_sequencias_faltas(conn)
+        return {
+            'importado': True,
+            'turmas_novas': len(novas),
+            'turmas_removidas': len(removidas),
+            'matriculas_novas': len(matriculas_desejadas - matriculas_existentes),
+            'matriculas_removidas': len(matriculas_existentes - matriculas_desejadas),
+            **_sem_cadastro(horarios, ids_por_nome),
+        }
+
+    try:
+        resultado = executar_escrita(_sincronizar)
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao importar turmas da planilha de horários: {e}")
+        return None
+    logging.info(
+        f"Turmas importadas: {resultado['turmas_novas']} novas, {resultado['turmas_removidas']} removidas; "
+        f"matrículas: {resultado['matriculas_novas']} novas, {resultado['matriculas_removidas']} removidas."
+    )
+    if resultado['sem_cadastro']:
+        logging.warning(f"{len(resultado['sem_cadastro'])} nomes da planilha sem cadastro no banco.")
+    return resultado
+
+def carregar_turmas() -> Dict[str, List[str]]:
+    """Dias e horários cadastrados em `turmas`, na ordem da semana: {dia -> [horários]}."""
+    conn = get_db_connection()
+    if not conn:
+        return {}
+    try:
+        turmas: Dict[str, List[str]] = {}
+        for row in conn.execute("SELECT dia, horario FROM turmas"):
+            turmas.setdefault(row['dia'], []).append(row['horario'])
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao carregar turmas: {e}")
+        return {}
+    finally:
+        conn.close()
+    ordem = {dia: i for i, dia in enumerate(DIAS_SEMANA)}
+    return {
+        dia: sorted(horarios)
+        for dia, horarios in sorted(turmas.items(), key=lambda item: (ordem.get(item[0].upper(), len(ordem)), item[0]))
+    }
+
+def carregar_alunos_turma(dia: str, horario: str) -> pd.DataFrame:
+    """Roster de uma turma (colunas id, nome), em uma única consulta indexada."""
+    conn = get_db_connection()
+    if not conn:
+        return pd.DataFrame(columns=['id', 'nome'])
+    try:
+        return pd.read_sql_query("""
+            SELECT a.id, a.nome
+            FROM turmas t
+            JOIN matriculas m ON m.turma_id = t.id
+            JOIN alunos a ON a.id = m.aluno_id
+            WHERE t.dia = ? AND t.horario = ?
+            ORDER BY a.nome
+        """, conn, params=(dia, horario))
+    except Exception as e:
+        logging.error(f"Erro ao carregar alunos da turma {dia} {horario}: {e}")
+        return pd.DataFrame(columns=['id', 'nome'])
+    finally:
+        conn.close()
+
 def salvar_justificativa_db(
     aluno_id: int,
     data_falta: date,
@@ -126,52 +387,266 @@ def salvar_justificativa_db(
     ligacao_feita: bool,
     categorias_config: Optional[Dict[str, List[str]]] = None
 ) -> Tuple[bool, Optional[str]]:
-    """Salva ou atualiza uma justificativa de falta."""
-    conn = get_db_connection()
-    if not conn:
-        return False, "Erro de conexão com o banco de dados."
-        
-    try:
-        cursor = conn.cursor()
-        data_falta_str = data_falta.strftime('%Y-%m-%d')
-        
-        categoria = classificar_justificativa(justificativa, categorias_config) if categorias_config else None
-        
-        cursor.execute("""
+    """Salva ou atualiza uma justificativa de falta.
+
+    Com `categorias_config`, grava também a categoria e o hash das categorias que a
+    decidiram; sem ela, ambos ficam nulos até `reclassificar_justificativas` rodar.
+    """
+    data_falta_str = data_falta.strftime('%Y-%m-%d')
+    classificador = compilar_categorias(categorias_config) if categorias_config else None
+    categoria = classificador.classificar(justificativa) if classificador else None
+    categoria_hash = classificador.hash_de(categoria) if classificador else None
+
+    def _gravar(conn: sqlite3.Connection) -> None:
+        registo = conn.execute("""
         SELECT id FROM chamadas
         WHERE aluno_id = ? AND data = ? AND status = 'Faltou'
-        """, (aluno_id, data_falta_str))
-        
-        registo = cursor.fetchone()
+        """, (aluno_id, data_falta_str)).fetchone()
         
         if registo:
-            cursor.execute("""
+            conn.execute("""
             UPDATE chamadas
             SET justificativa = ?,
                 professor_responsavel = ?,
                 ligacao_feita = ?,
-                categoria_justificativa = ?
+                categoria_justificativa = ?,
+                categoria_hash = ?
             WHERE id = ?
-            """, (justificativa, professor, ligacao_feita, categoria, registo['id']))
+            """, (justificativa, professor, ligacao_feita, categoria, categoria_hash, registo['id']))
         else:
-            cursor.execute("""
+            conn.execute("""
             INSERT INTO chamadas (
                 aluno_id, data, status, justificativa,
-                professor_responsavel, ligacao_feita, categoria_justificativa
+                professor_responsavel, ligacao_feita, categoria_justificativa, categoria_hash
             )
-            VALUES (?, ?, 'Faltou', ?, ?, ?, ?)
-            """, (aluno_id, data_falta_str, justificativa, professor, ligacao_feita, categoria))
-        
-        conn.commit()
+            VALUES (?, ?, 'Faltou', ?, ?, ?, ?, ?)
+            """, (aluno_id, data_falta_str, justificativa, professor, ligacao_feita, categoria, categoria_hash))
+        _atualizar_sequencias_faltas(conn)
+
+    try:
+        executar_escrita(_gravar)
         logging.info(f"Justificativa para aluno_id {aluno_id} na data {data_falta_str} salva/atualizada.")
         return True, None
     except sqlite3.Error as e:
-        conn.rollback()
         logging.error(f"Erro ao salvar justificativa: {e}")
         return False, str(e)
+
+def _marcar_salvos(resultados: List[Dict[str, Any]], existentes: Iterable[int]) -> None:
+    """Marca os resultados de um lote gravado: 'atualizado' se o aluno já tinha o registro
+    no banco ou apareceu antes no mesmo lote, 'inserido' caso contrário."""
+    vistos = set(existentes)
+    for r in resultados:
+        r['salvo'] = True
+        r['acao'] = 'atualizado' if r['aluno_id'] in vistos else 'inserido'
+        vistos.add(r['aluno_id'])
+
+def salvar_justificativas_lote(
+    justificativas: List[Tuple[int, str, bool]],
+    data_falta: date,
+    professor: str,
+    categorias_config: Optional[Dict[str, List[str]]] = None
+) -> List[Dict[str, Any]]:
+    """Salva as justificativas de vários alunos em uma única transação.
+
+    Cada item é uma tupla (aluno_id, justificativa, ligacao_feita). As faltas já
+    registradas no dia são resolvidas em uma só consulta; as categorias e seus hashes
+    (quando `categorias_config` é informado) são calculados antes de abrir a transação.
+    Se um aluno aparece mais de uma vez, vale a última justificativa dele.
+    Retorna um resultado por item, na mesma ordem, com as chaves 'aluno_id',
+    'salvo', 'acao' ('atualizado'/'inserido') e 'erro'.
+    """
+    if not justificativas:
+        return []
+
+    data_falta_str = data_falta.strftime('%Y-%m-%d')
+    resultados = [
+        {'aluno_id': int(aluno_id), 'salvo': False, 'acao': None, 'erro': None}
+        for aluno_id, _, _ in justificativas
+    ]
+    # Uma linha por aluno, com a última justificativa dele no lote
+    ultimas = {int(aluno_id): (texto, ligacao_feita) for aluno_id, texto, ligacao_feita in justificativas}
+    classificador = compilar_categorias(categorias_config) if categorias_config else None
+    categorias = [classificador.classificar(texto) if classificador else None for texto, _ in ultimas.values()]
+    hashes = [classificador.hash_de(categoria) if classificador else None for categoria in categorias]
+    ids = sorted(ultimas)
+
+    def _gravar(conn: sqlite3.Connection) -> Dict[int, int]:
+        placeholders = ', '.join(['?'] * len(ids))
+        existentes = {
+            row['aluno_id']: row['id'] for row in conn.execute(f"""
+                SELECT aluno_id, MIN(id) AS id FROM chamadas
+                WHERE aluno_id IN ({placeholders}) AND status = 'Faltou' AND data = ?
+                GROUP BY aluno_id
+            """, (*ids, data_falta_str))
+        }
+        atualizacoes = []
+        insercoes = []
+        for (aluno_id, (texto, ligacao_feita)), categoria, categoria_hash in zip(ultimas.items(), categorias, hashes):
+            chamada_id = existentes.get(aluno_id)
+            if chamada_id is not None:
+                atualizacoes.append((texto, professor, ligacao_feita, categoria, categoria_hash, chamada_id))
+            else:
+                insercoes.append((aluno_id, data_falta_str, texto, professor, ligacao_feita, categoria, categoria_hash))
+        conn.executemany("""
+            UPDATE chamadas
+            SET justificativa = ?,
+                professor_responsavel = ?,
+                ligacao_feita = ?,
+                categoria_justificativa = ?,
+                categoria_hash = ?
+            WHERE id = ?
+        """, atualizacoes)
+        conn.executemany("""
+            INSERT INTO chamadas (
+                aluno_id, data, status, justificativa,
+                professor_responsavel, ligacao_feita, categoria_justificativa, categoria_hash
+            )
+            VALUES (?, ?, 'Faltou', ?, ?, ?, ?, ?)
+        """, insercoes)
+        _atualizar_sequencias_faltas(conn)
+        return existentes
+
+    try:
+        existentes = executar_escrita(_gravar)
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao salvar justificativas em lote ({data_falta_str}): {e}")
+        for r in resultados:
+            r['erro'] = str(e)
+        return resultados
+
+    _marcar_salvos(resultados, existentes)
+    logging.info(f"{len(resultados)} justificativas salvas/atualizadas para {data_falta_str}.")
+    return resultados
+
+def _consulta_justificativas_pendentes(classificador: ClassificadorJustificativas, colunas: str) -> Tuple[str, List[str]]:
+    """SQL e parâmetros das chamadas com justificativa cujo hash é nulo ou não é o de nenhum rótulo atual."""
+    validos = sorted(set(classificador.hashes.values()))
+    # Hash nulo, antes do primeiro válido, entre dois válidos consecutivos e depois do último
+    faixas = ["categoria_hash IS NULL", "categoria_hash < ?"]
+    faixas += ["categoria_hash > ? AND categoria_hash < ?"] * (len(validos) - 1)
+    faixas.append("categoria_hash > ?")
+    params = [validos[0]] + [h for par in zip(validos, validos[1:]) for h in par] + [validos[-1]]
+    query = "\nUNION ALL\n".join(
+        f"SELECT {colunas} FROM chamadas WHERE justificativa IS NOT NULL AND {faixa}"
+        for faixa in faixas
+    )
+    return query, params
+
+def reclassificar_justificativas(
+    categorias_config: Optional[Dict[str, List[str]]],
+    tamanho_lote: int = 5000
+) -> Optional[Dict[str, int]]:
+    """Grava a categoria das justificativas sem categoria ou cujo rótulo a configuração atual pode mudar.
+
+    O `categoria_hash` de cada chamada identifica as categorias que decidiram o seu
+    rótulo (ver scripts.categorias). Só são lidas as chamadas com justificativa cujo
+    hash é nulo ou não é o hash atual de nenhum rótulo: buscas no índice parcial
+    entre os hashes válidos, então nada a fazer custa microssegundos, e mudar uma
+    categoria só relê os rótulos dela, das categorias seguintes e de 'Outros'.
+    Elas são classificadas de uma vez com `classificar_series` e gravadas em lotes na
+    fila de escrita. Cada UPDATE confere se a justificativa ainda é a que foi
+    classificada, para não rotular um texto editado no meio do caminho.
+    Retorna {'verificadas': ..., 'alteradas': ...} ou None em caso de erro.
+    """
+    classificador = compilar_categorias(categorias_config)
+    query, params = _consulta_justificativas_pendentes(classificador, "id, justificativa, categoria_justificativa")
+
+    conn = get_db_connection_leitura()
+    if not conn:
+        return None
+    try:
+        pendentes = pd.read_sql_query(query, conn, params=params)
+    except Exception as e:
+        logging.error(f"Erro ao buscar justificativas para reclassificar: {e}")
+        return None
     finally:
-        if conn:
-            conn.close()
+        conn.close()
+
+    resultado = {'verificadas': len(pendentes), 'alteradas': 0}
+    if pendentes.empty:
+        return resultado
+
+    novas = classificar_series(pendentes['justificativa'], categorias_config)
+    novas = novas.astype(object)
+    hashes = novas.map({rotulo: classificador.hash_de(rotulo) for rotulo in novas.unique()})
+    resultado['alteradas'] = int((novas != pendentes['categoria_justificativa'].astype(object)).sum())
+    linhas = list(zip(
+        novas.tolist(),
+        hashes.tolist(),
+        pendentes['id'].astype(int).tolist(),
+        pendentes['justificativa'].tolist(),
+    ))
+
+    def _gravar_lote(lote: List[Tuple]) -> Callable[[sqlite3.Connection], None]:
+        def _gravar(conn: sqlite3.Connection) -> None:
+            conn.executemany("""
+                UPDATE chamadas
+                SET categoria_justificativa = ?, categoria_hash = ?
+                WHERE id = ? AND justificativa = ?
+            """, lote)
+        return _gravar
+
+    try:
+        for inicio in range(0, len(linhas), tamanho_lote):
+            executar_escrita(_gravar_lote(linhas[inicio:inicio + tamanho_lote]))
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao gravar justificativas reclassificadas: {e}")
+        return None
+    logging.info(
+        f"{resultado['verificadas']} justificativas reclassificadas "
+        f"({resultado['alteradas']} mudaram de categoria; configuração {classificador.hash})."
+    )
+    return resultado
+
+def existem_justificativas_pendentes(categorias_config: Optional[Dict[str, List[str]]]) -> bool:
+    """Indica se alguma justificativa ainda precisa de `reclassificar_justificativas` (buscas no índice parcial)."""
+    query, params = _consulta_justificativas_pendentes(compilar_categorias(categorias_config), "1")
+    conn = get_db_connection_leitura()
+    if not conn:
+        return False
+    try:
+        return conn.execute(f"SELECT EXISTS ({query})", params).fetchone()[0] == 1
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao verificar justificativas pendentes: {e}")
+        return False
+    finally:
+        conn.close()
+
+_reclassificacoes: Dict[Tuple[str, str], threading.Thread] = {}
+_reclassificacoes_lock = threading.Lock()
+
+def _reclassificar_e_liberar(chave: Tuple[str, str], categorias_config: Optional[Dict[str, List[str]]]) -> None:
+    """Corpo da thread: se a reclassificação falhar, tira a thread do registro para a próxima chamada tentar de novo."""
+    try:
+        resultado = reclassificar_justificativas(categorias_config)
+    except Exception:
+        logging.exception("Erro inesperado ao reclassificar justificativas em segundo plano.")
+        resultado = None
+    if resultado is None:
+        with _reclassificacoes_lock:
+            if _reclassificacoes.get(chave) is threading.current_thread():
+                del _reclassificacoes[chave]
+
+def reclassificar_em_segundo_plano(categorias_config: Optional[Dict[str, List[str]]]) -> threading.Thread:
+    """Dispara `reclassificar_justificativas` por banco e configuração, fora da requisição.
+
+    Chamada a cada reexecução do app: enquanto a thread de uma configuração roda, as
+    demais sessões recebem a mesma thread. Uma execução que falhou sai do registro e
+    é refeita na chamada seguinte; depois de uma que terminou bem, só se dispara
+    outra se `existem_justificativas_pendentes` (ex.: linhas gravadas por outro processo).
+    """
+    chave = (str(DB_PATH), compilar_categorias(categorias_config).hash)
+    with _reclassificacoes_lock:
+        thread = _reclassificacoes.get(chave)
+        if thread is not None and (thread.is_alive() or not existem_justificativas_pendentes(categorias_config)):
+            return thread
+        thread = threading.Thread(
+            target=_reclassificar_e_liberar, args=(chave, categorias_config),
+            name=f"reclassificar-{chave[1]}", daemon=True
+        )
+        _reclassificacoes[chave] = thread
+        thread.start()
+        return thread
 
 def salvar_chamada_db(
     aluno_id: int,
@@ -181,81 +656,261 @@ def salvar_chamada_db(
     professor: str
 ) -> bool:
     """Salva um registro de chamada no banco de dados, ou atualiza se já existir para o mesmo aluno, data e horário."""
-    conn = get_db_connection()
-    if not conn:
-        return False
-        
-    try:
-        cursor = conn.cursor()
-        data_str = data_chamada.strftime('%Y-%m-%d')
-        
-        cursor.execute("""
-            SELECT id FROM chamadas
-            WHERE aluno_id = ? AND data = ? AND horario = ?
-        """, (aluno_id, data_str, horario))
-        
-        existing_id = cursor.fetchone()
-        
-        if existing_id:
-            cursor.execute("""
-                UPDATE chamadas
-                SET status = ?, professor_responsavel = ?
-                WHERE id = ?
-            """, (status, professor, existing_id['id']))
-            logging.info(f"Chamada para aluno_id {aluno_id} em {data_str} ({horario}) atualizada para {status}.")
-        else:
-            cursor.execute("""
-            INSERT INTO chamadas (
-                aluno_id, data, horario, status, professor_responsavel
-            )
+    resultado = salvar_chamadas_lote([(aluno_id, status)], data_chamada, horario, professor)
+    return bool(resultado) and resultado[0]['salvo']
+
+def salvar_chamadas_lote(
+    registros: List[Tuple[int, str]],
+    data: date,
+    horario: str,
+    professor: str
+) -> List[Dict[str, Any]]:
+    """Salva a chamada de uma turma inteira em uma única transação.
+
+    Cada registro é um par (aluno_id, status). O upsert usa a chave única
+    (aluno_id, data, horario); se um aluno aparece mais de uma vez, vale o último
+    status dele. Retorna um resultado por registro, na mesma ordem, com as chaves
+    'aluno_id', 'status', 'salvo', 'acao' ('inserido'/'atualizado') e 'erro'.
+    """
+    if not registros:
+        return []
+
+    data_str = data.strftime('%Y-%m-%d')
+    resultados = [
+        {'aluno_id': int(aluno_id), 'status': status, 'salvo': False, 'acao': None, 'erro': None}
+        for aluno_id, status in registros
+    ]
+    # Uma linha por aluno, com o último status dele no lote
+    ultimos = {r['aluno_id']: r['status'] for r in resultados}
+    ids = sorted(ultimos)
+
+    def _gravar(conn: sqlite3.Connection) -> set:
+        placeholders = ', '.join(['?'] * len(ids))
+        existentes = {
+            row['aluno_id'] for row in conn.execute(f"""
+                SELECT aluno_id FROM chamadas
+                WHERE aluno_id IN ({placeholders}) AND data = ? AND horario = ?
+            """, (*ids, data_str, horario))
+        }
+        conn.executemany("""
+            INSERT INTO chamadas (aluno_id, data, horario, status, professor_responsavel)
             VALUES (?, ?, ?, ?, ?)
-            """, (aluno_id, data_str, horario, status, professor))
-            logging.info(f"Chamada para aluno_id {aluno_id} em {data_str} ({horario}) inserida como {status}.")
-        
-        conn.commit()
-        return True
+            ON CONFLICT (aluno_id, data, horario) DO UPDATE SET
+                status = excluded.status,
+                professor_responsavel = excluded.professor_responsavel
+        """, [(aluno_id, data_str, horario, status, professor) for aluno_id, status in ultimos.items()])
+        _atualizar_sequencias_faltas(conn)
+        return existentes
+
+    try:
+        existentes = executar_escrita(_gravar)
     except sqlite3.Error as e:
-        conn.rollback()
-        logging.error(f"Erro ao salvar chamada: {e}")
-        return False
-    finally:
-        if conn:
-            conn.close()
+        logging.error(f"Erro ao salvar chamadas em lote ({data_str} {horario}): {e}")
+        for r in resultados:
+            r['erro'] = str(e)
+        return resultados
 
-def carregar_todas_faltas() -> pd.DataFrame:
-    """Carrega todas as chamadas registradas com informações dos alunos."""
-    conn = get_db_connection()
+    _marcar_salvos(resultados, existentes)
+    logging.info(f"Chamada de {len(resultados)} alunos salva para {data_str} ({horario}).")
+    return resultados
+
+# Tipos compactos dos DataFrames de chamadas (aplicados uma única vez, no carregamento)
+COLUNAS_CATEGORICAS = ('status', 'professor_responsavel', 'categoria_justificativa')
+COLUNAS_INT32 = ('id', 'aluno_id')
+COLUNAS_DATA = ('data',)
+
+def tipar_chamadas(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte, no próprio DataFrame, as colunas de chamadas para tipos compactos.
+
+    status/professor_responsavel/categoria_justificativa viram `category`, ids viram
+    `int32`, `ligacao_feita` vira `bool` e `data` vira `datetime64`. Quem consome o
+    resultado não precisa chamar `pd.to_datetime` de novo.
+    """
+    for col in COLUNAS_DATA:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce')
+    for col in COLUNAS_INT32:
+        if col in df.columns:
+            df[col] = df[col].astype('int32')
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if 'ligacao_feita' in df.columns:
+        df['ligacao_feita'] = df['ligacao_feita'].fillna(0).astype(bool)
+    return df
+
+def ler_chamadas_tipadas(query: str, conn: sqlite3.Connection, params: Any = None) -> pd.DataFrame:
+    """`pd.read_sql_query` seguido de `tipar_chamadas`."""
+    return tipar_chamadas(pd.read_sql_query(query, conn, params=params))
+
+# Colunas disponíveis em carregar_todas_faltas (nome no DataFrame -> expressão SQL)
+COLUNAS_CHAMADAS: Dict[str, str] = {
+    'id': 'c.id',
+    'horario': 'c.horario',
+    'data': 'c.data',
+    'status': 'c.status',
+    'justificativa': 'c.justificativa',
+    'ligacao_feita': 'c.ligacao_feita',
+    'professor_responsavel': 'c.professor_responsavel',
+    'categoria_justificativa': 'c.categoria_justificativa',
+    'aluno_id': 'a.id',
+    'nome_aluno': 'a.nome',  # Nome do aluno vindo da tabela 'alunos'
+    'nome_responsavel': 'a.nome_responsavel',
+    'telefone_responsavel': 'a.telefone_responsavel',
+}
+
+def carregar_todas_faltas(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    status: Optional[Union[str, List[str]]] = None,
+    colunas: Optional[List[str]] = None,
+    aluno_ids: Optional[List[int]] = None,
+    turma: Optional[Tuple[str, str]] = None
+) -> pd.DataFrame:
+    """Carrega as chamadas registradas com informações dos alunos.
+
+    Todos os filtros são aplicados no SQL, para que cada tela busque apenas o recorte
+    que exibe:
+        data_inicio/data_fim: intervalo de datas (inclusivo).
+        status: um status ou lista de status (ex.: 'Faltou').
+        colunas: subconjunto de COLUNAS_CHAMADAS a retornar (padrão: todas).
+        aluno_ids: restringe a determinados alunos.
+        turma: restringe a uma turma (dia, horário), ex.: ('SEGUNDA', '08:00 às 09:00');
+            o dia é o dia da semana da data da chamada.
+    Sem argumentos, mantém o comportamento antigo (histórico completo).
+
+    Conexão: analítica (somente leitura).
+    """
+    colunas = list(colunas) if colunas else list(COLUNAS_CHAMADAS)
+    desconhecidas = [col for col in colunas if col not in COLUNAS_CHAMADAS]
+    if desconhecidas:
+        raise ValueError(f"Colunas desconhecidas em carregar_todas_faltas: {desconhecidas}")
+
+    filtros = []
+    params: List[Any] = []
+    if data_inicio is not None:
+        filtros.append("c.data >= ?")
+        params.append(data_inicio.strftime('%Y-%m-%d'))
+    if data_fim is not None:
+        filtros.append("c.data <= ?")
+        params.append(data_fim.strftime('%Y-%m-%d'))
+    if status is not None:
+        lista_status = [status] if isinstance(status, str) else list(status)
+        filtros.append(f"c.status IN ({', '.join(['?'] * len(lista_status))})")
+        params.extend(lista_status)
+    if aluno_ids is not None:
+        filtros.append(f"c.aluno_id IN ({', '.join(['?'] * len(aluno_ids))})")
+        params.extend(int(aluno_id) for aluno_id in aluno_ids)
+    if turma is not None:
+        dia, horario = turma
+        dia_semana = dia_da_semana(dia)
+        if dia_semana is None:
+            raise ValueError(f"Dia da turma desconhecido em carregar_todas_faltas: {dia!r}")
+        # strftime('%w') conta a partir do domingo; date.weekday(), da segunda. A expressão
+        # é a mesma do índice idx_chamadas_turma_data (database_setup), que a busca inteira
+        filtros.append("c.horario = ? AND CAST(strftime('%w', c.data) AS INTEGER) = ?")
+        params.extend([horario, (dia_semana + 1) % 7])
+
+    conn = get_db_connection_leitura()
     if not conn:
-        return pd.DataFrame()
+        return pd.DataFrame(columns=colunas)
         
     try:
-        query = """
+        select = ",\n            ".join(f"{COLUNAS_CHAMADAS[col]} AS {col}" for col in colunas)
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        query = f"""
         SELECT
-            c.id,
-            c.horario,
-            c.data,
-            c.status,
-            c.justificativa,
-            c.ligacao_feita,
-            c.professor_responsavel,
-            c.categoria_justificativa,
-            a.id as aluno_id,
-            a.nome as nome_aluno, -- Nome do aluno vindo da tabela 'alunos'
-            a.nome_responsavel,
-            a.telefone_responsavel
+            {select}
         FROM chamadas c
         JOIN alunos a ON c.aluno_id = a.id
+        {where}
         ORDER BY c.data DESC
         """
-        df = pd.read_sql_query(query, conn)
-        
-        if not df.empty:
-            df['data'] = pd.to_datetime(df['data'])
-            df['ligacao_feita'] = df['ligacao_feita'].apply(lambda x: bool(x) if x is not None else False)
-            
-        return df
+        return ler_chamadas_tipadas(query, conn, params)
     except Exception as e:
         logging.error(f"Erro ao carregar todas as faltas: {e}")
+        return pd.DataFrame(columns=colunas)
+    finally:
+        if conn:
+            conn.close()
+
+def carregar_resumo_agregado(
+    agrupar_por: str,
+    status: Union[str, List[str], Tuple[str, ...]] = STATUS_FALTA,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    limite: Optional[int] = None,
+    com_empates: bool = False
+) -> pd.DataFrame:
+    """Agrega a tabela resumo_diario (mantida por triggers) direto no SQL.
+
+    agrupar_por:
+        'dia'   -> colunas [data, total]
+        'mes'   -> colunas [mes ('AAAA-MM'), total]
+        'aluno' -> colunas [aluno_id, nome_aluno, total], em ordem decrescente de total
+
+    Com `com_empates` (só para 'aluno'), `limite` corta por posição e não por linha:
+    entram todos os alunos empatados com o último colocado, e a coluna `posicao`
+    (RANK, 1 = mais chamadas) vem antes das demais.
+
+    Conexão: analítica (somente leitura).
+    """
+    agrupamentos = {
+        'dia': ("r.data AS data", "r.data", "r.data"),
+        'mes': ("substr(r.data, 1, 7) AS mes", "substr(r.data, 1, 7)", "mes"),
+        'aluno': ("r.aluno_id AS aluno_id, a.nome AS nome_aluno", "r.aluno_id", "total DESC, nome_aluno"),
+    }
+    if agrupar_por not in agrupamentos:
+        raise ValueError(f"Agrupamento inválido: {agrupar_por}")
+    select, group_by, order_by = agrupamentos[agrupar_por]
+
+    lista_status = [status] if isinstance(status, str) else list(status)
+    filtros = [f"r.status IN ({', '.join(['?'] * len(lista_status))})"]
+    params: List[Any] = list(lista_status)
+    if data_inicio is not None:
+        filtros.append("r.data >= ?")
+        params.append(data_inicio.strftime('%Y-%m-%d'))
+    if data_fim is not None:
+        filtros.append("r.data <= ?")
+        params.append(data_fim.strftime('%Y-%m-%d'))
+
+    join = "JOIN alunos a ON a.id = r.aluno_id" if agrupar_por == 'aluno' else ""
+    if com_empates and agrupar_por == 'aluno':
+        # RANK é calculado sobre os totais já agrupados (um por aluno), não sobre as chamadas
+        query = f"""
+            SELECT * FROM (
+                SELECT RANK() OVER (ORDER BY SUM(r.total) DESC) AS posicao,
+                       {select}, SUM(r.total) AS total
+                FROM resumo_diario r
+                {join}
+                WHERE {' AND '.join(filtros)}
+                GROUP BY {group_by}
+            )
+        """
+        if limite is not None:
+            query += " WHERE posicao <= ?"
+            params.append(int(limite))
+        query += f" ORDER BY {order_by}"
+    else:
+        query = f"""
+            SELECT {select}, SUM(r.total) AS total
+            FROM resumo_diario r
+            {join}
+            WHERE {' AND '.join(filtros)}
+            GROUP BY {group_by}
+            ORDER BY {order_by}
+        """
+        if limite is not None:
+            query += " LIMIT ?"
+            params.append(int(limite))
+
+    conn = get_db_connection_leitura()
+    if not conn:
+        return pd.DataFrame()
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    except Exception as e:
+        logging.error(f"Erro ao carregar resumo diário ({agrupar_por}): {e}")
         return pd.DataFrame()
     finally:
         if conn:
@@ -266,22 +921,25 @@ def carregar_faltas_por_periodo(
     data_fim: date,
     categorias: Optional[List[str]] = None
 ) -> pd.DataFrame:
-    """Carrega faltas em um período específico."""
-    conn = get_db_connection()
+    """Carrega faltas em um período específico.
+
+    Conexão: analítica (somente leitura).
+    """
+    conn = get_db_connection_leitura()
     if not conn:
         return pd.DataFrame()
         
     try:
-        query = """
+        query = f"""
         SELECT
             c.*,
             a.nome as nome_aluno
         FROM chamadas c
         JOIN alunos a ON c.aluno_id = a.id
         WHERE c.data BETWEEN ? AND ?
-        AND c.status = 'Faltou'
+        AND c.status IN ({', '.join(['?'] * len(STATUS_FALTA))})
         """
-        params = [data_inicio.strftime('%Y-%m-%d'), data_fim.strftime('%Y-%m-%d')]
+        params = [data_inicio.strftime('%Y-%m-%d'), data_fim.strftime('%Y-%m-%d'), *STATUS_FALTA]
         
         if categorias:
             categorias_db_format = [cat.title() for cat in categorias]
@@ -291,13 +949,8 @@ def carregar_faltas_por_periodo(
             
         query += " ORDER BY c.data DESC"
         
-        df = pd.read_sql_query(query, conn, params=params)
-        
-        if not df.empty:
-            df['data'] = pd.to_datetime(df['data'])
-            df['ligacao_feita'] = df['ligacao_feita'].astype(bool)
-            
-        return df
+        # categoria_hash é controle interno da reclassificação; não vai para os relatórios
+        return ler_chamadas_tipadas(query, conn, params).drop(columns=['categoria_hash'], errors='ignore')
     except Exception as e:
         logging.error(f"Erro ao carregar faltas por período: {e}")
         return pd.DataFrame()
@@ -307,109 +960,86 @@ def carregar_faltas_por_periodo(
 
 def salvar_alunos_sponte_db(lista_nomes_sponte: List[str]) -> int:
     """Salva alunos do Sponte que não existem na base local."""
-    conn = get_db_connection()
-    if not conn:
-        return 0
-        
-    try:
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT nome FROM alunos")
-        alunos_existentes = {row['nome'].upper().strip() for row in cursor.fetchall()}
+    def _gravar(conn: sqlite3.Connection) -> int:
+        alunos_existentes = {normalizar_nome(row['nome']) for row in conn.execute("SELECT nome FROM alunos")}
         
-        alunos_novos = [
-            (nome,) for nome in lista_nomes_sponte 
-            if nome.upper().strip() not in alunos_existentes
-        ]
+        alunos_novos = []
+        for nome in lista_nomes_sponte:
+            chave = normalizar_nome(nome)
+            if chave and chave not in alunos_existentes:
+                alunos_existentes.add(chave)
+                alunos_novos.append((nome.strip(),))
         
         if alunos_novos:
-            cursor.executemany(
+            conn.executemany(
                 "INSERT OR IGNORE INTO alunos (nome) VALUES (?)",
                 alunos_novos
             )
-            conn.commit()
-            logging.info(f"{len(alunos_novos)} novos alunos do Sponte inseridos.")
-            
         return len(alunos_novos)
+
+    try:
+        inseridos = executar_escrita(_gravar)
+        if inseridos:
+            logging.info(f"{inseridos} novos alunos do Sponte inseridos.")
+        return inseridos
     except Exception as e:
-        conn.rollback()
         logging.error(f"Erro ao salvar alunos do Sponte: {e}")
         return 0
-    finally:
-        if conn:
-            conn.close()
 
 def atualizar_no_banco(aluno: str, novo_status: str) -> bool:
-    """Atualiza o status de um aluno no banco de dados."""
-    conn = get_db_connection()
-    if not conn:
+    """Atualiza o status de hoje de um aluno, localizado pelo índice de nomes."""
+    aluno_id = buscar_aluno_id(aluno)
+    if aluno_id is None:
+        logging.warning(f"Aluno '{aluno}' não encontrado para atualizar status.")
         return False
-        
-    try:
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+
+    def _gravar(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute("""
         UPDATE chamadas
         SET status = ?
-        WHERE aluno_id = (SELECT id FROM alunos WHERE nome = ?)
+        WHERE aluno_id = ?
         AND date(data) = date('now')
-        """, (novo_status, aluno))
-        
-        conn.commit()
+        """, (novo_status, aluno_id))
+        _atualizar_sequencias_faltas(conn)
+        return cursor.rowcount
+
+    try:
+        alterados = executar_escrita(_gravar)
         logging.info(f"Status de {aluno} atualizado para {novo_status} na data de hoje.")
-        return cursor.rowcount > 0
+        return alterados > 0
     except Exception as e:
-        conn.rollback()
         logging.error(f"Erro ao atualizar status: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def verificar_discrepancias() -> pd.DataFrame:
-    """Verifica discrepâncias entre a planilha de horários e o banco de dados."""
-    conn = get_db_connection()
+    """Verifica discrepâncias entre a planilha de horários e o banco de dados.
+
+    Retorna os nomes (em maiúsculas) presentes em alguma turma da planilha e sem
+    cadastro em `alunos` nem apelido aceito. A planilha é interpretada por scripts.planilha_horarios,
+    a mesma leitura usada na importação de turmas.
+
+    Conexão: analítica (somente leitura).
+    """
+    if not ARQUIVO_HORARIOS.exists():
+        logging.warning(f"Arquivo de horários '{ARQUIVO_HORARIOS.name}' não encontrado para verificar discrepâncias.")
+        return pd.DataFrame()
+
+    conn = get_db_connection_leitura()
     if not conn:
         return pd.DataFrame()
     
     try:
-        if not ARQUIVO_HORARIOS.exists():
-            logging.warning(f"Arquivo de horários '{ARQUIVO_HORARIOS.name}' não encontrado para verificar discrepâncias.")
-            return pd.DataFrame()
-
-        # Usar pd.read_excel para arquivos .xlsx
-        # Assumindo a planilha de horários tem uma aba como 'SEGUNDA' e alunos na coluna 1 (index 0)
-        df_planilha_bruta = pd.read_excel(ARQUIVO_HORARIOS, sheet_name="SEGUNDA", header=None) # header=None para ler tudo primeiro
-        
-        # Ajuste para pegar os nomes dos alunos, similar ao sponte_scraper
-        header_row_index = -1
-        for i, row in df_planilha_bruta.iterrows():
-            # Procura por uma linha que contenha horários para identificar o cabeçalho
-            if row.astype(str).str.contains('às', na=False).any():
-                header_row_index = i
-                break
-        
-        if header_row_index != -1:
-            # Pula as linhas acima do cabeçalho real e remove a primeira coluna (dia da semana)
-            df_planilha = df_planilha_bruta.iloc[header_row_index + 1:].drop(columns=[0], errors='ignore')
-            all_names_in_sheet = set()
-            for col in df_planilha.columns:
-                for name in df_planilha[col].dropna().unique():
-                    all_names_in_sheet.add(str(name).strip().upper())
-            
-            df_planilha_nomes = pd.DataFrame(list(all_names_in_sheet), columns=['nome'])
-        else:
+        info = ARQUIVO_HORARIOS.stat()
+        horarios = _carregar_horarios_cache(str(ARQUIVO_HORARIOS), info.st_mtime_ns, info.st_size)
+        if not horarios:
             logging.warning("Não foi possível identificar a estrutura da planilha de horários para discrepâncias.")
             return pd.DataFrame()
 
-        df_db = pd.read_sql_query(
-            "SELECT nome FROM alunos",
-            conn
-        )
-        df_db['nome'] = df_db['nome'].str.strip().str.upper()
+        df_planilha_nomes = pd.DataFrame(sorted(nomes_da_planilha(horarios)), columns=['nome'])
+        nomes_cadastrados = set(ler_indice_nomes(conn))
 
         discrepantes = df_planilha_nomes[
-            ~df_planilha_nomes['nome'].isin(df_db['nome'])
+            ~df_planilha_nomes['nome'].map(normalizar_nome).isin(nomes_cadastrados)
         ].copy()
         
         return discrepantes[['nome']]
@@ -420,26 +1050,233 @@ def verificar_discrepancias() -> pd.DataFrame:
         if conn:
             conn.close()
 
+def sugerir_correspondencias(limite: int = 3, pontuacao_minima: float = 0.4) -> pd.DataFrame:
+    """Para cada nome discrepante da planilha, os cadastros mais parecidos (busca por trigramas).
+
+    Colunas: nome (planilha), posicao (1 = melhor), aluno_id, nome_cadastro, pontuacao (0 a 1).
+    Nomes sem nenhum candidato acima de `pontuacao_minima` não aparecem.
+
+    Conexão: analítica (somente leitura), via verificar_discrepancias e o índice de trigramas.
+    """
+    colunas = ['nome', 'posicao', 'aluno_id', 'nome_cadastro', 'pontuacao']
+    discrepantes = verificar_discrepancias()
+    if discrepantes.empty:
+        return pd.DataFrame(columns=colunas)
+    try:
+        indice, nomes_por_id = _indice_trigramas_cache(str(DB_PATH), geracao_dados('alunos'))
+    except Exception as e:
+        logging.error(f"Erro ao montar índice de trigramas: {e}")
+        return pd.DataFrame(columns=colunas)
+
+    linhas = []
+    for nome in discrepantes['nome']:
+        candidatos = indice.buscar(normalizar_nome(nome), limite, pontuacao_minima)
+        for posicao, (aluno_id, _, pontuacao) in enumerate(candidatos, start=1):
+            linhas.append((nome, posicao, aluno_id, nomes_por_id[aluno_id], pontuacao))
+    return pd.DataFrame(linhas, columns=colunas)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _indice_trigramas_cache(db_path: str, geracao: int) -> Tuple[IndiceTrigramas, Dict[int, str]]:
+    """Índice de trigramas dos nomes cadastrados (e os nomes originais), uma vez por geração de `alunos`."""
+    conn = get_db_connection_leitura()
+    if not conn:
+        raise sqlite3.OperationalError("Erro de conexão com o banco de dados.")
+    try:
+        alunos = conn.execute("SELECT id, nome FROM alunos").fetchall()
+    finally:
+        conn.close()
+    indice = IndiceTrigramas((row['id'], normalizar_nome(row['nome'])) for row in alunos)
+    return indice, {row['id']: row['nome'] for row in alunos}
+
+def aplicar_correspondencias(correspondencias: List[Tuple[str, int]]) -> int:
+    """Grava, em uma única transação, os pares (nome da planilha, aluno_id) aceitos como apelidos.
+
+    Nomes que já coincidem com algum cadastro são ignorados. Retorna quantos apelidos
+    foram gravados; a próxima importação de horários já matricula esses alunos.
+    """
+    apelidos = {}
+    for nome, aluno_id in correspondencias:
+        chave = normalizar_nome(nome)
+        if chave:
+            apelidos[chave] = int(aluno_id)
+    if not apelidos:
+        return 0
+
+    def _gravar(conn: sqlite3.Connection) -> int:
+        cadastrados = {normalizar_nome(row['nome']) for row in conn.execute("SELECT nome FROM alunos")}
+        novos = [(apelido, aluno_id) for apelido, aluno_id in sorted(apelidos.items()) if apelido not in cadastrados]
+        conn.executemany("""
+            INSERT INTO apelidos_alunos (apelido, aluno_id) VALUES (?, ?)
+            ON CONFLICT (apelido) DO UPDATE SET aluno_id = excluded.aluno_id
+        """, novos)
+        return len(novos)
+
+    try:
+        gravados = executar_escrita(_gravar)
+        logging.info(f"{gravados} correspondências de nomes aplicadas.")
+        return gravados
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao aplicar correspondências de nomes: {e}")
+        return 0
+
+# --- Sequências de faltas e feriados ---
+def _atualizar_sequencias_faltas(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Atualiza `sequencias_faltas` dentro da transação de escrita em andamento.
+
+    Alunos marcados como pendentes pelos triggers (chamadas, matrículas ou feriados
+    alterados) são recalculados a partir do seu histórico; os demais não mudam, já
+    que aulas sem registro não contam (ver scripts.sequencias). `calculado_ate` é a
+    última aula registrada do próprio aluno, não a chamada mais recente de qualquer
+    turma. Sem nada pendente, custa uma consulta indexada.
+    """
+    pendentes = [row['aluno_id'] for row in conn.execute(
+        "SELECT aluno_id FROM sequencias_faltas WHERE pendente = 1"
+    )]
+    if not pendentes:
+        return {'recalculados': 0}
+
+    feriados = [date.fromisoformat(row['data']) for row in conn.execute("SELECT data FROM feriados")]
+    dias_por_aluno: Dict[int, set] = {}
+    # Dias de aula só dos alunos que serão recalculados
+    for row in conn.execute("""
+        SELECT m.aluno_id, t.dia
+        FROM matriculas m
+        JOIN turmas t ON t.id = m.turma_id
+        WHERE m.aluno_id IN (SELECT aluno_id FROM sequencias_faltas WHERE pendente = 1)
+    """):
+        dia = dia_da_semana(row['dia'])
+        if dia is not None:
+            dias_por_aluno.setdefault(row['aluno_id'], set()).add(dia)
+
+    registros: Dict[int, Dict[date, bool]] = {aluno_id: {} for aluno_id in pendentes}
+    falta = ', '.join(['?'] * len(STATUS_FALTA))
+    presenca = ', '.join(['?'] * len(STATUS_PRESENCA))
+    for row in conn.execute(f"""
+        SELECT c.aluno_id, c.data,
+               MAX(c.status IN ({falta})) AS faltou,
+               MAX(c.status IN ({presenca})) AS compareceu
+        FROM chamadas c
+        WHERE c.aluno_id IN (SELECT aluno_id FROM sequencias_faltas WHERE pendente = 1)
+        GROUP BY c.aluno_id, c.data
+    """, (*STATUS_FALTA, *STATUS_PRESENCA)):
+        dia = date.fromisoformat(row['data'][:10])
+        faltou = bool(row['faltou']) and not row['compareceu']
+        # Duas chamadas no mesmo dia (horários diferentes): basta uma presença para não ser falta
+        registros[row['aluno_id']][dia] = registros[row['aluno_id']].get(dia, True) and faltou
+
+    linhas = []
+    for aluno_id, dias in registros.items():
+        sequencia = calcular_sequencia(dias_por_aluno.get(aluno_id, ()), dias, feriados)
+        linhas.append((
+            sequencia.atual, sequencia.maior,
+            sequencia.inicio_atual.isoformat() if sequencia.inicio_atual else None,
+            sequencia.inicio_maior.isoformat() if sequencia.inicio_maior else None,
+            max(dias).isoformat() if dias else None,
+            aluno_id
+        ))
+    conn.executemany("""
+        UPDATE sequencias_faltas
+        SET atual = ?, maior = ?, inicio_atual = ?, inicio_maior = ?, calculado_ate = ?, pendente = 0
+        WHERE aluno_id = ?
+    """, linhas)
+    return {'recalculados': len(pendentes)}
+
+def atualizar_sequencias_faltas() -> Optional[Dict[str, int]]:
+    """Recalcula as sequências pendentes (ver `_atualizar_sequencias_faltas`) na fila de escrita.
+
+    As gravações de chamadas e justificativas já fazem isso na própria transação; esta
+    função serve para escritas feitas por fora (importação de histórico, SQL manual).
+    Retorna a contagem ('recalculados') ou None em caso de erro.
+    """
+    try:
+        return executar_escrita(_atualizar_sequencias_faltas)
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao atualizar sequências de faltas: {e}")
+        return None
+
+def carregar_sequencias_faltas(minimo: int = 2) -> pd.DataFrame:
+    """Alunos com pelo menos `minimo` aulas registradas seguidas perdidas, já calculados.
+
+    Colunas: aluno_id, nome_aluno, atual, maior, inicio_atual, inicio_maior, calculado_ate;
+    em ordem decrescente de sequência atual.
+
+    Conexão: analítica (somente leitura).
+    """
+    colunas = ['aluno_id', 'nome_aluno', 'atual', 'maior', 'inicio_atual', 'inicio_maior', 'calculado_ate']
+    conn = get_db_connection_leitura()
+    if not conn:
+        return pd.DataFrame(columns=colunas)
+    try:
+        return pd.read_sql_query("""
+            SELECT s.aluno_id, a.nome AS nome_aluno, s.atual, s.maior,
+                   s.inicio_atual, s.inicio_maior, s.calculado_ate
+            FROM sequencias_faltas s
+            JOIN alunos a ON a.id = s.aluno_id
+            WHERE s.atual >= ?
+            ORDER BY s.atual DESC, s.maior DESC, a.nome
+        """, conn, params=(int(minimo),))
+    except Exception as e:
+        logging.error(f"Erro ao carregar sequências de faltas: {e}")
+        return pd.DataFrame(columns=colunas)
+    finally:
+        conn.close()
+
+def carregar_feriados() -> pd.DataFrame:
+    """Feriados e recessos cadastrados (colunas data, descricao), em ordem de data."""
+    conn = get_db_connection()
+    if not conn:
+        return pd.DataFrame(columns=['data', 'descricao'])
+    try:
+        return pd.read_sql_query("SELECT data, descricao FROM feriados ORDER BY data", conn)
+    except Exception as e:
+        logging.error(f"Erro ao carregar feriados: {e}")
+        return pd.DataFrame(columns=['data', 'descricao'])
+    finally:
+        conn.close()
+
+def salvar_feriado(data_feriado: date, descricao: str = "") -> bool:
+    """Cadastra (ou renomeia) um feriado; as sequências de todos os alunos são recalculadas."""
+    def _gravar(conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            INSERT INTO feriados (data, descricao) VALUES (?, ?)
+            ON CONFLICT (data) DO UPDATE SET descricao = excluded.descricao
+        """, (data_feriado.strftime('%Y-%m-%d'), descricao.strip() or None))
+        _atualizar_sequencias_faltas(conn)
+
+    try:
+        executar_escrita(_gravar)
+        return True
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao salvar feriado: {e}")
+        return False
+
+def remover_feriado(data_feriado: date) -> bool:
+    """Remove um feriado; retorna False se não existia ou em caso de erro."""
+    def _gravar(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute("DELETE FROM feriados WHERE data = ?", (data_feriado.strftime('%Y-%m-%d'),))
+        if cursor.rowcount:
+            _atualizar_sequencias_faltas(conn)
+        return cursor.rowcount
+
+    try:
+        return executar_escrita(_gravar) > 0
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao remover feriado: {e}")
+        return False
+
 # --- Funções de Lembretes e Comportamento ---
 def salvar_lembrete(aluno_id: int, lembrete_txt: str, professor: str) -> bool:
     """Salva um novo lembrete no banco de dados."""
-    conn = get_db_connection()
-    if not conn: return False
     try:
-        cursor = conn.cursor()
-        cursor.execute(
+        executar_escrita(lambda conn: conn.execute(
             "INSERT INTO lembretes (aluno_id, data_criacao, lembrete, professor_responsavel) VALUES (?, date('now'), ?, ?)",
             (aluno_id, lembrete_txt, professor)
-        )
-        conn.commit()
+        ))
         logging.info(f"Lembrete salvo para aluno_id {aluno_id}.")
         return True
     except sqlite3.Error as e:
-        conn.rollback()
         logging.error(f"Erro ao salvar lembrete: {e}")
         return False
-    finally:
-        if conn: conn.close()
 
 def carregar_lembretes_aluno(aluno_id: int) -> pd.DataFrame:
     """Carrega o histórico de lembretes de um aluno."""
@@ -464,23 +1301,16 @@ def carregar_lembretes_aluno(aluno_id: int) -> pd.DataFrame:
 
 def salvar_comportamento(aluno_id: int, tipo: str, observacao: str, data: str, professor: str) -> bool:
     """Salva um registro de comportamento."""
-    conn = get_db_connection()
-    if not conn: return False
     try:
-        cursor = conn.cursor()
-        cursor.execute(
+        executar_escrita(lambda conn: conn.execute(
             "INSERT INTO comportamentos (aluno_id, data, observacao, tipo, professor_responsavel) VALUES (?, ?, ?, ?, ?)",
             (aluno_id, data, observacao, tipo, professor)
-        )
-        conn.commit()
+        ))
         logging.info(f"Comportamento salvo para aluno_id {aluno_id}.")
         return True
     except sqlite3.Error as e:
-        conn.rollback()
         logging.error(f"Erro ao salvar comportamento: {e}")
         return False
-    finally:
-        if conn: conn.close()
 
 def carregar_comportamento_aluno(aluno_id: int) -> pd.DataFrame:
     """Carrega o histórico de comportamento de um aluno."""
@@ -501,7 +1331,6 @@ def carregar_comportamento_aluno(aluno_id: int) -> pd.DataFrame:
         logging.error(f"Erro ao carregar comportamento para aluno_id {aluno_id}: {e}")
         return pd.DataFrame()
     finally:
-<<<<<<< HEAD
         if conn: conn.close()
 
 # A FUNÇÃO ABAIXO FOI MOVIDA PARA O NÍVEL CORRETO DE INDENTAÇÃO
@@ -512,13 +1341,13 @@ def get_student_history(aluno_id: int) -> pd.DataFrame:
         return pd.DataFrame()
         
     try:
-        query = """
+        query = f"""
         SELECT data, status, justificativa, professor_responsavel as justificado_por
         FROM chamadas
-        WHERE aluno_id = ? AND status = 'Faltou'
+        WHERE aluno_id = ? AND status IN ({', '.join(['?'] * len(STATUS_FALTA))})
         ORDER BY data DESC
         """
-        df = pd.read_sql_query(query, conn, params=(aluno_id,))
+        df = pd.read_sql_query(query, conn, params=(aluno_id, *STATUS_FALTA))
         return df
     except Exception as e:
         logging.error(f"Erro ao carregar histórico do aluno {aluno_id}: {e}")
@@ -526,6 +1355,3 @@ def get_student_history(aluno_id: int) -> pd.DataFrame:
     finally:
         if conn:
             conn.close()
-=======
-        if conn: conn.close()
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
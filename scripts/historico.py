@@ -0,0 +1,73 @@
+# Em scripts/historico.py
+"""Leitura das planilhas de histórico de chamadas, executada nos processos do pool.
+
+Fica fora de migrate_to_db para que cada processo do pool (scripts.paralelo) só
+importe pandas e openpyxl, e não o Streamlit/rich que o script de migração carrega.
+"""
+from pathlib import Path
+from typing import Optional, Tuple
+
+import openpyxl
+import pandas as pd
+
+# Planilhas de histórico são reconhecidas pelo conteúdo: os exports em data/ têm nomes
+# hexadecimais sem extensão. Um .xlsx é um pacote zip, e o histórico tem o cabeçalho
+# (NOME, DATA, ...) na 6ª linha da primeira aba
+ASSINATURA_XLSX = b"PK\x03\x04"
+LINHA_CABECALHO_HISTORICO = 6
+COLUNAS_HISTORICO = {'NOME', 'DATA'}
+
+
+def eh_planilha_historico(caminho: Path) -> bool:
+    """Se o arquivo é uma planilha de histórico de chamadas, qualquer que seja o nome.
+
+    Confere a assinatura de .xlsx e lê só a linha de cabeçalho da primeira aba (openpyxl
+    em modo somente leitura), sem carregar a planilha inteira.
+    """
+    try:
+        with open(caminho, "rb") as arquivo:
+            if arquivo.read(len(ASSINATURA_XLSX)) != ASSINATURA_XLSX:
+                return False
+            arquivo.seek(0)
+            livro = openpyxl.load_workbook(arquivo, read_only=True)
+            try:
+                linha = next(livro.worksheets[0].iter_rows(
+                    min_row=LINHA_CABECALHO_HISTORICO, max_row=LINHA_CABECALHO_HISTORICO, values_only=True
+                ), ())
+            finally:
+                livro.close()
+    except Exception:
+        return False
+    return COLUNAS_HISTORICO <= {str(celula).strip().upper() for celula in linha if celula is not None}
+
+
+def ler_historico_chamadas(caminho: Path) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """Lê e normaliza uma planilha de histórico; executado nos processos do pool.
+
+    Retorna (DataFrame com nome_aluno/data/justificativa/professor_responsavel, None)
+    ou (None, mensagem de erro), para que uma planilha ruim não interrompa as demais.
+    """
+    try:
+        df_chamada = pd.read_excel(caminho, header=5)
+    except Exception as e:
+        return None, f"Erro ao ler '{Path(caminho).name}': {e}"
+    df_chamada.columns = [str(c).strip() for c in df_chamada.columns]
+
+    df_chamada.rename(columns={
+        'NOME': 'nome_aluno', 'TELEFONE': 'telefone_responsavel',
+        'PROFESSOR': 'professor_responsavel', 'DATA': 'data', 'RELATO': 'justificativa'
+    }, inplace=True)
+
+    required_cols = ['nome_aluno', 'data']
+    if not all(col in df_chamada.columns for col in required_cols):
+        missing = [col for col in required_cols if col not in df_chamada.columns]
+        return None, f"Colunas essenciais ausentes em '{Path(caminho).name}': {missing}."
+
+    df_chamada['nome_aluno'] = df_chamada['nome_aluno'].astype(str).str.strip().str.upper()
+    df_chamada['data'] = pd.to_datetime(df_chamada['data'], errors='coerce').dt.strftime('%Y-%m-%d')
+    df_chamada.dropna(subset=['data', 'nome_aluno'], inplace=True)
+    for coluna in ('justificativa', 'professor_responsavel'):
+        if coluna not in df_chamada.columns:
+            df_chamada[coluna] = None
+    return df_chamada[['nome_aluno', 'data', 'justificativa', 'professor_responsavel']], None
+
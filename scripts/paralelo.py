@@ -0,0 +1,84 @@
+# Em scripts/paralelo.py
+"""Pool de processos compartilhado para interpretar várias planilhas em paralelo.
+
+A leitura de Excel é CPU-bound (openpyxl + pandas) e segura o GIL, então threads não
+ajudam. O pool é criado uma única vez, sob demanda, com número limitado de processos
+e contexto 'forkserver' (seguro mesmo com as threads da fila de escrita e dos vigias
+no processo principal). Os resultados sempre voltam na ordem dos itens de entrada.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+Item = TypeVar("Item")
+Resultado = TypeVar("Resultado")
+
+# Teto de processos do pool, independente de quantos núcleos a máquina tiver
+MAX_PROCESSOS = 4
+
+# Módulos carregados uma vez no servidor de fork, para que cada processo já nasça com eles
+MODULOS_PRE_CARREGADOS = ["pandas", "scripts.historico"]
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_processos = 0
+_executor_lock = threading.Lock()
+
+
+def processos_para(quantidade_itens: int, max_processos: Optional[int] = None) -> int:
+    """Quantos processos usar para `quantidade_itens` (1 significa executar em série).
+
+    Sem `max_processos`, o limite é o menor entre MAX_PROCESSOS e os núcleos disponíveis.
+    """
+    limite = max_processos if max_processos is not None else min(MAX_PROCESSOS, os.cpu_count() or 1)
+    return max(1, min(quantidade_itens, limite))
+
+
+def _contexto() -> multiprocessing.context.BaseContext:
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context("forkserver")
+        contexto.set_forkserver_preload(MODULOS_PRE_CARREGADOS)
+        return contexto
+    return multiprocessing.get_context("spawn")
+
+
+def _obter_executor(processos: int) -> ProcessPoolExecutor:
+    """Executor compartilhado; recriado só se for preciso mais processos que o atual."""
+    global _executor, _executor_processos
+    with _executor_lock:
+        if _executor is None or _executor_processos < processos:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=processos, mp_context=_contexto())
+            _executor_processos = processos
+            logging.info(f"Pool de processos iniciado com {processos} processos.")
+        return _executor
+
+
+def mapear_em_processos(
+    funcao: Callable[[Item], Resultado],
+    itens: Iterable[Item],
+    max_processos: Optional[int] = None
+) -> List[Resultado]:
+    """Aplica `funcao` a cada item no pool e retorna os resultados na ordem dos itens.
+
+    `funcao` e os itens precisam ser serializáveis (funções de nível de módulo). Com um
+    só processo (um item, uma CPU ou max_processos=1) tudo roda em série, sem pool.
+    Uma exceção em qualquer item é propagada.
+    """
+    itens = list(itens)
+    processos = processos_para(len(itens), max_processos)
+    if processos == 1:
+        return [funcao(item) for item in itens]
+    return list(_obter_executor(processos).map(funcao, itens))
+
+
+def encerrar_pool() -> None:
+    """Encerra o pool compartilhado (se existir); a próxima chamada cria outro."""
+    global _executor, _executor_processos
+    with _executor_lock:
+        executor, _executor, _executor_processos = _executor, None, 0
+    if executor is not None:
+        executor.shutdown(wait=True)
@@ -0,0 +1,251 @@
+# Em scripts/planilha_horarios.py
+"""Interpretação da planilha de horários das turmas.
+
+Cada aba (SEGUNDA, TERÇA, ...) é lida sem cabeçalho: a primeira linha que contém um
+horário ('08:00 às 09:00') é o cabeçalho, e abaixo de cada horário vêm os alunos da
+turma. Usado tanto pela importação de turmas (tela de chamada) quanto pela
+verificação de discrepâncias, para que as duas enxerguem a mesma planilha.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Horários por dia: {dia (nome da aba) -> {horário -> [alunos]}}
+Horarios = Dict[str, Dict[str, List[str]]]
+
+DIAS_SEMANA = ['SEGUNDA', 'TERÇA', 'QUARTA', 'QUINTA', 'SEXTA', 'SÁBADO']
+
+# Marcador de horário no cabeçalho e de vagas que não são alunos
+MARCADOR_HORARIO = 'às'
+MARCADOR_MANUTENCAO = 'PC EM MANUTENÇÃO'
+
+# Versão do formato do cache em disco; incremente ao mudar a interpretação da planilha
+VERSAO_CACHE = 1
+SUFIXO_CACHE = ".horarios.json"
+
+
+def _contem(valores: np.ndarray, marcador: str) -> np.ndarray:
+    """Máscara booleana (mesmo formato de `valores`) das células de texto que contêm `marcador`.
+
+    Todas as células passam por uma única operação de string do pandas sobre o array
+    achatado, em vez de uma chamada por linha ou por coluna.
+    """
+    celulas = pd.Series(valores.ravel(), dtype=object)
+    mascara = celulas.str.lower().str.contains(marcador.lower(), regex=False, na=False)
+    return mascara.to_numpy(dtype=bool).reshape(valores.shape)
+
+
+def localizar_cabecalho(df_dia_raw: pd.DataFrame) -> int:
+    """Posição da primeira linha com algum horário ('às'), ou -1 se não houver."""
+    if df_dia_raw.empty:
+        return -1
+    linhas_com_horario = _contem(df_dia_raw.to_numpy(dtype=object), MARCADOR_HORARIO).any(axis=1)
+    return int(linhas_com_horario.argmax()) if linhas_com_horario.any() else -1
+
+
+def interpretar_aba(df_dia_raw: pd.DataFrame) -> Dict[str, List[str]]:
+    """Converte uma aba bruta (header=None) em {horário -> [alunos]}.
+
+    Nomes são aparados, vazios e "PC EM MANUTENÇÃO" são descartados e, se um horário
+    se repete no cabeçalho, vale a primeira coluna.
+    """
+    if df_dia_raw.empty:
+        return {}
+    valores = df_dia_raw.to_numpy(dtype=object)
+    linhas_com_horario = _contem(valores, MARCADOR_HORARIO).any(axis=1)
+    if not linhas_com_horario.any():
+        return {}
+    posicao_cabecalho = int(linhas_com_horario.argmax())
+
+    cabecalho = pd.Series(valores[posicao_cabecalho], dtype=object)
+    eh_horario = _contem(valores[posicao_cabecalho], MARCADOR_HORARIO) & ~cabecalho.astype(str).duplicated().to_numpy()
+    horarios = [str(h) for h in cabecalho[eh_horario]]
+    if not horarios:
+        return {}
+
+    # Coluna a coluna (ordem da planilha), achatado: uma linha por célula de aluno
+    corpo = valores[posicao_cabecalho + 1:, eh_horario].T
+    rotulos = np.repeat(np.arange(len(horarios)), corpo.shape[1])
+    alunos = pd.Series(corpo.ravel(), dtype=object)
+    preenchidas = alunos.notna().to_numpy()
+    rotulos = rotulos[preenchidas]
+    nomes = alunos[preenchidas].astype(str).str.strip()
+    validos = ((nomes != '') & ~nomes.str.upper().str.contains(MARCADOR_MANUTENCAO, regex=False)).to_numpy()
+
+    turmas: Dict[str, List[str]] = {horario: [] for horario in horarios}
+    for rotulo, nome in zip(rotulos[validos].tolist(), nomes[validos].tolist()):
+        turmas[horarios[rotulo]].append(nome)
+    return turmas
+
+
+def interpretar_planilha(abas: Dict[str, pd.DataFrame]) -> Horarios:
+    """Interpreta todas as abas de dias (ignora abas auxiliares 'Planilha...' e abas sem horários)."""
+    horarios: Horarios = {}
+    for nome_aba, df_dia_raw in abas.items():
+        if "Planilha" in str(nome_aba):
+            continue
+        turmas = interpretar_aba(df_dia_raw)
+        if turmas:
+            horarios[str(nome_aba)] = turmas
+        else:
+            logging.warning(f"Aba '{nome_aba}' sem linha de horários; ignorada.")
+    return horarios
+
+
+def ler_planilha_horarios(caminho: Union[str, Path]) -> Horarios:
+    """Lê e interpreta todas as abas de dias da planilha, na ordem das abas.
+
+    O arquivo é aberto e descompactado uma única vez para todas as abas: distribuir as
+    abas em processos faria cada um reabrir e reinterpretar a pasta de trabalho inteira.
+    """
+    with pd.ExcelFile(caminho) as xls:
+        abas = [aba for aba in xls.sheet_names if "Planilha" not in str(aba)]
+        return interpretar_planilha(pd.read_excel(xls, sheet_name=abas, header=None))
+
+
+def nomes_da_planilha(horarios: Horarios) -> Set[str]:
+    """Todos os nomes de alunos da planilha, aparados e em maiúsculas."""
+    return {
+        aluno.strip().upper()
+        for turmas in horarios.values()
+        for alunos in turmas.values()
+        for aluno in alunos
+    }
+
+
+# --- Cache em disco da planilha interpretada ---
+
+def caminho_cache(caminho: Union[str, Path]) -> Path:
+    """Arquivo de cache ao lado da planilha (ex.: 'horarios.xlsx.horarios.json')."""
+    caminho = Path(caminho)
+    return caminho.with_name(caminho.name + SUFIXO_CACHE)
+
+
+def hash_arquivo(caminho: Union[str, Path]) -> str:
+    """SHA-256 do conteúdo do arquivo."""
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def ler_cache_horarios(caminho: Union[str, Path]) -> Optional[Tuple[str, Horarios]]:
+    """(hash da planilha de origem, horários) gravados no cache, ou None se ausente/inválido."""
+    try:
+        with open(caminho_cache(caminho), encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        if dados.get("versao") != VERSAO_CACHE:
+            return None
+        return dados["sha256"], dados["horarios"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, AttributeError) as e:
+        logging.warning(f"Cache de horários ilegível ({caminho_cache(caminho).name}): {e}")
+        return None
+
+
+def gravar_cache_horarios(caminho: Union[str, Path], sha256: str, horarios: Horarios) -> None:
+    """Grava o cache de forma atômica (arquivo temporário + rename); falhas só geram aviso."""
+    destino = caminho_cache(caminho)
+    temporario = destino.with_name(f"{destino.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump({"versao": VERSAO_CACHE, "sha256": sha256, "horarios": horarios}, arquivo, ensure_ascii=False)
+        os.replace(temporario, destino)
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar o cache de horários ({destino.name}): {e}")
+        temporario.unlink(missing_ok=True)
+
+
+def reconstruir_cache_horarios(caminho: Union[str, Path], sha256: Optional[str] = None) -> Horarios:
+    """Interpreta a planilha e regrava o cache em disco."""
+    sha256 = sha256 or hash_arquivo(caminho)
+    horarios = ler_planilha_horarios(caminho)
+    gravar_cache_horarios(caminho, sha256, horarios)
+    logging.info(f"Cache de horários reconstruído para '{Path(caminho).name}'.")
+    return horarios
+
+
+def carregar_horarios_com_cache(caminho: Union[str, Path]) -> Horarios:
+    """Horários da planilha, lidos do cache em disco quando o conteúdo não mudou.
+
+    O cache é validado pelo hash do conteúdo (não pelo mtime), então cópias ou
+    `touch` da mesma planilha continuam aproveitando-o. Se o conteúdo mudou e o
+    cache ainda não foi refeito em segundo plano (ver `vigiar_planilha`), a
+    planilha é interpretada aqui mesmo.
+    """
+    sha256 = hash_arquivo(caminho)
+    cache = ler_cache_horarios(caminho)
+    if cache is not None and cache[0] == sha256:
+        return cache[1]
+    return reconstruir_cache_horarios(caminho, sha256)
+
+
+class VigiaPlanilha:
+    """Thread que confere periodicamente a planilha e reconstrói o cache quando ela muda."""
+
+    def __init__(self, caminho: Union[str, Path], intervalo: float = 30.0):
+        self.caminho = Path(caminho)
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread = threading.Thread(
+            target=self._executar_loop, name=f"vigia-{self.caminho.name}", daemon=True
+        )
+
+    def iniciar(self) -> "VigiaPlanilha":
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        self._parar.set()
+        self._thread.join(timeout=5)
+
+    def _assinatura(self) -> Optional[Tuple[int, int]]:
+        try:
+            info = self.caminho.stat()
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def _executar_loop(self) -> None:
+        # O estado atual fica a cargo de quem iniciou o vigia; aqui só as mudanças seguintes
+        ultima = self._assinatura()
+        while not self._parar.wait(self.intervalo):
+            atual = self._assinatura()
+            if atual is not None and atual != ultima:
+                try:
+                    carregar_horarios_com_cache(self.caminho)
+                    ultima = atual
+                except Exception as e:
+                    logging.error(f"Erro ao reconstruir cache de horários em segundo plano: {e}")
+
+
+_vigias: Dict[str, VigiaPlanilha] = {}
+_vigias_lock = threading.Lock()
+
+
+def vigiar_planilha(caminho: Union[str, Path], intervalo: float = 30.0) -> VigiaPlanilha:
+    """Garante um único vigia por planilha (idempotente) e o retorna."""
+    chave = str(Path(caminho).resolve())
+    with _vigias_lock:
+        vigia = _vigias.get(chave)
+        if vigia is None or not vigia._thread.is_alive():
+            vigia = _vigias[chave] = VigiaPlanilha(chave, intervalo).iniciar()
+        return vigia
+
+
+def parar_vigias() -> None:
+    """Encerra todos os vigias de planilha (usado nos testes e no encerramento)."""
+    with _vigias_lock:
+        vigias = list(_vigias.values())
+        _vigias.clear()
+    for vigia in vigias:
+        vigia.parar()
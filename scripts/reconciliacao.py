@@ -0,0 +1,102 @@
+# Em scripts/reconciliacao.py
+"""Busca aproximada de nomes por trigramas, para conciliar a planilha com o cadastro.
+
+Cada nome vira o conjunto de trigramas das suas palavras (como no pg_trgm) e um índice
+invertido trigrama -> ids permite pontuar só os cadastros que compartilham algum
+trigrama com a consulta, em vez de comparar cada nome da planilha com todo o cadastro.
+A pontuação é a similaridade de Jaccard entre os conjuntos (0 a 1).
+
+Trigramas presentes em boa parte do cadastro (as margens de partículas como DA, DE,
+DOS) são "trigramas de parada": não geram candidatos, ou todo nome seria candidato de
+toda consulta. Eles ainda contam na pontuação, e só são usados para gerar candidatos
+quando a consulta tem tantos deles que um candidato poderia atingir a pontuação mínima
+sem compartilhar nenhum trigrama raro; o resultado é o mesmo de uma busca completa.
+
+Os nomes devem chegar já normalizados (ver db_utils.normalizar_nome).
+"""
+import math
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# Um trigrama é de parada quando aparece em mais que esta fração dos nomes indexados
+# (e em mais que MINIMO_POSTAGEM_PARADA nomes, para cadastros pequenos)
+FRACAO_MAXIMA_POSTAGEM = 0.05
+MINIMO_POSTAGEM_PARADA = 50
+
+
+def trigramas(nome: str) -> FrozenSet[str]:
+    """Trigramas de cada palavra, com duas margens à esquerda e uma à direita."""
+    return frozenset(
+        palavra_marcada[i:i + 3]
+        for palavra in nome.split()
+        for palavra_marcada in [f"  {palavra} "]
+        for i in range(len(palavra_marcada) - 2)
+    )
+
+
+class IndiceTrigramas:
+    """Índice invertido de trigramas sobre pares (id, nome normalizado)."""
+
+    def __init__(self, itens: Iterable[Tuple[int, str]]):
+        self._nomes: Dict[int, str] = {}
+        self._trigramas: Dict[int, FrozenSet[str]] = {}
+        self._postagens: Dict[str, List[int]] = defaultdict(list)
+        for item_id, nome in itens:
+            conjunto = trigramas(nome)
+            if not conjunto:
+                continue
+            self._nomes[item_id] = nome
+            self._trigramas[item_id] = conjunto
+            for trigrama in conjunto:
+                self._postagens[trigrama].append(item_id)
+        limite_postagem = max(MINIMO_POSTAGEM_PARADA, FRACAO_MAXIMA_POSTAGEM * len(self._nomes))
+        self.parada: FrozenSet[str] = frozenset(
+            trigrama for trigrama, ids in self._postagens.items() if len(ids) > limite_postagem
+        )
+
+    def __len__(self) -> int:
+        return len(self._nomes)
+
+    def candidatos(self, nome: str, pontuacao_minima: float = 0.4) -> Dict[int, int]:
+        """Cadastros a pontuar para `nome`: {id -> trigramas em comum com a consulta}.
+
+        Jaccard >= pontuacao_minima exige ao menos pontuacao_minima * len(consulta)
+        trigramas em comum; se os de parada da consulta não bastam para isso, todo
+        candidato possível compartilha algum trigrama raro e só esses são percorridos.
+        """
+        consulta = trigramas(nome)
+        de_parada = consulta & self.parada
+        if len(de_parada) >= math.ceil(pontuacao_minima * len(consulta)):
+            de_parada = frozenset()  # consulta quase só de partículas: busca completa
+        compartilhados: Dict[int, int] = defaultdict(int)
+        for trigrama in consulta - de_parada:
+            for item_id in self._postagens.get(trigrama, ()):
+                compartilhados[item_id] += 1
+        if de_parada:
+            for item_id in compartilhados:
+                compartilhados[item_id] += len(de_parada & self._trigramas[item_id])
+        return compartilhados
+
+    def buscar(self, nome: str, limite: int = 3, pontuacao_minima: float = 0.4) -> List[Tuple[int, str, float]]:
+        """Até `limite` candidatos (id, nome, pontuação), da maior para a menor pontuação.
+
+        Candidatos cujo tamanho torna impossível atingir `pontuacao_minima` nem são pontuados.
+        Empates são desfeitos pelo nome, para um resultado determinístico.
+        """
+        consulta = trigramas(nome)
+        if not consulta:
+            return []
+
+        tamanho = len(consulta)
+        candidatos = []
+        for item_id, comuns in self.candidatos(nome, pontuacao_minima).items():
+            tamanho_item = len(self._trigramas[item_id])
+            # Jaccard <= min/max dos tamanhos: descarta cedo quem não tem como passar
+            if min(tamanho, tamanho_item) < pontuacao_minima * max(tamanho, tamanho_item):
+                continue
+            pontuacao = comuns / (tamanho + tamanho_item - comuns)
+            if pontuacao >= pontuacao_minima:
+                candidatos.append((item_id, self._nomes[item_id], round(pontuacao, 3)))
+
+        candidatos.sort(key=lambda c: (-c[2], c[1]))
+        return candidatos[:limite]
@@ -0,0 +1,70 @@
+# Em scripts/sequencias.py
+"""Sequências de faltas contadas nas aulas do aluno, não em dias do calendário.
+
+Só contam as aulas em que o aluno tem chamada registrada: faltou (só faltas no dia)
+ou compareceu (alguma presença). Uma aula prevista da turma sem registro do aluno é
+desconhecida e fica de fora, em vez de contar como presença: a chamada da turma pode
+ainda não ter sido feita, e a de outra turma, mais recente, não diz nada sobre ela.
+Feriados não têm aula, então registros nesses dias também não contam. Assim, faltar
+sexta e a segunda seguinte, ou duas aulas semanais registradas seguidas, é sequência.
+
+A sequência é uma dobra sobre as aulas em ordem (`acumular`).
+"""
+import unicodedata
+from datetime import date
+from typing import Dict, Iterable, NamedTuple, Optional, Set
+
+# Prefixos dos nomes de dias (sem acento) na ordem de date.weekday()
+PREFIXOS_DIAS = ('SEGUNDA', 'TERCA', 'QUARTA', 'QUINTA', 'SEXTA', 'SABADO', 'DOMINGO')
+
+
+class Sequencia(NamedTuple):
+    """Estado da sequência de um aluno: aulas seguidas perdidas e quando começaram."""
+    atual: int
+    maior: int
+    inicio_atual: Optional[date]
+    inicio_maior: Optional[date]
+
+
+SEM_SEQUENCIA = Sequencia(0, 0, None, None)
+
+
+def dia_da_semana(nome_dia: str) -> Optional[int]:
+    """Converte o nome de uma aba/turma ('TERÇA', 'Segunda-feira') em date.weekday(); None se desconhecido."""
+    sem_acentos = ''.join(
+        c for c in unicodedata.normalize('NFKD', str(nome_dia)) if not unicodedata.combining(c)
+    ).strip().upper()
+    return next((i for i, prefixo in enumerate(PREFIXOS_DIAS) if sem_acentos.startswith(prefixo)), None)
+
+
+def acumular(aulas: Iterable[date], faltas: Set[date], estado: Sequencia = SEM_SEQUENCIA) -> Sequencia:
+    """Continua `estado` pelas `aulas` (em ordem); cada aula fora de `faltas` zera a sequência atual."""
+    atual, maior, inicio_atual, inicio_maior = estado
+    for dia in aulas:
+        if dia in faltas:
+            if atual == 0:
+                inicio_atual = dia
+            atual += 1
+            if atual > maior:
+                maior, inicio_maior = atual, inicio_atual
+        else:
+            atual, inicio_atual = 0, None
+    return Sequencia(atual, maior, inicio_atual, inicio_maior)
+
+
+def calcular_sequencia(
+    dias_semana: Iterable[int],
+    registros: Dict[date, bool],
+    feriados: Iterable[date] = ()
+) -> Sequencia:
+    """Sequência de um aluno nas aulas com registro, até a última delas.
+
+    `registros` mapeia cada dia com chamada para True (faltou) ou False (compareceu).
+    Sem turma o aluno não tem aulas, e portanto nenhuma sequência.
+    """
+    feriados = set(feriados)
+    aulas = {dia: faltou for dia, faltou in registros.items() if dia not in feriados}
+    if not set(dias_semana) or not any(aulas.values()):
+        return SEM_SEQUENCIA
+    faltas = {dia for dia, faltou in aulas.items() if faltou}
+    return acumular(sorted(aulas), faltas)
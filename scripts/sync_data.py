@@ -2,8 +2,7 @@ import streamlit as st
 import logging
 import pandas as pd
 from .sponte_scraper import executar_scraper_sponte
-from scripts.db_utils import get_db_connection
-from migrate_to_db import migrar_historico_chamadas
+from scripts.db_utils import salvar_alunos_sponte_db
 import traceback
 from scripts.sponte_scraper import executar_scraper_sponte
 
@@ -26,28 +25,11 @@ def sincronizar_dados(credenciais: dict):
             if resultado_scraper.get('sucesso'):
                 st.success(f"Dados de alunos obtidos do Sponte Web com sucesso! {len(resultado_scraper['alunos'])} alunos encontrados.")
                 
-                # Salva os alunos no banco de dados
-                conn = get_db_connection()
-                if conn:
-                    try:
-                        cursor = conn.cursor()
-                        alunos_novos = [
-                            (nome,) for nome in resultado_scraper['alunos']
-                            if nome and nome.strip()
-                        ]
-                        
-                        if alunos_novos:
-                            cursor.executemany(
-                                "INSERT OR IGNORE INTO alunos (nome) VALUES (?)",
-                                alunos_novos
-                            )
-                            conn.commit()
-                            st.success(f"{len(alunos_novos)} novos alunos salvos no banco de dados.")
-                    except Exception as e:
-                        conn.rollback()
-                        st.error(f"Erro ao salvar alunos no banco: {e}")
-                    finally:
-                        conn.close()
+                # Salva os alunos no banco de dados (pela fila de escrita única)
+                alunos_validos = [nome for nome in resultado_scraper['alunos'] if nome and nome.strip()]
+                if alunos_validos:
+                    novos = salvar_alunos_sponte_db(alunos_validos)
+                    st.success(f"{novos} novos alunos salvos no banco de dados.")
             else:
                 st.error(f"Erro ao buscar dados de alunos no Sponte: {resultado_scraper.get('mensagem', 'Erro desconhecido')}")
                 return
@@ -1,27 +1,23 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime
-import plotly.express as px
-import matplotlib.pyplot as plt
 import toml
 from pathlib import Path
-<<<<<<< HEAD
-from .db_utils import carregar_lembretes_aluno, carregar_comportamento_aluno, get_student_history
-=======
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
 
 
 # Importações de módulos locais
 from .db_utils import (
     get_db_connection,
     carregar_alunos_db,
-    carregar_horarios,
+    carregar_turmas,
+    carregar_alunos_turma,
     salvar_justificativa_db,
-    salvar_chamada_db,
+    salvar_chamadas_lote,
     atualizar_no_banco,
     carregar_todas_faltas,
-    classificar_justificativa,
+    carregar_sequencias_faltas,
+    classificar_series,
     salvar_lembrete,
     carregar_lembretes_aluno,
     salvar_comportamento,
@@ -30,63 +26,57 @@ from .db_utils import (
 )
 from .analysis import (
     detectar_padroes_de_falta,
-    gerar_grafico_calendario,
-    gerar_grafico_top_faltas,
-    gerar_ranking_faltas,
-    gerar_resumo_estatistico
+    grafico_calendario_em_cache,
+    grafico_top_faltas_em_cache,
+    gerar_resumo_estatistico,
+    faltas_por_mes,
+    ranking_faltas,
+    ranking_presencas
 )
 from .reports import gerar_relatorio_excel_completo
 # from .sponte_scraper import configurar_driver, extrair_dados_chamada # Removido: sponte_scraper não usado diretamente aqui
 
-def pagina_chamada(xls_horarios: pd.ExcelFile, df_base_alunos: pd.DataFrame, professor_logado: str) -> None:
+def _abrir_conciliacao() -> None:
+    """Leva à página onde fica a conciliação dos nomes da planilha com o cadastro."""
+    st.session_state["pagina"] = "Relatórios e Ferramentas"
+
+def pagina_chamada(
+    df_base_alunos: pd.DataFrame,
+    professor_logado: str,
+    sem_cadastro_por_turma: Optional[Dict[Tuple[str, str], List[str]]] = None
+) -> None:
     st.header("📅 Realizar Chamada Diária")
     
-    if not isinstance(xls_horarios, pd.ExcelFile) or df_base_alunos.empty:
+    turmas = carregar_turmas()
+    if not turmas or df_base_alunos.empty:
         st.error("Dados necessários não disponíveis. Verifique o arquivo de horários ou a base de alunos.")
         return
         
     col1, col2 = st.columns(2)
     with col1:
-        abas_disponiveis = [aba for aba in xls_horarios.sheet_names if "Planilha" not in str(aba)]
-        dia_selecionado = st.selectbox("Dia da Semana:", abas_disponiveis)
-    
-    df_dia_raw = pd.read_excel(xls_horarios, sheet_name=dia_selecionado, header=None)
-    header_row_index = next(
-        (i for i, row in df_dia_raw.iterrows() 
-         if row.astype(str).str.lower().str.contains('às').any()), 
-        -1
-    )
-    
-    if header_row_index == -1:
-        st.error("Não foi possível identificar os horários na planilha.")
-        return
-        
-    horarios_disponiveis = [h for h in df_dia_raw.iloc[header_row_index] if "às" in str(h).lower()]
+        dia_selecionado = st.selectbox("Dia da Semana:", list(turmas))
     
     with col2:
-        horario_selecionado = st.selectbox("Horário:", horarios_disponiveis)
+        horario_selecionado = st.selectbox("Horário:", turmas[dia_selecionado])
     
     if not horario_selecionado:
         return
         
     st.divider()
     
-    header_series = df_dia_raw.iloc[header_row_index]
-    col_index = next(
-        (i for i, col_name in enumerate(header_series) 
-         if str(col_name) == horario_selecionado), 
-        -1
-    )
-    
-    if col_index == -1:
-        st.error(f"Horário '{horario_selecionado}' não encontrado.")
-        return
-        
-    lista_alunos_bruta = df_dia_raw.iloc[header_row_index + 1:, col_index].dropna()
-    lista_alunos_filtrada = [
-        aluno for aluno in lista_alunos_bruta 
-        if "PC EM MANUTENÇÃO" not in str(aluno).upper()
-    ]
+    # Nomes da planilha sem cadastro não têm matrícula e ficariam fora da lista sem aviso
+    sem_cadastro = (sem_cadastro_por_turma or {}).get((dia_selecionado, horario_selecionado), [])
+    if sem_cadastro:
+        st.warning(
+            f"{len(sem_cadastro)} aluno(s) desta turma na planilha de horários sem cadastro no sistema "
+            f"não aparecem na chamada: {', '.join(sem_cadastro)}. Associe os nomes em "
+            "'Relatórios e Ferramentas' → 'Conciliar Planilha de Horários com o Cadastro'."
+        )
+        st.button("🧩 Abrir conciliação de nomes", on_click=_abrir_conciliacao, key="abrir_conciliacao")
+
+    df_turma = carregar_alunos_turma(dia_selecionado, horario_selecionado)
+    ids_por_nome = dict(zip(df_turma['nome'], df_turma['id']))
+    lista_alunos_filtrada = list(ids_por_nome)
     
     turma_id = f"{dia_selecionado}-{horario_selecionado}"
     if 'chamadas_da_sessao' not in st.session_state:
@@ -125,102 +115,38 @@ def pagina_chamada(xls_horarios: pd.ExcelFile, df_base_alunos: pd.DataFrame, pro
     
     if st.button("💾 Salvar Presenças e Faltas", type="primary", use_container_width=True):
         with st.spinner("Salvando registros..."):
+            nomes_por_id = {}
+            registros = []
             for aluno, status in st.session_state.chamadas_da_sessao[turma_id].items():
-                aluno_info = df_base_alunos[df_base_alunos['nome'] == aluno]
-                
-                if not aluno_info.empty:
-                    aluno_id = int(aluno_info.iloc[0]['id'])
-                    salvar_chamada_db(
-                        aluno_id=aluno_id,
-                        data_chamada=date.today(),
-                        horario=horario_selecionado,
-                        status=status,
-                        professor=professor_logado
-                    )
-                    
-                    if status == 'Faltou' and aluno not in st.session_state.ausentes_do_dia:
-                        st.session_state.ausentes_do_dia[aluno] = {
-                            "ligacao": False,
-                            "justificativa": "",
-                            "id": aluno_id
-                        }
-            
-            st.success("Chamada salva com sucesso!")
-            st.rerun()
-
-<<<<<<< HEAD
-def pagina_gestao_individual(df_base_alunos: pd.DataFrame, professor_logado: str):
-    """Renderiza a página completa de gestão individual de um aluno."""
-    st.header("🔍 Gestão Individual do Aluno", divider="rainbow")
-
-    if df_base_alunos.empty:
-        st.warning("Nenhum aluno carregado para seleção.")
-        return
-
-    # Mapeia nome do aluno para seu ID
-    mapa_alunos = pd.Series(df_base_alunos.id.values, index=df_base_alunos.nome).to_dict()
-    
-    aluno_selecionado = st.selectbox(
-        "Selecione um aluno para ver os detalhes:",
-        options=mapa_alunos.keys(),
-        index=None,  # Começa sem nenhum aluno selecionado
-        placeholder="Digite ou selecione o nome do aluno"
-    )
+                if aluno in ids_por_nome:
+                    aluno_id = int(ids_por_nome[aluno])
+                    nomes_por_id[aluno_id] = aluno
+                    registros.append((aluno_id, status))
 
-    if aluno_selecionado:
-        aluno_id = mapa_alunos[aluno_selecionado]
-        st.divider()
-
-        # --- NOVO DASHBOARD DO ALUNO ---
-        st.subheader(f"Dashboard de Frequência: {aluno_selecionado}")
-
-        # Carrega o histórico de faltas
-        df_historico_faltas = get_student_history(aluno_id)
+            resultados = salvar_chamadas_lote(
+                registros,
+                data=date.today(),
+                horario=horario_selecionado,
+                professor=professor_logado
+            )
 
-        if df_historico_faltas.empty:
-            st.info("Este aluno não possui registo de faltas. ✅")
-        else:
-            # Exibe os cartões de resumo (KPIs)
-            total_faltas = len(df_historico_faltas)
-            faltas_justificadas = df_historico_faltas['justificativa'].notna().sum()
-            
-            col1, col2 = st.columns(2)
-            col1.metric("Total de Faltas", f"{total_faltas} dias")
-            col2.metric("Faltas Justificadas", f"{faltas_justificadas} dias")
+            erros = [r for r in resultados if not r['salvo']]
+            if erros:
+                st.error(f"Erro ao salvar a chamada: {erros[0]['erro']}")
+                return
 
-            # Exibe a tabela com o histórico detalhado
-            st.write("#### Histórico de Faltas")
-            df_display = df_historico_faltas[['data', 'justificativa', 'justificado_por']].copy()
-            df_display.rename(columns={
-                'data': 'Data da Falta',
-                'justificativa': 'Justificativa',
-                'justificado_por': 'Registado Por'
-            }, inplace=True)
+            for resultado in resultados:
+                aluno = nomes_por_id[resultado['aluno_id']]
+                if resultado['status'] == 'Faltou' and aluno not in st.session_state.ausentes_do_dia:
+                    st.session_state.ausentes_do_dia[aluno] = {
+                        "ligacao": False,
+                        "justificativa": "",
+                        "id": resultado['aluno_id']
+                    }
             
-            st.dataframe(df_display, use_container_width=True, hide_index=True)
-
-        # --- SEÇÃO DE LEMBRETES E COMPORTAMENTO (JÁ EXISTENTE OU PODE ADICIONAR) ---
-        st.divider()
-        st.subheader("Registos Adicionais")
-        
-        tab_lembretes, tab_comportamento = st.tabs(["Lembretes", "Comportamento"])
-
-        with tab_lembretes:
-            st.write("###### Histórico de Lembretes")
-            df_lembretes = carregar_lembretes_aluno(aluno_id)
-            if not df_lembretes.empty:
-                st.dataframe(df_lembretes, use_container_width=True, hide_index=True)
-            else:
-                st.write("Nenhum lembrete para este aluno.")
+            st.success("Chamada salva com sucesso!")
+            st.rerun()
 
-        with tab_comportamento:
-            st.write("###### Histórico de Comportamento")
-            df_comportamento = carregar_comportamento_aluno(aluno_id)
-            if not df_comportamento.empty:
-                st.dataframe(df_comportamento, use_container_width=True, hide_index=True)
-            else:
-                st.write("Nenhum registo de comportamento para este aluno.")
-=======
 def pagina_gestao_individual(df_base_alunos: pd.DataFrame, professor_logado: str) -> None:
     st.header("👤 Gestão Individual de Alunos")
     
@@ -357,12 +283,22 @@ def pagina_gestao_individual(df_base_alunos: pd.DataFrame, professor_logado: str
         else:
             st.info("Nenhum registro de comportamento encontrado para este aluno.")
 
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
 def pagina_dashboard(categorias_config: Dict[str, Any]) -> None:
     """Renderiza o dashboard de análise de faltas."""
     st.header("📊 Dashboard de Análise", divider="rainbow")
     
-    df_faltas = carregar_todas_faltas()
+    col_inicio, col_fim = st.columns(2)
+    with col_inicio:
+        data_inicio = st.date_input("Período - início:", value=date.today().replace(month=1, day=1), key="dash_inicio")
+    with col_fim:
+        data_fim = st.date_input("Período - fim:", value=date.today(), key="dash_fim")
+
+    # Busca apenas o período e as colunas exibidas no dashboard
+    df_faltas = carregar_todas_faltas(
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        colunas=['data', 'status', 'nome_aluno', 'justificativa', 'categoria_justificativa']
+    )
     
     if df_faltas.empty:
         st.info("Nenhum dado de falta disponível para análise. O sistema pode estar vazio ou ainda não há registros.")
@@ -375,6 +311,21 @@ def pagina_dashboard(categorias_config: Dict[str, Any]) -> None:
         st.success("✅ Nenhum padrão preocupante detectado.")
     else:
         st.dataframe(df_alertas, use_container_width=True, hide_index=True)
+
+    # Sequências já calculadas nas gravações (aulas registradas de cada aluno, sem feriados)
+    df_sequencias = carregar_sequencias_faltas(minimo=2)
+    if not df_sequencias.empty:
+        st.markdown("**🔁 Aulas seguidas perdidas (aulas com chamada registrada)**")
+        st.dataframe(
+            df_sequencias.rename(columns={
+                'nome_aluno': 'Aluno',
+                'atual': 'Sequência Atual',
+                'inicio_atual': 'Desde',
+                'maior': 'Maior Sequência',
+            })[['Aluno', 'Sequência Atual', 'Desde', 'Maior Sequência']],
+            use_container_width=True,
+            hide_index=True
+        )
     
     st.divider()
     
@@ -382,20 +333,17 @@ def pagina_dashboard(categorias_config: Dict[str, Any]) -> None:
     
     with col1:
         st.subheader("📅 Faltas por Mês")
-        if not df_faltas.empty:
-            df_faltas['data'] = pd.to_datetime(df_faltas['data'])
-            faltas_por_mes = df_faltas.set_index('data').groupby(pd.Grouper(freq='M')).size()
-            faltas_por_mes.index = faltas_por_mes.index.strftime('%B %Y')
-            st.bar_chart(faltas_por_mes)
+        # Agregados lidos de resumo_diario, sem varrer o histórico de chamadas
+        serie_faltas_mes = faltas_por_mes(data_inicio, data_fim)
+        if not serie_faltas_mes.empty:
+            st.bar_chart(serie_faltas_mes)
         else:
             st.info("Nenhum dado de falta para mostrar a frequência mensal.")
         
         st.subheader("🏆 Alunos com Mais Presenças")
-        df_presentes = df_faltas[df_faltas['status'].str.upper() == 'P']
-        if not df_presentes.empty:
-            contagem_presencas = df_presentes['nome_aluno'].value_counts().reset_index()
-            contagem_presencas.columns = ['Aluno', 'Total de Presenças']
-            st.dataframe(contagem_presencas.head(5), 
+        contagem_presencas = ranking_presencas(data_inicio, data_fim, top_n=5)
+        if not contagem_presencas.empty:
+            st.dataframe(contagem_presencas, 
                         hide_index=True, 
                         column_config={"Aluno": "Aluno", "Total de Presenças": "Presenças"})
         else:
@@ -407,10 +355,18 @@ def pagina_dashboard(categorias_config: Dict[str, Any]) -> None:
             df_faltas_justificadas = df_faltas[df_faltas['status'].str.lower() == 'faltou'].dropna(subset=['justificativa'])
             
             if not df_faltas_justificadas.empty:
-                df_faltas_justificadas['categoria'] = df_faltas_justificadas['justificativa'].apply(
-                    lambda x: classificar_justificativa(x, categorias_config))
+                # Categoria gravada pelo job de reclassificação; só o que ainda não tem é classificado aqui
+                categorias_faltas = df_faltas_justificadas['categoria_justificativa'].astype(object)
+                sem_categoria = categorias_faltas.isna()
+                if sem_categoria.any():
+                    categorias_faltas = categorias_faltas.copy()
+                    categorias_faltas[sem_categoria] = classificar_series(
+                        df_faltas_justificadas.loc[sem_categoria, 'justificativa'], categorias_config
+                    ).astype(object)
                 
-                contagem_categorias = df_faltas_justificadas['categoria'].value_counts()
+                contagem_categorias = categorias_faltas.value_counts()
+                contagem_categorias = contagem_categorias[contagem_categorias > 0]
+                import plotly.express as px  # só quando há gráfico a desenhar
                 fig_pie = px.pie(
                     contagem_categorias, 
                     values=contagem_categorias.values,
@@ -427,11 +383,6 @@ def pagina_relatorios() -> None:
     """Renderiza a página de relatórios e ferramentas."""
     st.header("📋 Relatórios e Ferramentas", divider="rainbow")
     
-<<<<<<< HEAD
-    df_total_faltas = carregar_todas_faltas()
-    
-=======
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
     with st.expander("📊 Gerar Relatórios", expanded=True):
         try:
             config_path = Path(__file__).resolve().parents[2] / "config.toml"
@@ -485,30 +436,18 @@ def pagina_relatorios() -> None:
     with st.expander("📈 Visualizações Analíticas", expanded=True):
         tab1, tab2, tab3 = st.tabs(["Calendário", "Ranking", "Top 10"])
         
-        df_faltas = carregar_todas_faltas()
-
         with tab1:
             st.subheader("Calendário de Faltas")
-            fig_calendario = gerar_grafico_calendario(df_faltas)
-<<<<<<< HEAD
-            if fig_calendario:
-                # Adicione a key aqui
-                st.plotly_chart(fig_calendario, use_container_width=True, key="dash_calendario")
-            else:
-                st.info("Nenhum dado de falta disponível para o calendário.")
-        
-        
-=======
+            fig_calendario = grafico_calendario_em_cache()
             
             if fig_calendario:
                 st.plotly_chart(fig_calendario, use_container_width=True)
             else:
                 st.info("Nenhum dado de falta disponível para o calendário.")
         
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
         with tab2:
             st.subheader("Ranking de Faltas")
-            df_ranking = gerar_ranking_faltas(df_faltas)
+            df_ranking = ranking_faltas()
             
             if not df_ranking.empty: # Verifica se está vazio, não se é None
                 st.dataframe(df_ranking, use_container_width=True, hide_index=True)
@@ -517,17 +456,9 @@ def pagina_relatorios() -> None:
         
         with tab3:
             st.subheader("Top 10 Alunos com Mais Faltas")
-            fig_top10 = gerar_grafico_top_faltas(df_faltas)
-<<<<<<< HEAD
-            if fig_top10:
-                # Adicione a key aqui
-                st.plotly_chart(fig_top10, use_container_width=True, key="dash_top10")
-            else:
-                st.info("Nenhum dado disponível para o gráfico de top 10.")
-=======
+            png_top10 = grafico_top_faltas_em_cache(top_n=10)
             
-            if fig_top10:
-                st.pyplot(fig_top10)
+            if png_top10:
+                st.image(png_top10)
             else:
                 st.info("Nenhum dado disponível para o gráfico Top 10.")
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
@@ -3,40 +3,30 @@ import streamlit as st
 import toml
 from datetime import datetime
 from pathlib import Path
-from scripts.db_utils import carregar_todas_faltas, carregar_faltas_por_periodo, EXPORT_DIR
+from scripts.db_utils import carregar_faltas_por_periodo, EXPORT_DIR
+from scripts.db_utils import sugerir_correspondencias, aplicar_correspondencias
+from scripts.db_utils import carregar_feriados, salvar_feriado, remover_feriado
 from scripts.reports import gerar_relatorio_excel_completo
 import pandas as pd
 import logging
-from scripts.db_utils import get_db_connection
-import matplotlib.pyplot as plt
-<<<<<<< HEAD
-from .db_utils import carregar_todas_faltas
-
-=======
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
+from scripts.db_utils import get_db_connection_leitura
 from scripts.analysis import (
     gerar_ranking_faltas,
-    gerar_grafico_calendario,
-    gerar_grafico_top_faltas,
-    gerar_resumo_estatistico
+    grafico_calendario_em_cache,
+    grafico_top_faltas_em_cache,
+    gerar_resumo_estatistico,
+    faltas_por_dia,
+    ranking_faltas
 )
-from scripts.sponte_scraper import executar_scraper_sponte
-from scripts.sync_data import sincronizar_dados
 
 def pagina_relatorios() -> None:
     """Renderiza a página de relatórios e ferramentas."""
     st.header("📋 Relatórios e Ferramentas", divider="rainbow")
-<<<<<<< HEAD
-    df_total_faltas = carregar_todas_faltas()
+    # Calendário, ranking e top 10 leem só os agregados (um por dia / por aluno) do banco
+    df_faltas_dia = faltas_por_dia()
 
-    if df_total_faltas.empty:
+    if df_faltas_dia.empty:
         st.warning("Nenhum dado de falta foi encontrado na base de dados. Execute o script de migração (migrate_to_db.py) se tiver dados históricos em planilhas.")
-=======
-    df_total_faltas = pd.DataFrame()  # Inicializa um DataFrame vazio
-
-    if df_total_faltas.empty:
-        st.warning("Nenhum dado de falta foi encontrado nos arquivos CSV. Verifique se os arquivos estão na pasta correta e não estão vazios.")
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
         return
 
     tab1, tab2, tab3 = st.tabs(["🗓️ Calendário", "🏆 Ranking", "🔟 Top 10"])
@@ -44,20 +34,16 @@ def pagina_relatorios() -> None:
     with tab1:
         st.subheader("Calendário de Faltas")
         with st.spinner("Gerando calendário..."):
-            fig_calendario = gerar_grafico_calendario(df_total_faltas)
+            fig_calendario = grafico_calendario_em_cache()
             if fig_calendario:
-<<<<<<< HEAD
                 st.plotly_chart(fig_calendario, use_container_width=True, key="relatorio_calendario")
-=======
-                st.plotly_chart(fig_calendario, use_container_width=True)
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
             else:
                 st.info("Nenhum dado de falta disponível para gerar o calendário.")
 
     with tab2:
         st.subheader("Ranking de Faltas")
         with st.spinner("Gerando ranking..."):
-            df_ranking = gerar_ranking_faltas(df_total_faltas)
+            df_ranking = ranking_faltas()
             if not df_ranking.empty:
                 st.dataframe(df_ranking, use_container_width=True, hide_index=True)
             else:
@@ -66,18 +52,13 @@ def pagina_relatorios() -> None:
     with tab3:
         st.subheader("Top 10 Alunos com Mais Faltas")
         with st.spinner("Gerando gráfico..."):
-            fig_top10 = gerar_grafico_top_faltas(df_total_faltas)
-            if fig_top10:
-<<<<<<< HEAD
-                st.plotly_chart(fig_top10, use_container_width=True, key="relatorio_top10")
-=======
-                st.pyplot(fig_top10)
-                plt.close(fig_top10) # Limpa a figura da memória
->>>>>>> c19bda253a042a39f0d8d16acd0dc96f2b1dabae
+            png_top10 = grafico_top_faltas_em_cache(top_n=10)
+            if png_top10:
+                st.image(png_top10)
             else:
                 st.info("Nenhum dado disponível para o gráfico de Top 10.")
 
-    conn = get_db_connection()
+    conn = get_db_connection_leitura()
     if conn:
         try:
             cursor = conn.cursor()
@@ -113,8 +94,59 @@ def pagina_relatorios() -> None:
             if not credenciais['username'] or not credenciais['password']:
                 st.error("Credenciais do Sponte não configuradas. Verifique o arquivo secrets.toml")
             else:
+                # Carrega selenium/webdriver_manager só quando a sincronização é pedida
+                from scripts.sync_data import sincronizar_dados
                 sincronizar_dados(credenciais)
     
+    # Conciliação dos nomes da planilha de horários com o cadastro
+    with st.expander("🧩 Conciliar Planilha de Horários com o Cadastro", expanded=False):
+        sugestoes = sugerir_correspondencias()
+        if sugestoes.empty:
+            st.success("Nenhum nome da planilha sem cadastro com sugestão de correspondência.")
+        else:
+            st.write("Marque as correspondências corretas; o nome da planilha passa a apontar para o aluno cadastrado.")
+            sugestoes.insert(0, 'aceitar', (sugestoes['posicao'] == 1) & (sugestoes['pontuacao'] >= 0.8))
+            editado = st.data_editor(
+                sugestoes,
+                disabled=[col for col in sugestoes.columns if col != 'aceitar'],
+                hide_index=True,
+                key="conciliacao_nomes"
+            )
+            if st.button("✅ Aplicar Correspondências Aceitas"):
+                aceitas = editado[editado['aceitar']].drop_duplicates('nome', keep='first')
+                gravados = aplicar_correspondencias(list(zip(aceitas['nome'], aceitas['aluno_id'])))
+                st.success(f"{gravados} correspondências aplicadas.")
+                st.rerun()
+
+    # Feriados e recessos: dias sem aula que não interrompem sequências de faltas
+    with st.expander("📅 Feriados e Recessos", expanded=False):
+        df_feriados = carregar_feriados()
+        if df_feriados.empty:
+            st.info("Nenhum feriado cadastrado.")
+        else:
+            st.dataframe(df_feriados, use_container_width=True, hide_index=True)
+
+        col_data, col_descricao = st.columns([1, 2])
+        with col_data:
+            data_feriado = st.date_input("Data:", key="feriado_data")
+        with col_descricao:
+            descricao_feriado = st.text_input("Descrição:", key="feriado_descricao")
+        col_salvar, col_remover = st.columns(2)
+        with col_salvar:
+            if st.button("➕ Cadastrar Feriado"):
+                if salvar_feriado(data_feriado, descricao_feriado):
+                    st.success("Feriado cadastrado; sequências de faltas recalculadas.")
+                    st.rerun()
+                else:
+                    st.error("Erro ao cadastrar feriado.")
+        with col_remover:
+            if st.button("🗑️ Remover Feriado"):
+                if remover_feriado(data_feriado):
+                    st.success("Feriado removido; sequências de faltas recalculadas.")
+                    st.rerun()
+                else:
+                    st.warning("Não há feriado cadastrado nessa data.")
+    
     st.divider()
     
     # Seção de relatórios e filtros
@@ -160,11 +192,9 @@ def pagina_relatorios() -> None:
     with st.expander("📈 Visualizações Analíticas", expanded=True):
         tab1, tab2, tab3 = st.tabs(["Calendário", "Ranking", "Top 10"])
         
-        df_faltas = carregar_todas_faltas()
-        
         with tab1:
             st.subheader("Calendário de Faltas")
-            fig_calendario = gerar_grafico_calendario(df_faltas)
+            fig_calendario = grafico_calendario_em_cache()
             
             if fig_calendario:
                 st.plotly_chart(fig_calendario, use_container_width=True)
@@ -173,7 +203,7 @@ def pagina_relatorios() -> None:
         
         with tab2:
             st.subheader("Ranking de Faltas")
-            df_ranking = gerar_ranking_faltas(df_faltas)
+            df_ranking = ranking_faltas()
             
             if df_ranking is not None and not df_ranking.empty:
                 st.dataframe(df_ranking, use_container_width=True, hide_index=True)
@@ -182,10 +212,10 @@ def pagina_relatorios() -> None:
         
         with tab3:
             st.subheader("Top 10 Alunos com Mais Faltas")
-            fig_top10 = gerar_grafico_top_faltas(df_faltas)
+            png_top10 = grafico_top_faltas_em_cache(top_n=10)
             
-            if fig_top10:
-                st.pyplot(fig_top10)
+            if png_top10:
+                st.image(png_top10)
             else:
                 st.info("Nenhum dado disponível para o gráfico.")
 
@@ -0,0 +1,87 @@
+# Em tests/conftest.py
+
+import os
+import pytest
+import pandas as pd
+import database_setup
+from scripts import db_utils
+from scripts.planilha_horarios import parar_vigias
+
+
+@pytest.fixture
+def banco_temporario(tmp_path, monkeypatch):
+    """Cria um banco SQLite isolado com o schema da aplicação e aponta os módulos para ele."""
+    caminho = tmp_path / "escola.db"
+    monkeypatch.setattr(database_setup, "DB_PATH", caminho)
+    monkeypatch.setattr(db_utils, "DB_PATH", caminho)
+    assert database_setup.criar_banco_dados()
+
+    conn = database_setup.get_db_connection(caminho)
+    conn.executemany(
+        "INSERT INTO alunos (nome) VALUES (?)",
+        [("ALUNO UM",), ("ALUNO DOIS",), ("ALUNO TRES",)]
+    )
+    conn.commit()
+    conn.close()
+
+    yield caminho
+    database_setup.fechar_conexoes(caminho)
+
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Banco temporário com uma tabela simples (sem o schema da aplicação); fecha o pool ao final do teste."""
+    caminho = tmp_path / "teste.db"
+    conn = database_setup.get_db_connection(caminho)
+    conn.execute("CREATE TABLE itens (id INTEGER PRIMARY KEY, valor TEXT)")
+    conn.commit()
+    conn.close()
+    yield caminho
+    database_setup.fechar_conexoes(caminho)
+
+
+@pytest.fixture
+def categorias_config():
+    """Configuração de categorias como a carregada de [categorias] no config.toml."""
+    return {
+        "motivo_saude": ["médico", "doente", "hospital", "dentista", "mal", "passando mal"],
+        "motivo_pessoal": ["problema pessoal", "familiar", "resolvendo"],
+        "motivo_transporte": ["ônibus", "onibus", "trânsito", "carro quebrou"],
+        "outros": []
+    }
+
+def escrever_planilha_horarios(caminho, alunos_segunda=("ALUNO UM", None)):
+    """Grava uma planilha de horários pequena, no formato da planilha real (header=None)."""
+    segunda = pd.DataFrame([
+        ["SEGUNDA", None, None],
+        [None, "08:00 às 09:00", "09:00 às 10:00"],
+        [None, alunos_segunda[0], "ALUNO DOIS"],
+        [None, alunos_segunda[1], "PC EM MANUTENÇÃO"],
+    ])
+    terca = pd.DataFrame([[None, "10:00 às 11:00"], [None, " ALUNO TRES "]])
+    with pd.ExcelWriter(caminho) as writer:
+        segunda.to_excel(writer, sheet_name="SEGUNDA", header=False, index=False)
+        terca.to_excel(writer, sheet_name="TERÇA", header=False, index=False)
+        pd.DataFrame([["x"]]).to_excel(writer, sheet_name="Planilha1", header=False, index=False)
+
+
+@pytest.fixture
+def planilha_horarios(tmp_path, monkeypatch):
+    """Aponta db_utils para uma planilha de horários temporária; retorna uma função que a regrava.
+
+    A cada regravação o mtime avança, para que os caches indexados pelo arquivo percebam a mudança.
+    """
+    caminho = tmp_path / "horarios.xlsx"
+    monkeypatch.setattr(db_utils, "ARQUIVO_HORARIOS", caminho)
+
+    def escrever(alunos_segunda=("ALUNO UM", None)):
+        mtime_anterior = caminho.stat().st_mtime_ns if caminho.exists() else 0
+        escrever_planilha_horarios(caminho, alunos_segunda)
+        mtime = max(caminho.stat().st_mtime_ns, mtime_anterior + 10**9)
+        os.utime(caminho, ns=(mtime, mtime))
+        return caminho
+
+    escrever()
+    yield escrever
+    parar_vigias()
@@ -0,0 +1,76 @@
+# Em tests/test_analysis.py
+
+from datetime import datetime
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from scripts.analysis import detectar_padroes_de_falta, gerar_grafico_calendario, gerar_grafico_top_faltas
+
+REFERENCIA = datetime(2024, 5, 20, 12, 0)
+
+
+def _chamadas(linhas):
+    return pd.DataFrame(linhas, columns=["Nome_Aluno", "Data", "Status"])
+
+
+def test_detectar_padroes_recentes_e_consecutivos():
+    """Alertas por aluno, em ordem de nome, com o de faltas recentes antes do de dias consecutivos."""
+    df = _chamadas([
+        ("BRUNO", "2024-05-19", "Faltou"),
+        ("BRUNO", "2024-05-15", "F"),          # Falta importada do histórico
+        ("BRUNO", "2024-05-17", "faltou"),
+        ("BRUNO", "2024-05-16", "Presente"),
+        ("ANA", "2024-04-01", "Faltou"),
+        ("ANA", "2024-04-02", "F"),
+        ("CAIO", "2024-05-18", "Faltou"),      # Uma única chamada: sem alertas
+        ("DANI", "2024-05-10", "Faltou"),
+        ("DANI", "2024-05-11", "Presente"),
+        ("DANI", "2024-05-12", "Faltou"),      # Faltas com dia de presença no meio
+        ("EVA", "data inválida", "Faltou"),
+        ("EVA", "2024-05-19", "Faltou"),       # Só uma chamada válida
+    ])
+    alertas = detectar_padroes_de_falta(df, REFERENCIA)
+
+    assert alertas.to_dict("records") == [
+        {"Aluno": "ANA", "Alerta": "ℹ️ Possui faltas em dias consecutivos"},
+        {"Aluno": "BRUNO", "Alerta": "⚠️ 3 faltas nos últimos 7 dias"},
+    ]
+
+
+def test_detectar_padroes_nao_altera_entrada():
+    """Colunas, datas e linhas inválidas do DataFrame recebido continuam como estavam."""
+    df = _chamadas([
+        ("ANA", "2024-05-18", "Faltou"),
+        ("ANA", "2024-05-19", "Faltou"),
+        ("ANA", None, "Faltou"),
+    ])
+    original = df.copy()
+
+    alertas = detectar_padroes_de_falta(df, REFERENCIA)
+
+    assert list(alertas["Aluno"]) == ["ANA"]
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_detectar_padroes_sem_dados_ou_colunas():
+    vazio = detectar_padroes_de_falta(pd.DataFrame())
+    assert vazio.empty and list(vazio.columns) == ["Aluno", "Alerta"]
+    sem_status = detectar_padroes_de_falta(pd.DataFrame({"nome_aluno": ["ANA"], "data": ["2024-05-19"]}))
+    assert sem_status.empty and list(sem_status.columns) == ["Aluno", "Alerta"]
+
+
+def test_graficos_consomem_agregados():
+    """Calendário e top N são montados a partir dos resultados agregados, sem as chamadas."""
+    faltas_dia = pd.DataFrame({"Data": [datetime(2024, 5, 6).date(), datetime(2024, 5, 7).date()], "Faltas": [3, 1]})
+    fig = gerar_grafico_calendario(faltas_dia)
+    assert fig is not None and list(fig.data[0].x) == list(faltas_dia["Data"])
+    assert gerar_grafico_calendario(pd.DataFrame(columns=["Data", "Faltas"])) is None
+
+    ranking = pd.DataFrame({"Aluno": ["ANA", "BIA", "CAIO"], "Total de Faltas": [4, 2, 2]})
+    fig = gerar_grafico_top_faltas(ranking, top_n=2)
+    try:
+        assert [barra.get_width() for barra in fig.axes[0].patches] == [4, 2, 2]
+    finally:
+        plt.close(fig)
+    assert gerar_grafico_top_faltas(pd.DataFrame(columns=["Aluno", "Total de Faltas"])) is None
@@ -0,0 +1,65 @@
+# Em tests/test_cache_graficos.py
+
+from datetime import date
+
+import matplotlib.pyplot as plt
+import pytest
+
+from scripts import analysis
+from scripts.cache_graficos import CACHE_GRAFICOS, CacheGraficos, figura_para_png
+from scripts.db_utils import salvar_chamadas_lote
+
+
+@pytest.fixture
+def cache_vazio():
+    CACHE_GRAFICOS.limpar()
+    yield CACHE_GRAFICOS
+    CACHE_GRAFICOS.limpar()
+
+
+def test_despejo_lru_respeita_limite_de_bytes():
+    """Ao passar do limite saem os gráficos usados há mais tempo; os muito grandes nem entram."""
+    cache = CacheGraficos(limite_bytes=10)
+    cache.guardar(("a",), b"1234")
+    cache.guardar(("b",), b"1234")
+    assert cache.obter(("a",)) == b"1234"  # 'a' passa a ser o mais recente
+    cache.guardar(("c",), "1234")
+    assert cache.obter(("b",)) is None
+    assert cache.obter(("a",)) == b"1234" and cache.obter(("c",)) == "1234"
+    assert cache.bytes_ocupados == 8
+
+    cache.guardar(("d",), b"x" * 11)
+    assert cache.obter(("d",)) is None and len(cache) == 2
+
+
+def test_figura_e_fechada_mesmo_com_erro():
+    """A figura matplotlib sai do pyplot depois de serializada, com ou sem erro."""
+    fig, _ = plt.subplots()
+    assert figura_para_png(fig).startswith(b"\x89PNG")
+    assert not plt.fignum_exists(fig.number)
+
+    fig, _ = plt.subplots()
+    with pytest.raises(ValueError):
+        figura_para_png(fig, dpi=-1)
+    assert not plt.fignum_exists(fig.number)
+
+
+def test_graficos_reaproveitados_ate_mudarem_os_dados(banco_temporario, cache_vazio, monkeypatch):
+    """Calendário e top N são gerados uma vez por geração dos dados e refeitos após uma escrita."""
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Faltou")], date(2024, 3, 4), "08:00 às 09:00", "Prof")
+    geracoes = []
+    for nome in ("gerar_grafico_calendario", "gerar_grafico_top_faltas"):
+        original = getattr(analysis, nome)
+        monkeypatch.setattr(analysis, nome, lambda *a, _f=original, _n=nome, **k: geracoes.append(_n) or _f(*a, **k))
+
+    figuras_abertas = len(plt.get_fignums())
+    for _ in range(2):
+        assert analysis.grafico_calendario_em_cache() is not None
+        assert analysis.grafico_top_faltas_em_cache(top_n=10).startswith(b"\x89PNG")
+    assert geracoes == ["gerar_grafico_calendario", "gerar_grafico_top_faltas"]
+    assert len(plt.get_fignums()) == figuras_abertas
+
+    salvar_chamadas_lote([(3, "Faltou")], date(2024, 3, 5), "08:00 às 09:00", "Prof")
+    analysis.grafico_calendario_em_cache()
+    analysis.grafico_top_faltas_em_cache(top_n=10)
+    assert len(geracoes) == 4
@@ -0,0 +1,79 @@
+# Em tests/test_categorias.py
+
+import pandas as pd
+
+from scripts.categorias import classificar_series, compilar_categorias
+
+CATEGORIAS = {
+    "motivo_saude": ["médico", "dor", "passando mal"],
+    "motivo_familia": ["mãe", "condor"],
+    "motivo_transporte": ["ônibus", "..."],
+    "vazia": [],
+    "invalida": "texto",
+}
+
+
+def test_acentos_e_caixa_nao_importam():
+    classificador = compilar_categorias(CATEGORIAS)
+    assert classificador.classificar("Foi ao MEDICO") == "Saude"
+    assert classificador.classificar("perdeu o onibus") == "Transporte"
+    assert classificador.classificar("A MAE levou") == "Familia"
+
+
+def test_prioridade_segue_a_ordem_do_config():
+    """Vence a primeira categoria do config com palavra no texto, mesmo que outra apareça antes no texto."""
+    classificador = compilar_categorias(CATEGORIAS)
+    assert classificador.classificar("A mãe estava com dor") == "Saude"
+    assert classificador.classificar("Viu um condor") == "Saude"  # 'dor' está dentro de 'condor'
+    assert classificador.classificar("Aguardando...") == "Transporte"
+    assert classificador.rotulos == ["Saude", "Familia", "Transporte", "Outros", "Não Especificado"]
+
+
+def test_configuracao_compilada_uma_vez():
+    assert compilar_categorias(dict(CATEGORIAS)) is compilar_categorias(CATEGORIAS)
+    assert compilar_categorias(None).classificar("médico") == "Outros"
+
+
+def test_classificar_series_igual_ao_escalar():
+    textos = pd.Series(
+        ["Foi ao médico", "Ônibus atrasou", None, "", "sem motivo", "Foi ao médico", float("nan"), 42, "MÃE doente"],
+        index=range(10, 19),
+        name="justificativa",
+        dtype=object,
+    )
+    classificador = compilar_categorias(CATEGORIAS)
+    resultado = classificar_series(textos, CATEGORIAS)
+
+    assert resultado.index.equals(textos.index)
+    assert resultado.name == "justificativa"
+    assert resultado.tolist() == [classificador.classificar(t) for t in textos]
+    assert resultado.tolist()[:5] == ["Saude", "Transporte", "Não Especificado", "Outros", "Outros"]
+    assert classificar_series(pd.Series([], dtype="string"), CATEGORIAS).empty
+
+
+def test_classificar_series_categorica_e_string():
+    """Colunas categóricas (como as de ler_chamadas_tipadas) e 'string' classificam igual a object."""
+    valores = ["Foi ao médico", "Ônibus atrasou", None, "sem motivo", "Foi ao médico"]
+    esperado = classificar_series(pd.Series(valores, dtype=object), CATEGORIAS).tolist()
+    assert esperado == ["Saude", "Transporte", "Não Especificado", "Outros", "Saude"]
+    for dtype in ("category", "string", "str"):
+        assert classificar_series(pd.Series(valores, dtype=dtype), CATEGORIAS).tolist() == esperado
+
+
+def test_hash_muda_so_com_a_configuracao_compilada():
+    """Variações de caixa/acento/ordem das palavras não mudam o hash; palavras e prioridade mudam."""
+    base = compilar_categorias(CATEGORIAS).hash
+    assert compilar_categorias({**CATEGORIAS, "motivo_saude": ["DOR", "passando mal", "medico"]}).hash == base
+    assert compilar_categorias({**CATEGORIAS, "motivo_saude": ["médico", "dor"]}).hash != base
+    invertida = dict(reversed(list(CATEGORIAS.items())))
+    assert compilar_categorias(invertida).hash != base
+
+
+def test_hash_de_cada_rotulo_so_depende_das_categorias_que_o_decidem():
+    """Mudar uma categoria muda o hash dela, das seguintes e de 'Outros'; as anteriores mantêm o seu."""
+    base = compilar_categorias(CATEGORIAS)
+    alterada = compilar_categorias({**CATEGORIAS, "motivo_transporte": ["carro quebrou"]})
+    assert alterada.hash_de("Saude") == base.hash_de("Saude")
+    assert alterada.hash_de("Transporte") != base.hash_de("Transporte")
+    assert alterada.hash_de("Outros") != base.hash_de("Outros")
+    assert base.hash_de("Outros") not in {base.hash_de(r) for r in ("Saude", "Transporte")}
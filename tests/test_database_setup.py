@@ -0,0 +1,134 @@
+# Em tests/test_database_setup.py
+
+import sqlite3
+import pytest
+import database_setup
+from database_setup import get_db_connection, transacao
+
+
+def test_conexao_reutilizada_apos_close(db_path):
+    """Fechar a conexão devolve ao pool; a próxima chamada reaproveita a mesma."""
+    conn1 = get_db_connection(db_path)
+    conn1.close()
+    conn2 = get_db_connection(db_path)
+    assert conn2 is conn1
+    assert conn2.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn2.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    conn2.close()
+
+
+def test_conexoes_simultaneas_sao_distintas(db_path):
+    """Duas conexões em uso ao mesmo tempo nunca são a mesma instância."""
+    conn1 = get_db_connection(db_path)
+    conn2 = get_db_connection(db_path)
+    assert conn1 is not conn2
+    conn1.close()
+    conn2.close()
+
+
+def test_close_desfaz_transacao_pendente(db_path):
+    """Alterações sem commit não vazam para o próximo uso da conexão."""
+    conn = get_db_connection(db_path)
+    conn.execute("INSERT INTO itens (valor) VALUES ('a')")
+    conn.close()
+    conn = get_db_connection(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0] == 0
+    conn.close()
+
+
+def test_pool_limitado(db_path, monkeypatch):
+    """Conexões além do limite do pool são fechadas de fato."""
+    pool = database_setup._pool_para(db_path)
+    monkeypatch.setattr(pool, "tamanho_max", 1)
+    conn1 = get_db_connection(db_path)
+    conn2 = get_db_connection(db_path)
+    conn1.close()
+    conn2.close()
+    assert len(pool._ociosas) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn2.execute("SELECT 1")
+
+
+def test_transacao_commit_e_rollback(db_path):
+    """A transação confirma em caso de sucesso e desfaz tudo em caso de erro."""
+    with transacao(db_path) as conn:
+        conn.execute("INSERT INTO itens (valor) VALUES ('ok')")
+
+    with pytest.raises(RuntimeError):
+        with transacao(db_path) as conn:
+            conn.execute("INSERT INTO itens (valor) VALUES ('falha')")
+            raise RuntimeError("erro simulado")
+
+    conn = get_db_connection(db_path)
+    valores = [r["valor"] for r in conn.execute("SELECT valor FROM itens")]
+    conn.close()
+    assert valores == ["ok"]
+
+
+def test_conexao_leitura_somente_leitura(db_path):
+    """A conexão analítica lê o que foi gravado, tem cache/mmap maiores e recusa escritas."""
+    with transacao(db_path) as conn:
+        conn.execute("INSERT INTO itens (valor) VALUES ('a')")
+
+    conn = database_setup.get_db_connection_leitura(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0] == 1
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -database_setup.CACHE_LEITURA_KIB
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO itens (valor) VALUES ('b')")
+    finally:
+        conn.close()
+    assert database_setup.get_db_connection_leitura(db_path) is conn
+    conn.close()
+
+
+# --- resumo_diario mantido por triggers ---
+
+def _resumo(conn):
+    return sorted(tuple(r) for r in conn.execute("SELECT data, aluno_id, status, total FROM resumo_diario"))
+
+
+def _recalculado(conn):
+    return sorted(tuple(r) for r in conn.execute(
+        "SELECT data, aluno_id, status, COUNT(*) FROM chamadas GROUP BY data, aluno_id, status"
+    ))
+
+
+def test_triggers_mantem_resumo_diario(banco_temporario):
+    """INSERT, UPDATE (inclusive via upsert) e DELETE em chamadas mantêm o resumo igual ao GROUP BY."""
+    conn = get_db_connection(banco_temporario)
+    conn.executemany(
+        "INSERT INTO chamadas (aluno_id, data, horario, status) VALUES (?, ?, ?, ?)",
+        [(1, "2024-03-04", "08:00", "Faltou"), (1, "2024-03-04", "10:00", "Faltou"),
+         (2, "2024-03-04", "08:00", "Presente"), (3, "2024-03-05", "08:00", "Faltou")]
+    )
+    conn.commit()
+    assert _resumo(conn) == _recalculado(conn)
+    assert ("2024-03-04", 1, "Faltou", 2) in _resumo(conn)
+
+    conn.execute("""
+        INSERT INTO chamadas (aluno_id, data, horario, status) VALUES (1, '2024-03-04', '08:00', 'Presente')
+        ON CONFLICT (aluno_id, data, horario) DO UPDATE SET status = excluded.status
+    """)
+    conn.execute("UPDATE chamadas SET data = '2024-03-06' WHERE aluno_id = 3")
+    conn.execute("DELETE FROM chamadas WHERE aluno_id = 2")
+    conn.commit()
+    assert _resumo(conn) == _recalculado(conn)
+    conn.close()
+
+
+def test_reconstruir_resumo_diario(banco_temporario):
+    """A reconstrução completa (backfill) recupera um resumo apagado."""
+    conn = get_db_connection(banco_temporario)
+    conn.execute("INSERT INTO chamadas (aluno_id, data, horario, status) VALUES (1, '2024-03-04', '08:00', 'Faltou')")
+    conn.execute("DELETE FROM resumo_diario")
+    conn.commit()
+    conn.close()
+
+    with transacao(banco_temporario) as conn:
+        assert database_setup.reconstruir_resumo_diario(conn) == 1
+    conn = get_db_connection(banco_temporario)
+    assert _resumo(conn) == [("2024-03-04", 1, "Faltou", 1)]
+    conn.close()
@@ -1,21 +1,21 @@
 # Em tests/test_db_utils.py
 
+from datetime import date
+
+import pandas as pd
 import pytest
-from scripts.db_utils import classificar_justificativa
-
-# 1. Definir as categorias de exemplo que seriam carregadas do config.toml
-#    Isto simula a configuração real da sua aplicação para os testes.
-@pytest.fixture
-def categorias_config():
-    """Um pytest fixture que fornece uma configuração de categorias para os testes."""
-    return {
-        "motivo_saude": ["médico", "doente", "hospital", "dentista", "mal", "passando mal"],
-        "motivo_pessoal": ["problema pessoal", "familiar", "resolvendo"],
-        "motivo_transporte": ["ônibus", "onibus", "trânsito", "carro quebrou"],
-        "outros": []
-    }
 
-# 2. Escrever os testes para a função `classificar_justificativa`
+from scripts.db_utils import (
+    STATUS_PRESENCA, aplicar_correspondencias, atualizar_no_banco, buscar_aluno_id,
+    carregar_alunos_db, carregar_alunos_turma, carregar_faltas_por_periodo, carregar_horarios,
+    carregar_resumo_agregado, carregar_todas_faltas, carregar_turmas, classificar_justificativa,
+    geracao_dados, get_db_connection, importar_horarios, indice_nomes_alunos, normalizar_nome,
+    salvar_alunos_sponte_db, salvar_chamada_db, salvar_chamadas_lote, salvar_justificativas_lote,
+    sugerir_correspondencias, verificar_discrepancias
+)
+
+
+# --- Classificação de justificativas ---
 
 def test_classificar_justificativa_saude(categorias_config):
     """Verifica se justificativas relacionadas à saúde são classificadas corretamente."""
@@ -41,4 +41,312 @@ def test_classificar_justificativa_outros(categorias_config):
 def test_classificar_justificativa_texto_vazio_ou_na(categorias_config):
     """Verifica o comportamento com entradas vazias ou nulas."""
     assert classificar_justificativa("", categorias_config) == "Outros"
-    assert classificar_justificativa(None, categorias_config) == "Não Especificado"
\ No newline at end of file
+    assert classificar_justificativa(None, categorias_config) == "Não Especificado"
+
+
+# --- Gravação da chamada em lote ---
+
+def _chamadas(horario):
+    conn = get_db_connection()
+    linhas = conn.execute(
+        "SELECT aluno_id, status, professor_responsavel FROM chamadas WHERE horario = ? ORDER BY aluno_id",
+        (horario,)
+    ).fetchall()
+    conn.close()
+    return [tuple(l) for l in linhas]
+
+
+def test_salvar_chamadas_lote_insere_e_atualiza(banco_temporario):
+    """O lote insere a turma inteira e, numa segunda gravação, atualiza sem duplicar."""
+    dia = date(2024, 3, 4)
+    resultados = salvar_chamadas_lote([(1, "Presente"), (2, "Faltou")], dia, "08:00 às 09:00", "Prof A")
+    assert [r["acao"] for r in resultados] == ["inserido", "inserido"]
+    assert all(r["salvo"] for r in resultados)
+
+    resultados = salvar_chamadas_lote([(2, "Presente"), (3, "Faltou")], dia, "08:00 às 09:00", "Prof B")
+    assert [(r["aluno_id"], r["acao"]) for r in resultados] == [(2, "atualizado"), (3, "inserido")]
+
+    assert _chamadas("08:00 às 09:00") == [
+        (1, "Presente", "Prof A"),
+        (2, "Presente", "Prof B"),
+        (3, "Faltou", "Prof B"),
+    ]
+
+
+def test_salvar_chamadas_lote_aluno_repetido_vale_o_ultimo(banco_temporario):
+    """Um aluno repetido no lote é gravado uma vez, com o último status; a repetição conta como atualização."""
+    resultados = salvar_chamadas_lote([(1, "Faltou"), (2, "Presente"), (1, "Presente")], date(2024, 3, 4), "09:00 às 10:00", "Prof A")
+    assert [(r["aluno_id"], r["acao"]) for r in resultados] == [(1, "inserido"), (2, "inserido"), (1, "atualizado")]
+    assert _chamadas("09:00 às 10:00") == [(1, "Presente", "Prof A"), (2, "Presente", "Prof A")]
+
+
+def test_salvar_chamadas_lote_falha_desfaz_tudo(banco_temporario):
+    """Um aluno inexistente (violação de FK) faz o lote inteiro ser desfeito."""
+    resultados = salvar_chamadas_lote([(1, "Presente"), (999, "Faltou")], date(2024, 3, 4), "10:00 às 11:00", "Prof A")
+    assert not any(r["salvo"] for r in resultados)
+    assert resultados[1]["erro"]
+    assert _chamadas("10:00 às 11:00") == []
+
+
+def test_salvar_chamada_db_usa_upsert(banco_temporario):
+    """A gravação individual continua funcionando sobre a mesma chave única."""
+    dia = date(2024, 3, 5)
+    assert salvar_chamada_db(1, dia, "08:00 às 09:00", "Faltou", "Prof A")
+    assert salvar_chamada_db(1, dia, "08:00 às 09:00", "Presente", "Prof A")
+    assert _chamadas("08:00 às 09:00") == [(1, "Presente", "Prof A")]
+
+
+# --- Filtros de carregar_todas_faltas aplicados no SQL ---
+
+def test_carregar_todas_faltas_filtros_e_colunas(banco_temporario):
+    """Período, status, alunos e colunas projetadas são respeitados."""
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Presente")], date(2024, 3, 4), "08:00 às 09:00", "Prof")
+    salvar_chamadas_lote([(1, "Faltou"), (3, "Faltou")], date(2024, 4, 1), "08:00 às 09:00", "Prof")
+
+    df = carregar_todas_faltas()
+    assert len(df) == 4
+
+    df = carregar_todas_faltas(data_inicio=date(2024, 3, 1), data_fim=date(2024, 3, 31), colunas=["data", "status", "nome_aluno"])
+    assert list(df.columns) == ["data", "status", "nome_aluno"]
+    assert len(df) == 2
+
+    df = carregar_todas_faltas(status="Faltou", aluno_ids=[1], colunas=["aluno_id", "data"])
+    assert df["aluno_id"].tolist() == [1, 1]
+    assert df["data"].is_monotonic_decreasing
+
+    with pytest.raises(ValueError):
+        carregar_todas_faltas(colunas=["senha"])
+
+
+def test_carregar_todas_faltas_filtra_turma_por_dia_e_horario(banco_temporario):
+    """A turma é o par (dia, horário): o mesmo horário em outro dia da semana fica de fora."""
+    salvar_chamadas_lote([(1, "Faltou")], date(2024, 3, 4), "08:00 às 09:00", "Prof")  # segunda
+    salvar_chamadas_lote([(2, "Faltou")], date(2024, 3, 5), "08:00 às 09:00", "Prof")  # terça
+    salvar_chamadas_lote([(3, "Faltou")], date(2024, 3, 11), "10:00 às 11:00", "Prof")  # segunda
+
+    df = carregar_todas_faltas(turma=("SEGUNDA", "08:00 às 09:00"), colunas=["aluno_id"])
+    assert df["aluno_id"].tolist() == [1]
+    df = carregar_todas_faltas(turma=("TERÇA", "08:00 às 09:00"), colunas=["aluno_id"])
+    assert df["aluno_id"].tolist() == [2]
+    with pytest.raises(ValueError):
+        carregar_todas_faltas(turma=("FERIADO", "08:00 às 09:00"))
+
+
+def test_carregar_faltas_por_periodo_inclui_faltas_do_historico(banco_temporario):
+    """Faltas gravadas como 'F' (migradas do histórico) entram no período junto com as 'Faltou'."""
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Presente")], date(2024, 3, 4), "08:00 às 09:00", "Prof")
+    salvar_chamadas_lote([(3, "F")], date(2024, 3, 5), "08:00 às 09:00", "Prof")
+
+    df = carregar_faltas_por_periodo(date(2024, 3, 1), date(2024, 3, 31))
+    assert df["aluno_id"].tolist() == [3, 1]
+
+
+# --- Agregados lidos de resumo_diario ---
+
+def test_carregar_resumo_agregado(banco_temporario):
+    """Agregações por dia, mês e aluno batem com as chamadas gravadas."""
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Faltou"), (3, "Presente")], date(2024, 3, 4), "08:00 às 09:00", "Prof")
+    salvar_chamadas_lote([(1, "Faltou"), (3, "Presente")], date(2024, 4, 1), "08:00 às 09:00", "Prof")
+
+    por_dia = carregar_resumo_agregado("dia")
+    assert por_dia.values.tolist() == [["2024-03-04", 2], ["2024-04-01", 1]]
+
+    por_mes = carregar_resumo_agregado("mes", data_inicio=date(2024, 4, 1))
+    assert por_mes.values.tolist() == [["2024-04", 1]]
+
+    presencas = carregar_resumo_agregado("aluno", STATUS_PRESENCA, limite=1)
+    assert presencas[["nome_aluno", "total"]].values.tolist() == [["ALUNO TRES", 2]]
+
+
+def test_ranking_com_empates_no_limite(banco_temporario):
+    """Com com_empates, o limite é por posição: empatados com o último colocado entram juntos."""
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Faltou"), (3, "Faltou")], date(2024, 3, 4), "08:00 às 09:00", "Prof")
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Faltou")], date(2024, 3, 5), "08:00 às 09:00", "Prof")
+    salvar_chamadas_lote([(1, "Faltou")], date(2024, 3, 6), "08:00 às 09:00", "Prof")
+
+    top2 = carregar_resumo_agregado("aluno", limite=2, com_empates=True)
+    assert top2[["posicao", "nome_aluno", "total"]].values.tolist() == [[1, "ALUNO UM", 3], [2, "ALUNO DOIS", 2]]
+
+    salvar_chamadas_lote([(3, "Faltou")], date(2024, 3, 6), "09:00 às 10:00", "Prof")
+    top2 = carregar_resumo_agregado("aluno", limite=2, com_empates=True)
+    assert top2[["posicao", "nome_aluno", "total"]].values.tolist() == [
+        [1, "ALUNO UM", 3], [2, "ALUNO DOIS", 2], [2, "ALUNO TRES", 2]
+    ]
+    assert len(carregar_resumo_agregado("aluno", limite=2)) == 2
+
+
+# --- Cache de alunos invalidado pela geração de dados ---
+
+def test_cache_de_alunos_invalidado_por_escrita(banco_temporario):
+    """O roster em cache reflete imediatamente qualquer escrita em `alunos`, mesmo via SQL direto."""
+    df, _ = carregar_alunos_db()
+    assert len(df) == 3
+    geracao = geracao_dados("alunos")
+
+    df_cache, _ = carregar_alunos_db()
+    assert df_cache is not None and len(df_cache) == 3
+    assert geracao_dados("alunos") == geracao
+
+    salvar_alunos_sponte_db(["ALUNO QUATRO"])
+    assert geracao_dados("alunos") > geracao
+    df, _ = carregar_alunos_db()
+    assert "ALUNO QUATRO" in df["nome"].tolist()
+
+    conn = get_db_connection()
+    conn.execute("DELETE FROM alunos WHERE nome = 'ALUNO QUATRO'")
+    conn.commit()
+    conn.close()
+    df, _ = carregar_alunos_db()
+    assert len(df) == 3
+
+
+# --- Tipos compactos no carregamento de chamadas ---
+
+def test_carregar_todas_faltas_retorna_tipos_compactos(banco_temporario):
+    """status/professor viram category, ids int32, ligacao_feita bool e data datetime64."""
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Presente")], date(2024, 3, 4), "08:00 às 09:00", "Prof")
+
+    df = carregar_todas_faltas()
+    assert df["status"].dtype == "category"
+    assert df["professor_responsavel"].dtype == "category"
+    assert df["categoria_justificativa"].dtype == "category"
+    assert df["id"].dtype == "int32" and df["aluno_id"].dtype == "int32"
+    assert df["ligacao_feita"].dtype == bool
+    assert pd.api.types.is_datetime64_any_dtype(df["data"])
+
+
+# --- Justificativas em lote ---
+
+def test_salvar_justificativas_lote(banco_temporario, categorias_config):
+    """Atualiza faltas já registradas, insere as que faltam e classifica todas de uma vez."""
+    dia = date(2024, 3, 4)
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Presente")], dia, "08:00 às 09:00", "Prof A")
+
+    resultados = salvar_justificativas_lote(
+        [(1, "Foi ao médico", True), (3, "Perdeu o ônibus", False)], dia, "Prof B", categorias_config
+    )
+    assert [(r["aluno_id"], r["acao"], r["salvo"]) for r in resultados] == [(1, "atualizado", True), (3, "inserido", True)]
+
+    conn = get_db_connection()
+    linhas = conn.execute("""
+        SELECT aluno_id, horario, justificativa, ligacao_feita, categoria_justificativa, professor_responsavel
+        FROM chamadas WHERE status = 'Faltou' ORDER BY aluno_id
+    """).fetchall()
+    conn.close()
+    assert [tuple(l) for l in linhas] == [
+        (1, "08:00 às 09:00", "Foi ao médico", 1, "Saude", "Prof B"),
+        (3, None, "Perdeu o ônibus", 0, "Transporte", "Prof B"),
+    ]
+
+
+def test_salvar_justificativas_lote_aluno_repetido_vale_a_ultima(banco_temporario, categorias_config):
+    """Um aluno repetido no lote ganha uma só falta, com a última justificativa."""
+    dia = date(2024, 3, 6)
+    resultados = salvar_justificativas_lote(
+        [(3, "Perdeu o ônibus", False), (3, "Foi ao médico", True)], dia, "Prof B", categorias_config
+    )
+    assert [r["acao"] for r in resultados] == ["inserido", "atualizado"]
+
+    conn = get_db_connection()
+    linhas = conn.execute(
+        "SELECT justificativa, ligacao_feita, categoria_justificativa FROM chamadas WHERE aluno_id = 3 AND data = ?",
+        (dia.isoformat(),)
+    ).fetchall()
+    conn.close()
+    assert [tuple(l) for l in linhas] == [("Foi ao médico", 1, "Saude")]
+
+
+# --- Planilha de horários interpretada uma única vez ---
+
+def test_carregar_horarios_interpreta_todas_as_abas_com_cache(planilha_horarios, monkeypatch):
+    """Dia -> horário -> alunos, lido uma vez e relido só quando o arquivo muda."""
+    leituras = []
+    read_excel_original = pd.read_excel
+    monkeypatch.setattr(pd, "read_excel", lambda *a, **k: leituras.append(a) or read_excel_original(*a, **k))
+
+    horarios = carregar_horarios()
+    assert horarios == {
+        "SEGUNDA": {"08:00 às 09:00": ["ALUNO UM"], "09:00 às 10:00": ["ALUNO DOIS"]},
+        "TERÇA": {"10:00 às 11:00": ["ALUNO TRES"]},
+    }
+    assert carregar_horarios() == horarios
+    assert len(leituras) == 1
+
+    planilha_horarios(["ALUNO UM", "ALUNO QUATRO"])
+    assert carregar_horarios()["SEGUNDA"]["08:00 às 09:00"] == ["ALUNO UM", "ALUNO QUATRO"]
+    assert len(leituras) == 2
+
+
+# --- Turmas e matrículas importadas da planilha ---
+
+def test_importar_horarios_incremental(banco_temporario, planilha_horarios):
+    """A importação grava turmas/matrículas, não refaz nada sem mudanças e aplica só as diferenças."""
+    resultado = importar_horarios()
+    assert resultado["turmas_novas"] == 3 and resultado["matriculas_novas"] == 3
+    assert carregar_turmas() == {"SEGUNDA": ["08:00 às 09:00", "09:00 às 10:00"], "TERÇA": ["10:00 às 11:00"]}
+    assert carregar_alunos_turma("SEGUNDA", "08:00 às 09:00")["nome"].tolist() == ["ALUNO UM"]
+
+    assert importar_horarios() == {"importado": False, "sem_cadastro": [], "sem_cadastro_por_turma": {}}
+
+    planilha_horarios(["ALUNO TRES", "ALUNO QUATRO"])
+    resultado = importar_horarios()
+    assert (resultado["turmas_novas"], resultado["matriculas_novas"], resultado["matriculas_removidas"]) == (0, 1, 1)
+    assert resultado["sem_cadastro"] == ["ALUNO QUATRO"]
+    # Sem mudanças, os nomes sem cadastro continuam sendo informados para a tela de chamada
+    assert importar_horarios()["sem_cadastro_por_turma"] == {("SEGUNDA", "08:00 às 09:00"): ["ALUNO QUATRO"]}
+
+    # Um cadastro novo em `alunos` também dispara a sincronização
+    salvar_alunos_sponte_db(["ALUNO QUATRO"])
+    assert importar_horarios()["matriculas_novas"] == 1
+    assert carregar_alunos_turma("SEGUNDA", "08:00 às 09:00")["nome"].tolist() == ["ALUNO QUATRO", "ALUNO TRES"]
+
+
+# --- Índice de nomes normalizados ---
+
+def test_normalizar_nome():
+    """Acentos, caixa e espaços extras não importam; vazios viram ''."""
+    assert normalizar_nome("  João   da  Silva ") == "JOAO DA SILVA"
+    assert normalizar_nome("CONCEIÇÃO") == normalizar_nome("conceicao")
+    assert normalizar_nome(None) == ""
+    assert normalizar_nome(float("nan")) == ""
+
+
+def test_indice_nomes_por_geracao(banco_temporario):
+    """O índice é reaproveitado enquanto `alunos` não muda e reconstruído após escrita."""
+    indice = indice_nomes_alunos()
+    assert indice_nomes_alunos() is indice
+    assert buscar_aluno_id(" aluno  dois") == 2
+
+    assert salvar_alunos_sponte_db(["José Ávila", "JOSE AVILA", "aluno um"]) == 1
+    assert indice_nomes_alunos() is not indice
+    assert buscar_aluno_id("jose avila") == 4
+
+
+def test_atualizar_no_banco_localiza_pelo_indice(banco_temporario):
+    """O status de hoje é atualizado mesmo com o nome digitado sem acento/caixa."""
+    salvar_alunos_sponte_db(["Íris Conceição"])
+    aluno_id = buscar_aluno_id("IRIS CONCEICAO")
+    salvar_chamadas_lote([(aluno_id, "Faltou")], date.today(), "08:00 às 09:00", "Prof")
+
+    assert atualizar_no_banco("iris conceicao", "Presente")
+    assert not atualizar_no_banco("ALUNO INEXISTENTE", "Presente")
+    assert _chamadas("08:00 às 09:00") == [(aluno_id, "Presente", "Prof")]
+
+
+# --- Conciliação da planilha com o cadastro ---
+
+def test_conciliacao_sugere_e_aplica_em_lote(banco_temporario, planilha_horarios):
+    """Nomes digitados diferente recebem sugestões; aceitas, viram apelidos e entram nas turmas."""
+    planilha_horarios(["ALUNO UMM", "ALUNA DOIS"])
+    sugestoes = sugerir_correspondencias()
+    melhores = sugestoes[sugestoes["posicao"] == 1].set_index("nome")
+    assert melhores.loc["ALUNO UMM", "aluno_id"] == 1
+    assert melhores.loc["ALUNA DOIS", "nome_cadastro"] == "ALUNO DOIS"
+    assert sugestoes.groupby("nome")["pontuacao"].apply(lambda p: p.is_monotonic_decreasing).all()
+
+    assert aplicar_correspondencias(list(zip(melhores.index, melhores["aluno_id"]))) == 2
+    assert verificar_discrepancias().empty
+    assert buscar_aluno_id("aluno umm") == 1
+
+    importar_horarios()
+    assert carregar_alunos_turma("SEGUNDA", "08:00 às 09:00")["nome"].tolist() == ["ALUNO DOIS", "ALUNO UM"]
@@ -0,0 +1,80 @@
+# Em tests/test_fila_escrita.py
+
+import sqlite3
+import threading
+import pytest
+from database_setup import EscritaIndeterminada, FilaEscrita, fila_escrita, get_db_connection
+
+
+def test_fila_escrita_serializa_sessoes_concorrentes(db_path):
+    """Escritas de várias threads são todas gravadas, agrupadas em menos commits que operações."""
+    fila = fila_escrita(db_path)
+    commits = []
+    gravar_lote_original = fila._gravar_lote
+
+    def _gravar_lote_contando(conn, lote):
+        commits.append(len(lote))
+        gravar_lote_original(conn, lote)
+
+    fila._gravar_lote = _gravar_lote_contando
+    barreira = threading.Barrier(8)
+
+    def _sessao(n):
+        barreira.wait()
+        futuros = [
+            fila.enviar(lambda conn, v=f"{n}-{i}": conn.execute("INSERT INTO itens (valor) VALUES (?)", (v,)).lastrowid)
+            for i in range(25)
+        ]
+        assert all(f.result(timeout=10) for f in futuros)
+
+    threads = [threading.Thread(target=_sessao, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    conn = get_db_connection(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM itens").fetchone()[0] == 200
+    conn.close()
+    assert sum(commits) == 200
+    assert len(commits) < 200
+
+
+def test_fila_escrita_isola_operacao_com_erro(db_path):
+    """Uma operação que falha é desfeita sozinha; as demais do mesmo lote são gravadas."""
+    fila = fila_escrita(db_path)
+    bloqueio = threading.Event()
+    # A primeira operação segura a thread da fila para que as seguintes caiam no mesmo lote
+    primeira = fila.enviar(lambda conn: bloqueio.wait(5))
+    ok = fila.enviar(lambda conn: conn.execute("INSERT INTO itens (valor) VALUES ('ok')"))
+    falha = fila.enviar(lambda conn: conn.execute("INSERT INTO tabela_inexistente VALUES (1)"))
+    bloqueio.set()
+
+    primeira.result(timeout=5)
+    ok.result(timeout=5)
+    with pytest.raises(sqlite3.OperationalError):
+        falha.result(timeout=5)
+    assert fila.executar(lambda conn: conn.execute("SELECT valor FROM itens").fetchall())[0]["valor"] == "ok"
+
+
+def test_fila_escrita_tempo_esgotado_cancela_ou_avisa_resultado_incerto(db_path):
+    """Na fila, a escrita que esgotou o tempo é cancelada e nunca gravada; já em execução, o resultado é incerto."""
+    fila = FilaEscrita(db_path, timeout=0.2)
+    bloqueio = threading.Event()
+    try:
+        ocupada = fila.enviar(lambda conn: bloqueio.wait(5))
+        with pytest.raises(sqlite3.OperationalError) as erro:
+            fila.executar(lambda conn: conn.execute("INSERT INTO itens (valor) VALUES ('cancelada')"))
+        assert not isinstance(erro.value, EscritaIndeterminada)
+        bloqueio.set()
+        ocupada.result(timeout=5)
+
+        bloqueio.clear()
+        with pytest.raises(EscritaIndeterminada):
+            fila.executar(lambda conn: bloqueio.wait(5) and conn.execute("INSERT INTO itens (valor) VALUES ('lenta')"))
+        bloqueio.set()
+        valores = fila.executar(lambda conn: [r["valor"] for r in conn.execute("SELECT valor FROM itens")])
+        assert valores == ["lenta"]
+    finally:
+        bloqueio.set()
+        fila.parar()
@@ -0,0 +1,71 @@
+# Em tests/test_migracoes.py
+
+import logging
+import sqlite3
+import pytest
+import database_setup
+from database_setup import (
+    VERSAO_SCHEMA, aplicar_migracoes, esquema_atualizado, fechar_conexoes, get_db_connection, versao_schema
+)
+
+
+def test_migracoes_banco_novo_e_idempotencia(tmp_path):
+    """Um banco novo chega à versão atual; uma segunda execução não aplica nada."""
+    caminho = tmp_path / "novo.db"
+    assert not esquema_atualizado(caminho)
+    assert aplicar_migracoes(caminho) == VERSAO_SCHEMA
+    assert versao_schema(caminho) == VERSAO_SCHEMA
+    assert esquema_atualizado(caminho)
+    assert aplicar_migracoes(caminho) == 0
+    fechar_conexoes(caminho)
+
+
+def test_migracao_banco_legado_remove_duplicatas(tmp_path, caplog):
+    """Bancos antigos (user_version 0) com chamadas duplicadas: fica a última gravada e a remoção vai para o log."""
+    caminho = tmp_path / "legado.db"
+    conn = sqlite3.connect(caminho)
+    conn.executescript("""
+        CREATE TABLE alunos (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                             nome_responsavel TEXT, telefone_responsavel TEXT);
+        CREATE TABLE chamadas (id INTEGER PRIMARY KEY AUTOINCREMENT, aluno_id INTEGER NOT NULL, data TEXT NOT NULL,
+                               horario TEXT, status TEXT NOT NULL, justificativa TEXT, ligacao_feita BOOLEAN DEFAULT FALSE,
+                               professor_responsavel TEXT, categoria_justificativa TEXT);
+        INSERT INTO alunos (nome) VALUES ('ALUNO');
+        INSERT INTO chamadas (id, aluno_id, data, horario, status) VALUES (5, 1, '2024-03-04', '08:00', 'Faltou');
+        INSERT INTO chamadas (id, aluno_id, data, horario, status) VALUES (9, 1, '2024-03-04', '08:00', 'Presente');
+        INSERT INTO chamadas (id, aluno_id, data, horario, status) VALUES (7, 1, '2024-03-04', '08:00', 'Atrasado');
+        INSERT INTO chamadas (id, aluno_id, data, horario, status) VALUES (8, 1, '2024-03-05', '08:00', 'Faltou');
+    """)
+    conn.close()
+
+    with caplog.at_level(logging.WARNING):
+        aplicar_migracoes(caminho)
+    conn = get_db_connection(caminho)
+    linhas = conn.execute("SELECT id, data, status FROM chamadas ORDER BY id").fetchall()
+    conn.close()
+    fechar_conexoes(caminho)
+    # Fica o maior id (9, o último gravado), mesmo inserido antes do 7
+    assert [tuple(l) for l in linhas] == [(8, "2024-03-05", "Faltou"), (9, "2024-03-04", "Presente")]
+    avisos = [r.getMessage() for r in caplog.records if r.levelno == logging.WARNING]
+    assert any("Removendo 2 chamada(s) duplicada(s) em 1 chave(s)" in a and "(1, 2024-03-04, 08:00)" in a for a in avisos)
+
+
+def test_migracao_com_erro_e_desfeita(tmp_path, monkeypatch):
+    """Uma migração que falha não grava nada nem avança a versão."""
+    caminho = tmp_path / "falha.db"
+
+    def _migracao_quebrada(conn):
+        conn.execute("CREATE TABLE temporaria (id INTEGER)")
+        raise sqlite3.OperationalError("falha simulada")
+
+    monkeypatch.setattr(database_setup, "MIGRACOES", database_setup.MIGRACOES + [(99, "quebrada", _migracao_quebrada)])
+    monkeypatch.setattr(database_setup, "VERSAO_SCHEMA", 99)
+    with pytest.raises(sqlite3.OperationalError):
+        aplicar_migracoes(caminho)
+
+    assert versao_schema(caminho) == VERSAO_SCHEMA
+    conn = get_db_connection(caminho)
+    tabelas = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    fechar_conexoes(caminho)
+    assert "temporaria" not in tabelas
@@ -0,0 +1,56 @@
+# Em tests/test_migrate_to_db.py
+
+import shutil
+
+import pandas as pd
+import migrate_to_db
+from database_setup import get_db_connection
+
+
+def _escrever_historico(caminho, linhas):
+    """Planilha no formato do histórico: 5 linhas de cabeçalho livre e a tabela a partir da 6ª."""
+    topo = pd.DataFrame([["Chamada diária"]] + [[None]] * 4)
+    tabela = pd.DataFrame(linhas, columns=["NOME", "DATA", "RELATO", "PROFESSOR"])
+    with pd.ExcelWriter(caminho) as writer:
+        topo.to_excel(writer, header=False, index=False)
+        tabela.to_excel(writer, startrow=5, index=False)
+
+
+def test_migrar_historico_de_varias_planilhas(banco_temporario, tmp_path, monkeypatch):
+    """Cada planilha é lida à parte; uma planilha inválida não impede as outras e cada aluno tem uma falta por dia."""
+    _escrever_historico(tmp_path / "chamada_diaria.xlsx", [
+        ["Aluno Um", "2024-03-04", "Doente", "Prof A"],
+        ["ALUNO UM", "2024-03-04", "Repetida", "Prof A"],
+        ["ALUNO INEXISTENTE", "2024-03-04", None, None],
+    ])
+    _escrever_historico(tmp_path / "chamada_diaria_2023.xlsx", [["aluno dois", "2023-11-10", None, "Prof B"]])
+    pd.DataFrame({"X": [1]}).to_excel(tmp_path / "chamada_diaria_quebrada.xlsx", index=False)
+    monkeypatch.setattr(migrate_to_db, "DATA_DIR", tmp_path)
+
+    arquivos = migrate_to_db.arquivos_historico()
+    assert [a.name for a in arquivos] == ["chamada_diaria.xlsx", "chamada_diaria_2023.xlsx"]
+    arquivos.append(tmp_path / "chamada_diaria_quebrada.xlsx")
+    assert migrate_to_db.migrar_historico_chamadas(arquivos, max_processos=1) == 2
+    # Rodar de novo não duplica
+    assert migrate_to_db.migrar_historico_chamadas(max_processos=1) == 0
+
+    conn = get_db_connection()
+    linhas = conn.execute("SELECT aluno_id, data, status, justificativa FROM chamadas ORDER BY data").fetchall()
+    conn.close()
+    assert [tuple(l) for l in linhas] == [(2, "2023-11-10", "F", None), (1, "2024-03-04", "F", "Doente")]
+
+
+def test_arquivos_historico_reconhece_o_conteudo_na_copia_de_data(tmp_path, monkeypatch):
+    """Os arquivos reais de data/ (nomes hexadecimais, sem extensão) são classificados pelo conteúdo.
+
+    Os de lá são cópias da planilha de horários (abas SEGUNDA...SABADO), não históricos; um
+    histórico exportado com o mesmo tipo de nome é encontrado.
+    """
+    copia = tmp_path / "data"
+    shutil.copytree(migrate_to_db.DATA_DIR, copia)
+    _escrever_historico(copia / "7A3F0100", [["Aluno Um", "2024-03-04", None, "Prof A"]])
+    monkeypatch.setattr(migrate_to_db, "DATA_DIR", copia)
+
+    assert [a.name for a in migrate_to_db.arquivos_historico()] == ["7A3F0100"]
+    assert not migrate_to_db.eh_planilha_historico(copia / "0399C100")
+    assert not migrate_to_db.eh_planilha_historico(copia / "attendance.db")
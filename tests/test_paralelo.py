@@ -0,0 +1,36 @@
+# Em tests/test_paralelo.py
+
+import pytest
+from scripts import paralelo
+from scripts.paralelo import mapear_em_processos, processos_para, encerrar_pool
+
+
+@pytest.fixture(autouse=True)
+def _encerrar_pool():
+    yield
+    encerrar_pool()
+
+
+def test_processos_para_e_limitado(monkeypatch):
+    """Nunca mais processos que itens, nem que o teto/núcleos; 1 significa execução em série."""
+    monkeypatch.setattr(paralelo.os, "cpu_count", lambda: 16)
+    assert processos_para(10) == paralelo.MAX_PROCESSOS
+    assert processos_para(2) == 2
+    assert processos_para(0) == 1
+    assert processos_para(10, max_processos=1) == 1
+    monkeypatch.setattr(paralelo.os, "cpu_count", lambda: 1)
+    assert processos_para(10) == 1
+
+
+def test_mapear_em_serie_sem_pool():
+    """Com um único processo, nada de pool é criado."""
+    assert mapear_em_processos(abs, [-3, 1, -2], max_processos=1) == [3, 1, 2]
+    assert paralelo._executor is None
+
+
+def test_pool_preserva_ordem_e_resultado():
+    """Resultados do pool chegam na ordem dos itens e iguais à execução em série."""
+    em_serie = mapear_em_processos(abs, range(-20, 0), max_processos=1)
+    no_pool = mapear_em_processos(abs, range(-20, 0), max_processos=2)
+    assert paralelo._executor is not None
+    assert no_pool == em_serie == list(range(20, 0, -1))
@@ -0,0 +1,118 @@
+# Em tests/test_planilha_horarios.py
+
+import os
+import time
+
+import pandas as pd
+from conftest import escrever_planilha_horarios
+from scripts import planilha_horarios
+from scripts.db_utils import verificar_discrepancias
+from scripts.planilha_horarios import (
+    VigiaPlanilha,
+    caminho_cache,
+    carregar_horarios_com_cache,
+    localizar_cabecalho,
+    interpretar_aba,
+    interpretar_planilha,
+    ler_cache_horarios,
+    nomes_da_planilha,
+)
+
+
+def _aba():
+    return pd.DataFrame([
+        ["SEGUNDA-FEIRA", None, None, None, None],
+        [None, "08:00 às 09:00", "09:00 ÀS 10:00", "08:00 às 09:00", "Obs."],
+        [None, " Ana ", "PC em manutenção", "Duplicado", "x"],
+        [None, "Bruno", None, None, None],
+        [None, None, 42, None, None],
+    ])
+
+
+def test_localizar_cabecalho():
+    """O cabeçalho é a primeira linha com horário; sem horários, -1."""
+    assert localizar_cabecalho(_aba()) == 1
+    assert localizar_cabecalho(pd.DataFrame([["a", "b"]])) == -1
+    assert localizar_cabecalho(pd.DataFrame()) == -1
+
+
+def test_interpretar_aba():
+    """Nomes aparados, vazios e 'PC EM MANUTENÇÃO' descartados, horário repetido usa a primeira coluna."""
+    assert interpretar_aba(_aba()) == {
+        "08:00 às 09:00": ["Ana", "Bruno"],
+        "09:00 ÀS 10:00": ["42"],
+    }
+
+
+def test_interpretar_planilha_e_nomes():
+    """Abas auxiliares e abas sem horários são ignoradas; nomes saem em maiúsculas."""
+    horarios = interpretar_planilha({
+        "SEGUNDA": _aba(),
+        "Planilha1": _aba(),
+        "NOTAS": pd.DataFrame([["sem horários"]]),
+    })
+    assert list(horarios) == ["SEGUNDA"]
+    assert nomes_da_planilha(horarios) == {"ANA", "BRUNO", "42"}
+
+
+def test_verificar_discrepancias_usa_a_mesma_leitura(banco_temporario, planilha_horarios):
+    """Nomes da planilha (todas as abas) sem cadastro aparecem; 'PC EM MANUTENÇÃO' não."""
+    planilha_horarios(["ALUNO UM", "ALUNO QUATRO"])
+    assert verificar_discrepancias()["nome"].tolist() == ["ALUNO QUATRO"]
+
+
+# --- Cache em disco ---
+
+def _contar_leituras(monkeypatch):
+    leituras = []
+    ler_original = planilha_horarios.ler_planilha_horarios
+    monkeypatch.setattr(planilha_horarios, "ler_planilha_horarios", lambda c: leituras.append(c) or ler_original(c))
+    return leituras
+
+
+def test_cache_em_disco_validado_por_hash(tmp_path, monkeypatch):
+    """O cache sobrevive a mudanças de mtime sem mudança de conteúdo e é refeito quando o conteúdo muda."""
+    caminho = tmp_path / "horarios.xlsx"
+    escrever_planilha_horarios(caminho)
+    leituras = _contar_leituras(monkeypatch)
+
+    horarios = carregar_horarios_com_cache(caminho)
+    assert caminho_cache(caminho).exists()
+    assert carregar_horarios_com_cache(caminho) == horarios
+    os.utime(caminho, ns=(0, 0))
+    assert carregar_horarios_com_cache(caminho) == horarios
+    assert len(leituras) == 1
+
+    escrever_planilha_horarios(caminho, ["ALUNO QUATRO", None])
+    assert carregar_horarios_com_cache(caminho)["SEGUNDA"]["08:00 às 09:00"] == ["ALUNO QUATRO"]
+    assert len(leituras) == 2
+
+
+def test_cache_corrompido_e_refeito(tmp_path):
+    """Um cache ilegível é ignorado e regravado."""
+    caminho = tmp_path / "horarios.xlsx"
+    escrever_planilha_horarios(caminho)
+    caminho_cache(caminho).write_text("{ não é json")
+    assert ler_cache_horarios(caminho) is None
+    assert "SEGUNDA" in carregar_horarios_com_cache(caminho)
+    assert ler_cache_horarios(caminho) is not None
+
+
+def test_vigia_reconstroi_cache_em_segundo_plano(tmp_path):
+    """Depois que a planilha muda, o vigia refaz o cache sem que ninguém precise pedir."""
+    caminho = tmp_path / "horarios.xlsx"
+    escrever_planilha_horarios(caminho)
+    carregar_horarios_com_cache(caminho)
+    hash_antigo = ler_cache_horarios(caminho)[0]
+
+    vigia = VigiaPlanilha(caminho, intervalo=0.02).iniciar()
+    try:
+        time.sleep(0.05)
+        escrever_planilha_horarios(caminho, ["ALUNO QUATRO", None])
+        os.utime(caminho, ns=(10**18, 10**18))
+        limite = time.monotonic() + 5
+        while ler_cache_horarios(caminho)[0] == hash_antigo and time.monotonic() < limite:
+            time.sleep(0.02)
+    finally:
+        vigia.parar()
+    assert ler_cache_horarios(caminho)[1]["SEGUNDA"]["08:00 às 09:00"] == ["ALUNO QUATRO"]
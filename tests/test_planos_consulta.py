@@ -0,0 +1,175 @@
+# Em tests/test_planos_consulta.py
+
+import inspect
+import re
+from datetime import date
+
+import pytest
+import database_setup
+from scripts import db_utils
+
+# Linhas do EXPLAIN QUERY PLAN que indicam varredura completa de tabela, inclusive
+# percorrendo um índice inteiro ("SCAN alunos USING INDEX ...") em vez de buscar nele.
+# Só não contam as varreduras de índices parciais, que leem apenas as linhas do WHERE do índice.
+SCAN_COMPLETO = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?( USING (COVERING )?INDEX (?P<indice>\w+))?$")
+
+# Consultas que leem uma tabela inteira de propósito (SQL normalizado, casado por inteiro)
+VARREDURAS_PERMITIDAS = {
+    # Índice de nomes normalizados (ler_indice_nomes) e índice de trigramas da conciliação:
+    # todos os alunos entram no dicionário em memória
+    r"SELECT id, nome FROM alunos": "índice de nomes/trigramas em memória",
+    # Duplicatas na importação do Sponte e apelidos que já são nomes cadastrados:
+    # o conjunto de nomes normalizados não tem índice no banco
+    r"SELECT nome FROM alunos": "conjunto de nomes normalizados",
+    # Lista de alunos da tela (carregar_alunos_db), em ordem alfabética
+    r"SELECT id, nome, nome_responsavel, telefone_responsavel FROM alunos ORDER BY nome COLLATE NOCASE":
+        "lista completa de alunos",
+    # Apelidos aceitos entram inteiros no índice de nomes
+    r"SELECT apelido, aluno_id FROM apelidos_alunos": "apelidos no índice de nomes",
+    # Sem nenhum filtro, carregar_todas_faltas devolve o histórico inteiro por pedido explícito
+    r"SELECT c\.id AS id, .* FROM chamadas c JOIN alunos a ON c\.aluno_id = a\.id ORDER BY c\.data DESC":
+        "histórico completo sem filtros",
+    # Feriados: tabela pequena, lida inteira para a tela e para as aulas previstas
+    r"SELECT data(, descricao)? FROM feriados( ORDER BY data)?": "todos os feriados",
+    # Importação da planilha: turmas e matrículas existentes são comparadas com as desejadas
+    r"SELECT id, dia, horario FROM turmas": "mapa de turmas existentes",
+    r"SELECT m\.turma_id, m\.aluno_id FROM turmas t JOIN matriculas m ON m\.turma_id = t\.id":
+        "matrículas existentes",
+    # carregar_turmas lista todos os dias e horários cadastrados (ordenados em Python)
+    r"SELECT dia, horario FROM turmas": "todas as turmas",
+}
+
+
+def _chamar_todas_as_consultas():
+    """Executa cada função de db_utils que acessa o banco, com dados suficientes para passar por todos os ramos."""
+    hoje = date.today()
+    return {
+        "_carregar_alunos_db_cache": lambda: db_utils.carregar_alunos_db(),
+        "_indice_nomes_alunos_cache": lambda: db_utils.indice_nomes_alunos(),
+        "salvar_chamadas_lote": lambda: db_utils.salvar_chamadas_lote([(1, "Faltou"), (2, "Presente")], hoje, "08:00 às 09:00", "Prof"),
+        "salvar_chamada_db": lambda: db_utils.salvar_chamada_db(3, hoje, "08:00 às 09:00", "Faltou", "Prof"),
+        "salvar_justificativa_db": lambda: db_utils.salvar_justificativa_db(1, hoje, "Consulta médica", "Prof", True, {"motivo_saude": ["médic"]}),
+        "salvar_justificativas_lote": lambda: db_utils.salvar_justificativas_lote(
+            [(1, "Febre", True), (2, "Ônibus atrasou", False)], hoje, "Prof", {"motivo_saude": ["febre"]}
+        ),
+        "reclassificar_justificativas": lambda: (
+            db_utils.reclassificar_justificativas({"motivo_transporte": ["ônibus"]}),
+            db_utils.reclassificar_justificativas({"motivo_transporte": ["ônibus"]}),
+        ),
+        "existem_justificativas_pendentes": lambda: db_utils.existem_justificativas_pendentes({"motivo_transporte": ["ônibus"]}),
+        "carregar_todas_faltas": lambda: (
+            db_utils.carregar_todas_faltas(),
+            db_utils.carregar_todas_faltas(data_inicio=hoje, data_fim=hoje, colunas=["data", "status", "nome_aluno"]),
+            db_utils.carregar_todas_faltas(status="Faltou", colunas=["data", "nome_aluno"]),
+            db_utils.carregar_todas_faltas(data_inicio=hoje, status="Faltou", aluno_ids=[1, 2], turma=("SEGUNDA", "08:00 às 09:00")),
+            db_utils.carregar_todas_faltas(turma=("SEGUNDA", "08:00 às 09:00"), colunas=["data", "status", "nome_aluno"]),
+        ),
+        "carregar_resumo_agregado": lambda: (
+            db_utils.carregar_resumo_agregado("dia", data_inicio=hoje, data_fim=hoje),
+            db_utils.carregar_resumo_agregado("mes"),
+            db_utils.carregar_resumo_agregado("aluno", db_utils.STATUS_PRESENCA, limite=5),
+            db_utils.carregar_resumo_agregado("aluno", limite=10, com_empates=True),
+        ),
+        "carregar_faltas_por_periodo": lambda: db_utils.carregar_faltas_por_periodo(hoje, hoje, ["saude"]),
+        "salvar_alunos_sponte_db": lambda: db_utils.salvar_alunos_sponte_db(["ALUNO NOVO"]),
+        "atualizar_no_banco": lambda: db_utils.atualizar_no_banco("ALUNO UM", "Presente"),
+        "verificar_discrepancias": lambda: db_utils.verificar_discrepancias(),
+        "salvar_lembrete": lambda: db_utils.salvar_lembrete(1, "Trazer documento", "Prof"),
+        "carregar_lembretes_aluno": lambda: db_utils.carregar_lembretes_aluno(1),
+        "salvar_comportamento": lambda: db_utils.salvar_comportamento(1, "Elogio", "Participou", hoje.isoformat(), "Prof"),
+        "carregar_comportamento_aluno": lambda: db_utils.carregar_comportamento_aluno(1),
+        "get_student_history": lambda: db_utils.get_student_history(1),
+        "importar_horarios": lambda: db_utils.importar_horarios(forcar=True),
+        "carregar_turmas": lambda: db_utils.carregar_turmas(),
+        "carregar_alunos_turma": lambda: db_utils.carregar_alunos_turma("SEGUNDA", "08:00 às 09:00"),
+        "_indice_trigramas_cache": lambda: db_utils.sugerir_correspondencias(),
+        "aplicar_correspondencias": lambda: db_utils.aplicar_correspondencias([("ALUNO 1", 1)]),
+        "salvar_feriado": lambda: db_utils.salvar_feriado(hoje, "Feriado"),
+        "remover_feriado": lambda: db_utils.remover_feriado(hoje),
+        "carregar_feriados": lambda: db_utils.carregar_feriados(),
+        "atualizar_sequencias_faltas": lambda: db_utils.atualizar_sequencias_faltas(),
+        "carregar_sequencias_faltas": lambda: db_utils.carregar_sequencias_faltas(minimo=1),
+    }
+
+
+def _funcoes_que_acessam_o_banco():
+    """Funções definidas em db_utils cujo código abre conexão, transação ou usa a fila de escrita."""
+    nomes = set()
+    for nome, obj in vars(db_utils).items():
+        func = inspect.unwrap(obj) if callable(obj) else None
+        if not inspect.isfunction(func) or func.__module__ != db_utils.__name__:
+            continue
+        if nome in {"get_db_connection", "get_db_connection_leitura", "transacao", "executar_escrita"}:
+            continue
+        fonte = inspect.getsource(func)
+        chamadas = ("get_db_connection()", "get_db_connection_leitura()", "transacao()", "executar_escrita(")
+        if any(chamada in fonte for chamada in chamadas):
+            nomes.add(nome)
+    return nomes
+
+
+@pytest.fixture
+def sql_executado(banco_temporario, monkeypatch):
+    """Registra todo SQL executado pelas conexões dos pools (escrita e leitura) do banco temporário."""
+    comandos = []
+    for somente_leitura in (False, True):
+        pool = database_setup._pool_para(banco_temporario, somente_leitura)
+        for conn in pool._ociosas:
+            conn.set_trace_callback(comandos.append)
+
+        def _abrir_com_trace(abrir_original=pool._abrir):
+            conn = abrir_original()
+            conn.set_trace_callback(comandos.append)
+            return conn
+
+        monkeypatch.setattr(pool, "_abrir", _abrir_com_trace)
+    return comandos
+
+
+def test_todas_as_funcoes_com_sql_sao_cobertas():
+    """Toda função nova de db_utils que consulta o banco deve entrar na verificação de planos."""
+    assert _funcoes_que_acessam_o_banco() <= set(_chamar_todas_as_consultas())
+
+
+def test_nenhuma_consulta_faz_varredura_completa(banco_temporario, planilha_horarios, sql_executado):
+    """Roda EXPLAIN QUERY PLAN em cada consulta emitida por db_utils e falha em qualquer varredura completa.
+
+    Percorrer um índice inteiro também conta; só passam as consultas de VARREDURAS_PERMITIDAS.
+    """
+    for chamar in _chamar_todas_as_consultas().values():
+        chamar()
+
+    consultas = {
+        sql.strip() for sql in sql_executado
+        if re.match(r"\s*(SELECT|UPDATE|DELETE|INSERT|WITH)\b", sql, re.IGNORECASE)
+    }
+    assert consultas
+
+    conn = database_setup.get_db_connection(banco_temporario)
+    try:
+        indices_parciais = {
+            row["name"] for row in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'")
+            if row["sql"] and re.search(r"\bWHERE\b", row["sql"], re.IGNORECASE)
+        }
+        varreduras = []
+        permitidas_usadas = set()
+        for sql in consultas:
+            normalizado = " ".join(sql.split())
+            permitidas = {p for p in VARREDURAS_PERMITIDAS if re.fullmatch(p, normalizado)}
+            if permitidas:
+                permitidas_usadas |= permitidas
+                continue
+            for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+                detalhe = linha["detail"]
+                varredura = SCAN_COMPLETO.match(detalhe)
+                if varredura and varredura["indice"] not in indices_parciais:
+                    varreduras.append((detalhe, normalizado))
+    finally:
+        conn.close()
+
+    assert permitidas_usadas == set(VARREDURAS_PERMITIDAS), (
+        f"Varreduras permitidas que nenhuma consulta usa mais: {set(VARREDURAS_PERMITIDAS) - permitidas_usadas}"
+    )
+    assert not varreduras, "Consultas com varredura completa de tabela:\n" + "\n".join(
+        f"{detalhe}: {sql}" for detalhe, sql in varreduras
+    )
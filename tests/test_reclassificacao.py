@@ -0,0 +1,112 @@
+# Em tests/test_reclassificacao.py
+
+from datetime import date
+
+from scripts import db_utils
+from scripts.categorias import compilar_categorias
+from scripts.db_utils import (
+    existem_justificativas_pendentes, get_db_connection, reclassificar_em_segundo_plano, reclassificar_justificativas,
+    salvar_justificativas_lote
+)
+
+
+def _categorias_gravadas():
+    conn = get_db_connection()
+    try:
+        return {
+            row["aluno_id"]: (row["categoria_justificativa"], row["categoria_hash"])
+            for row in conn.execute("SELECT aluno_id, categoria_justificativa, categoria_hash FROM chamadas")
+        }
+    finally:
+        conn.close()
+
+
+def test_reclassificar_so_o_que_falta_ou_mudou(banco_temporario, categorias_config):
+    """Sem categoria ou com hash de outra configuração, a justificativa é reclassificada; em dia, nada é lido."""
+    salvar_justificativas_lote([(1, "Foi ao médico", False), (2, "Perdeu o onibus", False)], date(2024, 5, 6), "Prof")
+    assert _categorias_gravadas()[1] == (None, None)
+
+    assert reclassificar_justificativas(categorias_config) == {"verificadas": 2, "alteradas": 2}
+    classificador = compilar_categorias(categorias_config)
+    assert _categorias_gravadas() == {
+        1: ("Saude", classificador.hash_de("Saude")), 2: ("Transporte", classificador.hash_de("Transporte"))
+    }
+    assert reclassificar_justificativas(categorias_config) == {"verificadas": 0, "alteradas": 0}
+
+    # Gravada já com a configuração: entra com o hash do rótulo e o job não a revisita
+    salvar_justificativas_lote([(3, "Hospital", False)], date(2024, 5, 6), "Prof", categorias_config)
+    assert _categorias_gravadas()[3] == ("Saude", classificador.hash_de("Saude"))
+    assert reclassificar_justificativas(categorias_config)["verificadas"] == 0
+
+    # Mudar Transporte não afeta o que Saude (anterior a ela) decidiu
+    novas = {**categorias_config, "motivo_transporte": ["carro quebrou"]}
+    assert reclassificar_justificativas(novas) == {"verificadas": 1, "alteradas": 1}
+    gravadas = _categorias_gravadas()
+    assert gravadas[2] == ("Outros", compilar_categorias(novas).hash_de("Outros"))
+    assert gravadas[1] == gravadas[3] == ("Saude", classificador.hash_de("Saude"))
+
+    # Uma categoria nova no fim pode capturar o que era 'Outros', mas não o resto
+    com_escola = {**novas, "motivo_escola": ["onibus"]}
+    assert reclassificar_justificativas(com_escola) == {"verificadas": 1, "alteradas": 1}
+    assert _categorias_gravadas()[2][0] == "Escola"
+
+
+def test_reclassificar_em_segundo_plano_roda_uma_vez_por_configuracao(banco_temporario, categorias_config, monkeypatch):
+    """Reexecuções do app com a mesma configuração reaproveitam a thread; uma configuração nova dispara outra."""
+    chamadas = []
+    monkeypatch.setattr(db_utils, "_reclassificacoes", {})
+    monkeypatch.setattr(
+        db_utils, "reclassificar_justificativas",
+        lambda config: chamadas.append(config) or {"verificadas": 0, "alteradas": 0}
+    )
+
+    primeira = reclassificar_em_segundo_plano(categorias_config)
+    assert reclassificar_em_segundo_plano(dict(categorias_config)) is primeira
+    primeira.join()
+    segunda = reclassificar_em_segundo_plano({**categorias_config, "motivo_escola": ["aula"]})
+    segunda.join()
+    assert segunda is not primeira
+    assert len(chamadas) == 2
+
+
+def test_reclassificar_em_segundo_plano_refaz_depois_de_falha(banco_temporario, categorias_config, monkeypatch):
+    """Uma execução que falhou não conta como feita: a chamada seguinte dispara outra thread."""
+    chamadas = []
+
+    def _falha_na_primeira(config):
+        chamadas.append(config)
+        if len(chamadas) == 1:
+            raise RuntimeError("banco indisponível")
+        return reclassificar_justificativas(config)
+
+    monkeypatch.setattr(db_utils, "_reclassificacoes", {})
+    monkeypatch.setattr(db_utils, "reclassificar_justificativas", _falha_na_primeira)
+    salvar_justificativas_lote([(1, "Foi ao médico", False)], date(2024, 5, 6), "Prof")
+
+    primeira = reclassificar_em_segundo_plano(categorias_config)
+    primeira.join()
+    assert db_utils._reclassificacoes == {}
+    assert existem_justificativas_pendentes(categorias_config)
+
+    segunda = reclassificar_em_segundo_plano(categorias_config)
+    segunda.join()
+    assert segunda is not primeira
+    assert _categorias_gravadas()[1][0] == "Saude"
+    assert not existem_justificativas_pendentes(categorias_config)
+    assert reclassificar_em_segundo_plano(categorias_config) is segunda
+    assert len(chamadas) == 2
+
+
+def test_reclassificar_em_segundo_plano_confere_pendentes(banco_temporario, categorias_config, monkeypatch):
+    """Depois de uma execução bem-sucedida, justificativas sem categoria gravadas depois disparam outra."""
+    monkeypatch.setattr(db_utils, "_reclassificacoes", {})
+    primeira = reclassificar_em_segundo_plano(categorias_config)
+    primeira.join()
+    assert reclassificar_em_segundo_plano(categorias_config) is primeira
+
+    # Gravada sem configuração (como faria outro processo): fica pendente
+    salvar_justificativas_lote([(2, "Perdeu o onibus", False)], date(2024, 5, 6), "Prof")
+    segunda = reclassificar_em_segundo_plano(categorias_config)
+    segunda.join()
+    assert segunda is not primeira
+    assert _categorias_gravadas()[2][0] == "Transporte"
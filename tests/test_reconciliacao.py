@@ -0,0 +1,64 @@
+# Em tests/test_reconciliacao.py
+
+from scripts.reconciliacao import IndiceTrigramas, trigramas
+
+
+def test_trigramas_por_palavra():
+    """Cada palavra gera seus trigramas com margens; palavras repetidas não duplicam."""
+    assert trigramas("ANA") == {"  A", " AN", "ANA", "NA "}
+    assert trigramas("ANA ANA") == trigramas("ANA")
+    assert trigramas("") == frozenset()
+
+
+def test_busca_ordena_por_pontuacao():
+    """Erros de digitação e palavras faltando ainda encontram o cadastro certo, em ordem de pontuação."""
+    indice = IndiceTrigramas([
+        (1, "MARIA EDUARDA SOUZA"),
+        (2, "MARIA EDUARDA SANTOS"),
+        (3, "JOAO PEDRO LIMA"),
+    ])
+    candidatos = indice.buscar("MARIA EDUARDA SOUSA", limite=3, pontuacao_minima=0.3)
+    assert [c[0] for c in candidatos] == [1, 2]
+    assert candidatos[0][2] > candidatos[1][2]
+    assert indice.buscar("JOAO LIMA", pontuacao_minima=0.5)[0][:2] == (3, "JOAO PEDRO LIMA")
+    assert indice.buscar("XYZ") == []
+
+
+def _cadastro_realista(quantidade):
+    """Nomes variados ligados pelas partículas (DA, DE, DOS) que aparecem em quase todo cadastro."""
+    silabas = ["BA", "CE", "DI", "FO", "GU", "LA", "ME", "NI", "PO", "RU", "SA", "TE", "VI", "XO", "ZU"]
+
+    def palavra(n):
+        return "".join(silabas[(n // 15 ** k) % 15] for k in range(3))
+
+    particulas = ["DA", "DE", "DOS"]
+    return [(i, f"{palavra(i)} {particulas[i % 3]} {palavra(i * 7 + 1)} {particulas[(i // 3) % 3]} {palavra(i * 13 + 2)}")
+            for i in range(quantidade)]
+
+
+def test_busca_nao_pontua_quem_so_compartilha_particulas():
+    """Trigramas das partículas não viram candidatos: pontua-se uma fração do cadastro, com o mesmo resultado."""
+    nomes = _cadastro_realista(3000) + [(9999, "BEATRIZ DA SILVA DOS SANTOS MONTEIRO")]
+    indice = IndiceTrigramas(nomes)
+    assert {"  D", " DA", "DA ", " DE", "DOS"} <= indice.parada
+
+    consulta = "BEATRIS DA SILVA DOS SANTOS MONTEIRO"
+    candidatos = indice.candidatos(consulta)
+    assert 9999 in candidatos
+    assert len(candidatos) < len(indice) // 4
+
+    # Mesmo resultado de pontuar todo o cadastro
+    q = trigramas(consulta)
+    completo = sorted(
+        ((i, n, round(len(q & trigramas(n)) / len(q | trigramas(n)), 3)) for i, n in nomes),
+        key=lambda c: (-c[2], c[1])
+    )
+    esperado = [c for c in completo if c[2] >= 0.4][:3]
+    assert indice.buscar(consulta) == esperado
+    assert esperado[0][0] == 9999
+
+
+def test_consulta_so_de_particulas_faz_busca_completa():
+    """Sem trigramas raros suficientes na consulta, os de parada também geram candidatos."""
+    indice = IndiceTrigramas(_cadastro_realista(3000))
+    assert len(indice.candidatos("DA DOS", pontuacao_minima=0.1)) == len(indice)
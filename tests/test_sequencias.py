@@ -0,0 +1,42 @@
+# Em tests/test_sequencias.py
+
+from datetime import date
+
+from scripts.sequencias import SEM_SEQUENCIA, Sequencia, calcular_sequencia, dia_da_semana
+
+SEGUNDA, QUARTA, SEXTA = 0, 2, 4
+
+
+def test_dia_da_semana_aceita_acentos_e_sufixos():
+    assert dia_da_semana("TERÇA") == 1
+    assert dia_da_semana("terca-feira") == 1
+    assert dia_da_semana(" Sábado ") == 5
+    assert dia_da_semana("Planilha1") is None
+
+
+def test_sexta_e_segunda_seguinte_sao_aulas_seguidas():
+    """Faltas na sexta e na segunda seguinte formam uma sequência de 2 aulas, apesar do fim de semana."""
+    registros = {date(2024, 5, 3): True, date(2024, 5, 6): True}
+    assert calcular_sequencia({SEGUNDA, SEXTA}, registros) == Sequencia(
+        2, 2, date(2024, 5, 3), date(2024, 5, 3)
+    )
+
+
+def test_aula_sem_registro_e_desconhecida_e_feriado_nao_conta():
+    """Turma semanal: a aula do dia 13 sem registro é pulada, não conta como presença; falta em feriado não conta."""
+    registros = {date(2024, 5, 6): True, date(2024, 5, 20): True, date(2024, 5, 27): True}
+    assert calcular_sequencia({SEGUNDA}, registros) == Sequencia(3, 3, date(2024, 5, 6), date(2024, 5, 6))
+    com_feriado = calcular_sequencia({SEGUNDA}, registros, [date(2024, 5, 6)])
+    assert com_feriado == Sequencia(2, 2, date(2024, 5, 20), date(2024, 5, 20))
+
+
+def test_presenca_zera_atual_mas_guarda_maior():
+    registros = {date(2024, 5, 1): True, date(2024, 5, 3): True, date(2024, 5, 6): True, date(2024, 5, 8): False}
+    sequencia = calcular_sequencia({SEGUNDA, QUARTA, SEXTA}, registros)
+    assert sequencia == Sequencia(0, 3, None, date(2024, 5, 1))
+
+
+def test_sem_turma_ou_sem_faltas_nao_ha_sequencia():
+    assert calcular_sequencia(set(), {date(2024, 5, 6): True}) == SEM_SEQUENCIA
+    assert calcular_sequencia({SEGUNDA}, {date(2024, 5, 6): False}) == SEM_SEQUENCIA
+    assert calcular_sequencia({SEGUNDA}, {date(2024, 5, 6): True}, [date(2024, 5, 6)]) == SEM_SEQUENCIA
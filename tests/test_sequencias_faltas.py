@@ -0,0 +1,52 @@
+# Em tests/test_sequencias_faltas.py
+
+from datetime import date
+
+from scripts.db_utils import (
+    carregar_feriados, carregar_sequencias_faltas, importar_horarios, remover_feriado, salvar_chamadas_lote,
+    salvar_feriado, salvar_justificativas_lote
+)
+
+
+def _sequencia(aluno_id):
+    sequencias = carregar_sequencias_faltas(minimo=0).set_index("aluno_id")
+    return tuple(sequencias.loc[aluno_id, ["atual", "maior", "inicio_atual", "calculado_ate"]])
+
+
+def test_sequencias_gravadas_com_feriados(banco_temporario, planilha_horarios):
+    """ALUNO UM tem aula às segundas: a segunda sem registro não interrompe; falta em feriado não conta."""
+    importar_horarios()
+    salvar_chamadas_lote([(1, "Faltou"), (2, "Presente")], date(2024, 5, 6), "08:00 às 09:00", "Prof")
+    salvar_chamadas_lote([(2, "Presente")], date(2024, 5, 13), "09:00 às 10:00", "Prof")
+    salvar_justificativas_lote([(1, "Febre", False)], date(2024, 5, 20), "Prof")
+    assert _sequencia(1) == (2, 2, "2024-05-06", "2024-05-20")
+    assert carregar_sequencias_faltas()["nome_aluno"].tolist() == ["ALUNO UM"]
+
+    assert salvar_feriado(date(2024, 5, 20), "Recesso")
+    assert carregar_feriados()["data"].tolist() == ["2024-05-20"]
+    assert _sequencia(1) == (1, 1, "2024-05-06", "2024-05-20")
+    assert carregar_sequencias_faltas().empty
+
+    assert remover_feriado(date(2024, 5, 20))
+    assert not remover_feriado(date(2024, 5, 20))
+    assert _sequencia(1)[:2] == (2, 2)
+
+    salvar_chamadas_lote([(1, "Presente")], date(2024, 5, 27), "08:00 às 09:00", "Prof")
+    assert _sequencia(1) == (0, 2, None, "2024-05-27")
+
+
+def test_chamada_de_outra_turma_nao_conta_como_presenca(banco_temporario, planilha_horarios):
+    """Turmas de segunda e de terça: chamadas mais recentes da terça não fecham as segundas sem registro."""
+    importar_horarios()
+    salvar_chamadas_lote([(1, "Faltou")], date(2024, 5, 6), "08:00 às 09:00", "Prof")
+    salvar_chamadas_lote([(3, "Faltou")], date(2024, 5, 7), "10:00 às 11:00", "Prof")
+    for terca in (date(2024, 5, 14), date(2024, 5, 21)):
+        salvar_chamadas_lote([(3, "Presente")], terca, "10:00 às 11:00", "Prof")
+
+    # As segundas 13 e 20 de ALUNO UM não tiveram chamada: a referência dele é a sua última aula
+    assert _sequencia(1) == (1, 1, "2024-05-06", "2024-05-06")
+    atual, maior, _, calculado_ate = _sequencia(3)
+    assert (atual, maior, calculado_ate) == (0, 1, "2024-05-21")
+
+    salvar_chamadas_lote([(1, "Faltou")], date(2024, 5, 27), "08:00 às 09:00", "Prof")
+    assert _sequencia(1) == (2, 2, "2024-05-06", "2024-05-27")
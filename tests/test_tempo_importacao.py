@@ -0,0 +1,45 @@
+# Em tests/test_tempo_importacao.py
+
+import scripts
+from benchmarks import tempo_importacao
+
+
+def test_inicializacao_nao_importa_pacotes_pesados_e_cabe_no_orcamento():
+    """Scraper, login e gráficos ficam fora da inicialização, e o custo de importação não regride.
+
+    O orçamento é relativo ao custo de importar streamlit/pandas na mesma rodada, para que
+    uma máquina de CI carregada deixe os dois mais lentos sem reprovar o teste.
+    """
+    custo = tempo_importacao.custo_do_app()
+    assert "scripts.ui_pages" in custo
+    assert tempo_importacao.pesados_importados(list(custo)) == []
+
+    razao = tempo_importacao.custo_relativo(rodadas=3)
+    assert razao <= tempo_importacao.FRACAO_ORCAMENTO, (
+        f"Importação da inicialização custa {razao:.2f} vezes a da base "
+        f"(orçamento {tempo_importacao.FRACAO_ORCAMENTO}); rode python -m benchmarks.tempo_importacao"
+    )
+
+
+def test_processos_do_pool_nao_importam_streamlit():
+    """A leitura de histórico roda no pool a partir de um módulo que só carrega pandas/openpyxl."""
+    import migrate_to_db
+    from scripts import paralelo
+
+    assert migrate_to_db.ler_historico_chamadas.__module__ == "scripts.historico"
+    assert "scripts.historico" in paralelo.MODULOS_PRE_CARREGADOS
+    importados = {imp.modulo for imp in tempo_importacao.importacoes(["scripts.historico"])}
+    assert not importados & {"streamlit", "rich", "migrate_to_db", "scripts.db_utils"}
+
+
+def test_reexportacoes_do_pacote_sao_carregadas_sob_demanda():
+    """'from scripts import funcao' continua funcionando para todos os nomes exportados."""
+    from scripts import carregar_feriados, gerar_relatorio_excel_completo
+    from scripts.db_utils import carregar_feriados as original
+
+    assert carregar_feriados is original
+    assert callable(gerar_relatorio_excel_completo)
+    assert set(scripts.__all__) <= set(dir(scripts))
+    assert all(hasattr(scripts, nome) for nome in scripts.__all__ if nome not in {
+        "configurar_driver", "executar_scraper_sponte", "buscar_alunos_sponte"
+    })